@@ -6,8 +6,9 @@ from rest_framework.authentication import BasicAuthentication
 from rest_framework import exceptions
 
 from framework.auth import cas
+from framework.sessions import verify_access_token, verify_credentials
 from framework.sessions.model import Session
-from framework.auth.core import User, get_user
+from framework.auth.core import User
 from website import settings
 
 
@@ -42,7 +43,7 @@ class OSFBasicAuthentication(BasicAuthentication):
         """
         Authenticate the userid and password against username and password.
         """
-        user = get_user(email=userid, password=password)
+        user = verify_credentials(userid, password)
 
         if userid and user is None:
             raise exceptions.AuthenticationFailed(_('Invalid username/password.'))
@@ -57,26 +58,21 @@ class OSFCASAuthentication(authentication.BaseAuthentication):
     """Check whether the user provides a valid OAuth2 bearer token"""
 
     def authenticate(self, request):
-        client = cas.get_client()  # Returns a CAS server client
         try:
             auth_header_field = request.META["HTTP_AUTHORIZATION"]
             auth_token = cas.parse_auth_header(auth_header_field)
         except (cas.CasTokenError, KeyError):
             return None  # If no token in header, then this method is not applicable
 
-        # Found a token; query CAS for the associated user id
+        # Found a token; query CAS for the associated user, unless the token
+        # was verified recently
         try:
-            resp = client.profile(auth_token)
+            user = verify_access_token(auth_token)
         except cas.CasHTTPError:
             raise exceptions.NotAuthenticated('User provided an invalid OAuth2 access token')
 
-        if resp.authenticated is False:
-            raise exceptions.NotAuthenticated('CAS server failed to authenticate this token')
-
-        user_id = resp.user
-        user = User.load(user_id)
         if user is None:
-            raise exceptions.AuthenticationFailed("Could not find the user associated with this token")
+            raise exceptions.NotAuthenticated('CAS server failed to authenticate this token')
 
         return user, auth_token
 
@@ -39,6 +39,11 @@ class FilterMixin(object):
     FALSY = set(['false', 'False', 0, '0'])
     DEFAULT_OPERATOR = 'eq'
 
+    field_comparison_operators = {
+        ser.CharField: 'icontains',
+        ser.ListField: 'in',
+    }
+
     def __init__(self, *args, **kwargs):
         super(FilterMixin, self).__init__(*args, **kwargs)
         if not self.serializer_class:
@@ -71,6 +76,28 @@ class FilterMixin(object):
         else:
             return value
 
+    def get_comparison_operator(self, key):
+        field_type = type(self.serializer_class._declared_fields[key])
+        if field_type in self.field_comparison_operators:
+            return self.field_comparison_operators[field_type]
+        else:
+            return self.DEFAULT_OPERATOR
+
+    def get_field_query(self, field_name, value, model):
+        """Return a modular-odm query for `filter[field_name]=value` on the
+        records of `model`, or None if the field is not stored on `model` and
+        can only be evaluated in Python.
+
+        Views may override this to translate computed fields to queries.
+        """
+        field = self.serializer_class._declared_fields[field_name]
+        if isinstance(field, ser.SerializerMethodField):
+            return None
+        key = self.convert_key(field_name)
+        if key not in model._fields:
+            return None
+        return Q(key, self.get_comparison_operator(field_name), self.convert_value(value, field_name))
+
 
 class ODMFilterMixin(FilterMixin):
     """View mixin that adds a get_query_from_request method which converts query params
@@ -84,23 +111,11 @@ class ODMFilterMixin(FilterMixin):
 
     # TODO Handle simple and complex non-standard fields
 
-    field_comparison_operators = {
-        ser.CharField: 'icontains',
-        ser.ListField: 'in',
-    }
-
     def __init__(self, *args, **kwargs):
         super(FilterMixin, self).__init__(*args, **kwargs)
         if not self.serializer_class:
             raise NotImplementedError()
 
-    def get_comparison_operator(self, key):
-        field_type = type(self.serializer_class._declared_fields[key])
-        if field_type in self.field_comparison_operators:
-            return self.field_comparison_operators[field_type]
-        else:
-            return self.DEFAULT_OPERATOR
-
     def get_default_odm_query(self):
         raise NotImplementedError('Must define get_default_odm_query')
 
@@ -140,10 +155,19 @@ class ListFilterMixin(FilterMixin):
 
     Subclasses must define `get_default_queryset()`.
 
+    Subclasses listing records of a single schema can also set `model_class` and
+    define `get_default_keys()` and `load_queryset()`. Filters on fields stored on
+    `model_class` are then evaluated by the database, so that only the matching
+    records are loaded; the other filters are evaluated in Python on those records.
+    Either way, the order of the default queryset is preserved.
+
     Serializers that want to restrict which fields are used for filtering need to have a variable called
     filterable_fields which is a frozenset of strings representing the field names as they appear in the serialization.
     """
 
+    #: Schema of the listed records, if filters may be evaluated by the database
+    model_class = None
+
     def __init__(self, *args, **kwargs):
         super(FilterMixin, self).__init__(*args, **kwargs)
         if not self.serializer_class:
@@ -152,37 +176,62 @@ class ListFilterMixin(FilterMixin):
     def get_default_queryset(self):
         raise NotImplementedError('Must define get_default_queryset')
 
+    def get_default_keys(self):
+        """Return the primary keys of the default queryset, in order."""
+        return [item._primary_key for item in self.get_default_queryset()]
+
+    def load_queryset(self, keys):
+        """Return the records for `keys`, in order."""
+        return self.model_class.load_many(keys)
+
     def get_queryset_from_request(self):
-        default_queryset = self.get_default_queryset()
-        if self.request.QUERY_PARAMS:
-            param_queryset = self.param_queryset(self.request.QUERY_PARAMS, default_queryset)
-            return param_queryset
+        fields_dict = dict(
+            (field_name, value)
+            for field_name, value in query_params_to_fields(self.request.QUERY_PARAMS).items()
+            if self.is_filterable_field(key=field_name)
+        )
+        if not fields_dict:
+            return self.get_default_queryset()
+        return self.param_queryset(fields_dict)
+
+    def param_queryset(self, fields_dict):
+        """filters default queryset based on the `filter[field_name]=value` pairs in `fields_dict`"""
+        python_filters = fields_dict.items()
+        if self.model_class is None:
+            queryset = self.get_default_queryset()
         else:
-            return default_queryset
-
-    def param_queryset(self, query_params, default_queryset):
-        """filters default queryset based on query parameters"""
-        fields_dict = query_params_to_fields(query_params)
-        queryset = set(default_queryset)
-        if fields_dict:
+            queries, python_filters = [], []
             for field_name, value in fields_dict.items():
-                if self.is_filterable_field(key=field_name):
-                    queryset = queryset.intersection(set(self.get_filtered_queryset(field_name, value, default_queryset)))
+                query = self.get_field_query(field_name.strip(), value, self.model_class)
+                if query is None:
+                    python_filters.append((field_name, value))
+                else:
+                    queries.append(query)
+            keys = self.get_default_keys()
+            if queries:
+                query = functools.reduce(intersect, queries, Q(self.model_class._primary_name, 'in', keys))
+                matching = set(self.model_class.find(query).get_keys())
+                keys = [key for key in keys if key in matching]
+            queryset = self.load_queryset(keys)
+        for field_name, value in python_filters:
+            queryset = self.get_filtered_queryset(field_name, value, queryset)
         return list(queryset)
 
     def get_filtered_queryset(self, field_name, value, default_queryset):
-        """filters default queryset based on the serializer field type"""
+        """filters default queryset based on the serializer field type; items are
+        evaluated lazily, as the returned iterator is consumed"""
         field = self.serializer_class._declared_fields[field_name]
 
         if isinstance(field, ser.SerializerMethodField):
-            return_val = [item for item in default_queryset if self.get_serializer_method(field_name)(item) == self.convert_value(value, field_name)]
+            method = self.get_serializer_method(field_name)
+            return_val = (item for item in default_queryset if method(item) == self.convert_value(value, field_name))
         elif isinstance(field, ser.BooleanField):
-            return_val = [item for item in default_queryset if getattr(item, field_name, None) == self.convert_value(value, field_name)]
+            return_val = (item for item in default_queryset if getattr(item, field_name, None) == self.convert_value(value, field_name))
         elif isinstance(field, ser.CharField):
-            return_val = [item for item in default_queryset if value.lower() in getattr(item, field_name, None).lower()]
+            return_val = (item for item in default_queryset if value.lower() in getattr(item, field_name, None).lower())
         else:
             # TODO Ensure that if you try to filter on an invalid field, it returns a useful error.
-            return_val = [item for item in default_queryset if value in getattr(item, field_name, None)]
+            return_val = (item for item in default_queryset if value in getattr(item, field_name, None))
 
         return return_val
 
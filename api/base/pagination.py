@@ -1,29 +1,172 @@
+import base64
+import binascii
 from collections import OrderedDict
 
+from bson import json_util
+from modularodm import Q
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.utils.urls import (
     replace_query_param, remove_query_param
 )
 
+
+def encode_cursor(value, primary_key, reverse=False):
+    """Return an opaque cursor for the position (`value`, `primary_key`) of a
+    record in a keyset ordering. A `reverse` cursor points at the records
+    before the position rather than after it.
+    """
+    payload = json_util.dumps([value, primary_key, reverse])
+    return base64.urlsafe_b64encode(payload)
+
+
+def decode_cursor(cursor):
+    """Inverse of `encode_cursor`.
+
+    :return: 3-tuple: (<value>, <primary key>, <reverse>)
+    :raises: NotFound if the cursor is invalid
+    """
+    try:
+        value, primary_key, reverse = json_util.loads(base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError, UnicodeEncodeError, binascii.Error):
+        raise NotFound('Invalid cursor.')
+    return value, primary_key, bool(reverse)
+
+
 class JSONAPIPagination(pagination.PageNumberPagination):
-    """Custom paginator that formats responses in a JSON-API compatible format."""
+    """Custom paginator that formats responses in a JSON-API compatible format.
+
+    Views that filter with `ODMFilterMixin` and define `cursor_ordering`
+    (e.g. ``'-date_created'``) can also be paginated by cursor, by passing
+    ``page[cursor]`` (empty for the first page) instead of ``page``. Records
+    are then ordered by the (`cursor_ordering`, primary key) tuple and each
+    page is fetched with a range query on that tuple, so that deep pages cost
+    no more than the first one. The ``sort`` parameter does not apply in this
+    mode, and ``meta.total`` is only computed if requested with
+    ``page[total]=exact`` or ``page[total]=estimate`` (counts up to
+    `max_count` records).
+    """
 
     page_size_query_param = 'page[size]'
+    cursor_query_param = 'page[cursor]'
+    total_query_param = 'page[total]'
+    max_count = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_ordering = getattr(view, 'cursor_ordering', None)
+        self.use_cursor = bool(
+            self.cursor_ordering and
+            self.cursor_query_param in request.query_params and
+            hasattr(view, 'get_query_from_request')
+        )
+        if not self.use_cursor:
+            return super(JSONAPIPagination, self).paginate_queryset(queryset, request, view=view)
+        return self.paginate_by_cursor(queryset, request, view)
+
+    def paginate_by_cursor(self, queryset, request, view):
+        self.request = request
+        self.display_page_controls = False
+        self.page_size = self.get_page_size(request)
+        self.schema = queryset.schema
+        self.query = view.get_query_from_request()
+
+        field = self.cursor_ordering.lstrip('-')
+        descending = self.cursor_ordering.startswith('-')
+
+        cursor = request.query_params[self.cursor_query_param]
+        reverse = False
+        query = self.query
+        if cursor:
+            value, primary_key, reverse = decode_cursor(cursor)
+            query = query & self.get_keyset_query(field, value, primary_key, descending != reverse)
+
+        prefix = '-' if descending != reverse else ''
+        results = list(
+            self.schema.find(query).sort(
+                prefix + field,
+                prefix + self.schema._primary_name,
+            ).limit(self.page_size + 1)
+        )
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        self.next_cursor = self.previous_cursor = None
+        if results:
+            if has_next:
+                last = results[-1]
+                self.next_cursor = encode_cursor(getattr(last, field), last._primary_key)
+            if has_previous:
+                first = results[0]
+                self.previous_cursor = encode_cursor(getattr(first, field), first._primary_key, reverse=True)
+        return results
+
+    def get_keyset_query(self, field, value, primary_key, descending):
+        """Query for the records following (`value`, `primary_key`) in the
+        ordering by (`field`, primary key).
+        """
+        operator = 'lt' if descending else 'gt'
+        return (
+            Q(field, operator, value) |
+            (Q(field, 'eq', value) & Q(self.schema._primary_name, operator, primary_key))
+        )
+
+    def get_total(self):
+        if not self.use_cursor:
+            return self.page.paginator.count
+        mode = self.request.query_params.get(self.total_query_param)
+        if mode == 'exact':
+            return self.schema.find(self.query).count()
+        if mode == 'estimate':
+            return self.schema.find(self.query).limit(self.max_count).count()
+        return None
+
+    def get_per_page(self):
+        if not self.use_cursor:
+            return self.page.paginator.per_page
+        return self.page_size
 
     def get_first_link(self):
+        if self.use_cursor:
+            if not self.previous_cursor:
+                return None
+            url = self.request.build_absolute_uri()
+            return replace_query_param(url, self.cursor_query_param, '')
         if not self.page.has_previous():
             return None
         url = self.request.build_absolute_uri()
         return remove_query_param(url, self.page_query_param)
 
     def get_last_link(self):
+        if self.use_cursor:
+            return None
         if not self.page.has_next():
             return None
         url = self.request.build_absolute_uri()
         page_number = self.page.paginator.num_pages
         return replace_query_param(url, self.page_query_param, page_number)
 
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super(JSONAPIPagination, self).get_next_link()
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super(JSONAPIPagination, self).get_previous_link()
+        if not self.previous_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.previous_cursor)
+
     def get_paginated_response(self, data):
         response_dict = OrderedDict([
             ('data', data),
@@ -33,8 +176,8 @@ class JSONAPIPagination(pagination.PageNumberPagination):
                 ('prev', self.get_previous_link()),
                 ('next', self.get_next_link()),
                 ('meta', OrderedDict([
-                    ('total', self.page.paginator.count),
-                    ('per_page', self.page.paginator.per_page),
+                    ('total', self.get_total()),
+                    ('per_page', self.get_per_page()),
                 ]))
             ])),
         ])
@@ -2,6 +2,7 @@ import collections
 import re
 
 from rest_framework import serializers as ser
+from rest_framework.permissions import SAFE_METHODS
 from website.util.sanitize import strip_html
 from api.base.utils import absolute_reverse, waterbutler_url_for
 
@@ -62,8 +63,20 @@ class LinksField(ser.Field):
         # not just the field attribute.
         return obj
 
+    def get_links(self):
+        """The links to resolve. With sparse fieldsets, relationships (nested
+        links) are only resolved if requested.
+        """
+        requested = self.parent.requested_fields
+        if requested is None:
+            return self.links
+        return {
+            key: value for key, value in self.links.iteritems()
+            if key in requested or not isinstance(value, collections.Mapping)
+        }
+
     def to_representation(self, obj):
-        ret = _rapply(self.links, _url_val, obj=obj, serializer=self.parent)
+        ret = _rapply(self.get_links(), _url_val, obj=obj, serializer=self.parent)
         if hasattr(obj, 'get_absolute_url'):
             ret['self'] = obj.get_absolute_url()
         return ret
@@ -144,6 +157,8 @@ class WaterbutlerLink(Link):
 class JSONAPIListSerializer(ser.ListSerializer):
 
     def to_representation(self, data):
+        data = list(data)
+        self.child.annotate(data)
         # Don't envelope when serializing collection
         return [
             self.child.to_representation(item, envelope=None) for item in data
@@ -153,14 +168,76 @@ class JSONAPIListSerializer(ser.ListSerializer):
 class JSONAPISerializer(ser.Serializer):
     """Base serializer. Requires that a `type_` option is set on `class Meta`. Also
     allows for enveloping of both single resources and collections.
+
+    On reads, clients can request a subset of the fields of each type with
+    ``fields[<type>]=<name>,<name>``, and embed related resources with
+    ``embed=<name>,<name>``; these are returned under ``embeds`` in each
+    resource. Embeddable relationships are declared in `embeds`.
     """
 
+    #: Maps the names of relationships that can be embedded to the name of a
+    #: method taking the objects being serialized and returning a dictionary
+    #: mapping their primary keys to lists of serialized related resources
+    embeds = {}
+
+    def __init__(self, *args, **kwargs):
+        # Embedded resources do not embed further resources
+        self.is_embedded = kwargs.pop('embedded', False)
+        self.embedded = {}
+        super(JSONAPISerializer, self).__init__(*args, **kwargs)
+
+    def get_query_param(self, name):
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        return request.query_params.get(name)
+
+    @property
+    def requested_fields(self):
+        """Names of the fields requested with ``fields[<type>]``, or None if
+        all fields are.
+        """
+        value = self.get_query_param('fields[{0}]'.format(self.Meta.type_))
+        if value is None:
+            return None
+        return set(name.strip() for name in value.split(',') if name.strip())
+
+    @property
+    def requested_embeds(self):
+        if self.is_embedded:
+            return []
+        value = self.get_query_param('embed') or ''
+        return [
+            name for name in (each.strip() for each in value.split(','))
+            if name in self.embeds
+        ]
+
+    # overrides Serializer
+    def get_fields(self):
+        fields = super(JSONAPISerializer, self).get_fields()
+        requested = self.requested_fields
+        if requested is not None:
+            for name in fields.keys():
+                if name not in requested and name not in ('id', 'links'):
+                    del fields[name]
+        return fields
+
     # overrides Serializer
     @classmethod
     def many_init(cls, *args, **kwargs):
         kwargs['child'] = cls()
         return JSONAPIListSerializer(*args, **kwargs)
 
+    def annotate(self, objs):
+        """Called with the objects of a collection before they are serialized,
+        so that values computed from related records can be fetched for all of
+        them at once rather than per object. Fetches the requested embeds.
+        """
+        self.embedded = {
+            name: getattr(self, self.embeds[name])(objs)
+            for name in self.requested_embeds
+        }
+
     # overrides Serializer
     def to_representation(self, obj, envelope='data'):
         """Serialize to final representation.
@@ -172,8 +249,16 @@ class JSONAPISerializer(ser.Serializer):
         meta = getattr(self, 'Meta', None)
         type_ = getattr(meta, 'type_', None)
         assert type_ is not None, 'Must define Meta.type_'
+        if envelope:
+            self.annotate([obj])
         data = super(JSONAPISerializer, self).to_representation(obj)
         data['type'] = type_
+        if self.embedded:
+            pk = getattr(obj, '_primary_key', None)
+            data['embeds'] = {
+                name: {'data': embedded.get(pk, [])}
+                for name, embedded in self.embedded.iteritems()
+            }
         if envelope:
             ret[envelope] = data
         else:
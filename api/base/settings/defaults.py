@@ -154,6 +154,12 @@ SWAGGER_SETTINGS = {
         <pre>/users?filter[fullname]=meitn</pre>
         <p>You can filter on multiple fields, or the same field in different ways, by &-ing the query parameters together.</p>
         <pre>/users?filter[fullname]=lise&filter[family_name]=mei</pre>
+        <h3>Fields and embeds</h3>
+        <p>To get only some of the fields of a type of resource, list them in a query parameter in the form:</p>
+        <pre>fields[&lt;type&gt;]=&lt;fieldname&gt;,&lt;fieldname&gt;</pre>
+        <p>Related resources that support it can be returned with each resource, under "embeds", to save a request
+        per resource:</p>
+        <pre>/nodes?embed=contributors,children&fields[users]=fullname</pre>
         <h3>Links</h3>
         <p>Responses will generally have associated links. These are helpers to keep you from having to construct
         URLs in your code or by hand. If you know the route to a high-level resource, then feel free to just go to that
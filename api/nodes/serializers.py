@@ -1,9 +1,12 @@
+import collections
+
 from rest_framework import serializers as ser
 
-from website.models import Node
+from website.models import Node, Pointer, User
 from framework.auth.core import Auth
 from rest_framework import exceptions
 from api.base.serializers import JSONAPISerializer, LinksField, Link, WaterbutlerLink
+from api.users.serializers import UserSerializer
 
 
 class NodeSerializer(JSONAPISerializer):
@@ -65,12 +68,55 @@ class NodeSerializer(JSONAPISerializer):
                               )
     # TODO: finish me
 
+    embeds = {
+        'contributors': 'embed_contributors',
+        'children': 'embed_children',
+    }
+
     class Meta:
         type_ = 'nodes'
 
     def get_absolute_url(self, obj):
         return obj.absolute_url
 
+    def embed_contributors(self, nodes):
+        """Load the contributors of all `nodes` with one query."""
+        user_ids = set(key for node in nodes for key in node.contributors._to_primary_keys())
+        serializer = UserSerializer(context=self.context, embedded=True)
+        serialized = {
+            user._id: serializer.to_representation(user, envelope=None)
+            for user in User.load_many(list(user_ids))
+        }
+        return {
+            node._id: [
+                serialized[key] for key in node.contributors._to_primary_keys()
+                if key in serialized
+            ]
+            for node in nodes
+        }
+
+    def embed_children(self, nodes):
+        """Load the visible children of all `nodes` with one query."""
+        children = [
+            Node.load(data=record) for record in Node._storage[0].store.find({
+                '__backrefs.parent.node.nodes': {'$in': [node._id for node in nodes]},
+                '$or': self.get_visible_query(),
+            })
+        ]
+        serializer = NodeSerializer(context=self.context, embedded=True)
+        serializer.annotate(children)
+        serialized = {
+            child._id: serializer.to_representation(child, envelope=None)
+            for child in children
+        }
+        return {
+            node._id: [
+                serialized[key] for key in node.nodes._to_primary_keys()
+                if key in serialized
+            ]
+            for node in nodes
+        }
+
     # TODO: See if we can get the count filters into the filter rather than the serializer.
 
     def get_user_auth(self, request):
@@ -81,20 +127,105 @@ class NodeSerializer(JSONAPISerializer):
             auth = Auth(user)
         return auth
 
+    def include_counts(self):
+        """Relationship counts are omitted (null) if the request passes
+        ``counts=false``.
+        """
+        request = self.context.get('request')
+        if request is None:
+            return True
+        return request.query_params.get('counts', 'true').strip().lower() not in ('false', '0')
+
+    def get_visible_query(self):
+        """Raw query clauses matching the nodes the requesting user can view,
+        as ``Node.can_view`` does for requests without a private link key.
+        """
+        user = self.context['request'].user
+        visible = [{'is_public': True}]
+        if not user.is_anonymous():
+            visible.append({'reader_ids': user._id})
+        return visible
+
+    # overrides JSONAPISerializer
+    def annotate(self, nodes):
+        """Count the visible children and registrations and the pointers of a
+        page of nodes with one query each, rather than loading the related
+        nodes of every node. Only the counts of requested relationships are
+        computed.
+        """
+        super(NodeSerializer, self).annotate(nodes)
+        self.counts = {}
+        if not nodes or not self.include_counts():
+            return
+        node_ids = [node._id for node in nodes]
+        requested = self.requested_fields
+        counts = {}
+
+        if requested is None or 'children' in requested:
+            counts['children'] = collections.Counter()
+            for record in Node._storage[0].store.find(
+                    {'__backrefs.parent.node.nodes': {'$in': node_ids}, '$or': self.get_visible_query()},
+                    fields=['__backrefs.parent.node.nodes']):
+                counts['children'].update(record['__backrefs']['parent']['node']['nodes'])
+
+        if requested is None or 'registrations' in requested:
+            counts['registrations'] = collections.Counter(
+                record['registered_from'] for record in Node._storage[0].store.find(
+                    {'registered_from': {'$in': node_ids}, '$or': self.get_visible_query()},
+                    fields=['registered_from'],
+                )
+            )
+
+        if requested is None or 'node_links' in requested:
+            counts['node_links'] = collections.Counter()
+            for record in Pointer._storage[0].store.find(
+                    {'__backrefs.parent.node.nodes': {'$in': node_ids}},
+                    fields=['__backrefs.parent.node.nodes']):
+                counts['node_links'].update(record['__backrefs']['parent']['node']['nodes'])
+
+        for node_id in node_ids:
+            self.counts[node_id] = {
+                name: counter[node_id]
+                for name, counter in counts.iteritems()
+            }
+
+    def get_annotated_count(self, obj, name):
+        try:
+            return self.counts[obj._id][name]
+        except (AttributeError, KeyError):
+            return None
+
     def get_node_count(self, obj):
+        if not self.include_counts():
+            return None
+        count = self.get_annotated_count(obj, 'children')
+        if count is not None:
+            return count
         auth = self.get_user_auth(self.context['request'])
         nodes = [node for node in obj.nodes if node.can_view(auth) and node.primary]
         return len(nodes)
 
     def get_contrib_count(self, obj):
+        if not self.include_counts():
+            return None
         return len(obj.contributors)
 
     def get_registration_count(self, obj):
+        if not self.include_counts():
+            return None
+        count = self.get_annotated_count(obj, 'registrations')
+        if count is not None:
+            return count
         auth = self.get_user_auth(self.context['request'])
         registrations = [node for node in obj.node__registrations if node.can_view(auth)]
         return len(registrations)
 
     def get_pointers_count(self, obj):
+        if not self.include_counts():
+            return None
+        count = self.get_annotated_count(obj, 'node_links')
+        if count is not None:
+            return count
         return len(obj.nodes_pointer)
 
     @staticmethod
@@ -5,7 +5,7 @@ from rest_framework import generics, permissions as drf_permissions
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from framework.auth.core import Auth
-from website.models import Node, Pointer
+from website.models import Node, Pointer, User
 from api.users.serializers import ContributorSerializer
 from api.base.filters import ODMFilterMixin, ListFilterMixin
 from api.base.utils import get_object_or_404, waterbutler_url_for
@@ -39,12 +39,20 @@ class NodeList(generics.ListCreateAPIView, ODMFilterMixin):
 
     By default, a GET will return a list of public nodes, sorted by date_modified. You can filter Nodes by their title,
     description, and public fields.
+
+    Large lists can be paged through by cursor, newest first, by passing `page[cursor]` (empty for the first page)
+    and following the `next` and `prev` links. The total is then omitted unless requested with `page[total]=exact`
+    or `page[total]=estimate`.
+
+    Pass `counts=false` to omit the counts of related children, contributors, node links and registrations, which
+    are then null.
     """
     permission_classes = (
         drf_permissions.IsAuthenticatedOrReadOnly,
     )
     serializer_class = NodeSerializer
     ordering = ('-date_modified', )  # default ordering
+    cursor_ordering = '-date_created'  # ordering with page[cursor]
 
     # overrides ODMFilterMixin
     def get_default_odm_query(self):
@@ -55,7 +63,7 @@ class NodeList(generics.ListCreateAPIView, ODMFilterMixin):
         user = self.request.user
         permission_query = Q('is_public', 'eq', True)
         if not user.is_anonymous():
-            permission_query = (Q('is_public', 'eq', True) | Q('contributors', 'icontains', user._id))
+            permission_query = (Q('is_public', 'eq', True) | Q('reader_ids', 'eq', user._id))
 
         query = base_query & permission_query
         return query
@@ -128,16 +136,39 @@ class NodeContributorsList(generics.ListAPIView, ListFilterMixin, NodeMixin):
     )
 
     serializer_class = ContributorSerializer
+    model_class = User
+
+    # overrides NodeMixin
+    def get_node(self):
+        # Needed several times while filtering; load and check the node once
+        if not hasattr(self, '_node'):
+            self._node = super(NodeContributorsList, self).get_node()
+        return self._node
 
     def get_default_queryset(self):
-        node = self.get_node()
-        visible_contributors = node.visible_contributor_ids
-        contributors = []
-        for contributor in node.contributors:
+        return self.load_queryset(self.get_default_keys())
+
+    # overrides ListFilterMixin
+    def get_default_keys(self):
+        return self.get_node().contributors._to_primary_keys()
+
+    # overrides ListFilterMixin
+    def load_queryset(self, keys):
+        visible_contributors = set(self.get_node().visible_contributor_ids)
+        contributors = User.load_many(keys)
+        for contributor in contributors:
             contributor.bibliographic = contributor._id in visible_contributors
-            contributors.append(contributor)
         return contributors
 
+    # overrides FilterMixin
+    def get_field_query(self, field_name, value, model):
+        if field_name == 'bibliographic':
+            bibliographic = self.convert_value(value, field_name)
+            if bibliographic is not None:
+                operator = 'in' if bibliographic else 'nin'
+                return Q('_id', operator, self.get_node().visible_contributor_ids)
+        return super(NodeContributorsList, self).get_field_query(field_name, value, model)
+
     # overrides ListAPIView
     def get_queryset(self):
         return self.get_queryset_from_request()
@@ -11,9 +11,17 @@ class AddonModelMixin(StoredObject):
     }
 
     def get_addons(self):
+        """Get the settings records of all add-ons enabled on the owner, in
+        the order of ``settings.ADDONS_AVAILABLE_DICT``.
+
+        The ids of the settings records attached to the owner are read from
+        its ``addons`` backrefs, so add-ons without settings records cost
+        nothing, and the records of each settings model are loaded with a
+        single query (memoized for the request by `StoredObject.load_many`).
+        """
         addons = []
-        for addon_name in settings.ADDONS_AVAILABLE_DICT.keys():
-            addon = self.get_addon(addon_name)
+        for addon_config in settings.ADDONS_AVAILABLE_DICT.values():
+            addon = self._get_addon(addon_config)
             if addon:
                 addons.append(addon)
         return addons
@@ -38,6 +46,27 @@ class AddonModelMixin(StoredObject):
             addon_config.settings_models[self._name]._name,
         )
 
+    def _addon_settings_ids(self, settings_model):
+        """Primary keys of the `settings_model` records owned by this record,
+        read from its backrefs without loading the records.
+        """
+        backrefs = self._backrefs.get('addons', {}).get(settings_model._name, {})
+        return [key for keys in backrefs.values() for key in keys]
+
+    def _get_addon(self, addon_config, deleted=False):
+        settings_model = addon_config.settings_models.get(self._name)
+        if not settings_model:
+            return None
+        keys = self._addon_settings_ids(settings_model)
+        if not keys:
+            return None
+        addons = settings_model.load_many(keys)
+        if addons:
+            if deleted or not addons[0].deleted:
+                assert len(addons) == 1, 'Violation of one-to-one mapping with addon model'
+                return addons[0]
+        return None
+
     def get_addon(self, addon_name, deleted=False):
         """Get addon for node.
 
@@ -48,17 +77,7 @@ class AddonModelMixin(StoredObject):
         addon_config = settings.ADDONS_AVAILABLE_DICT.get(addon_name)
         if not addon_config or not addon_config.settings_models.get(self._name):
             return False
-
-        backref_key = self._backref_key(addon_config)
-        addons = [
-            addon for addon in getattr(self, backref_key)
-            if addon is not None
-        ]
-        if addons:
-            if deleted or not addons[0].deleted:
-                assert len(addons) == 1, 'Violation of one-to-one mapping with addon model'
-                return addons[0]
-        return None
+        return self._get_addon(addon_config, deleted=deleted)
 
     def has_addon(self, addon_name, deleted=False):
         return bool(self.get_addon(addon_name, deleted=deleted))
@@ -1,42 +1,167 @@
 #!/usr/bin/env python
 # encoding: utf-8
 
+import os
+import atexit
+import weakref
 import functools
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from framework.mongo import database
+from framework.mongo import database, get_cache_key, dummy_request
+from framework.mongo.handlers import get_mongo_client
 from framework.sessions import session
+from framework.analytics.buffer import CounterBuffer
+from framework.analytics.filters import PageFilter
+from website import settings
 
 from flask import request
 
 
 collection = database['pagecounters']
 
+# Counters are split between one document per page (or user) holding running
+# totals, and one "bucket" document per page (or user) and month holding the
+# counts of each day of the month, with ids of the form `<page>:<YYYY/MM>`.
+# Documents thus stay small however long a page is visited, and the counts of
+# a period are read with a range query on `_id`.
+PAGE_BUCKETS = 'pagecounterbuckets'
+USER_ACTIVITY_BUCKETS = 'useractivitybuckets'
+MONTH_FORMAT = '%Y/%m'
+DAY_FORMAT = '%d'
+
+_flush_client = None
+_flush_client_pid = None
+
+
+def _get_flush_client():
+    """Return the client buffered counters are written with, creating it on
+    first use in each process. It is never lent to requests, so that counters
+    are not written in, nor rolled back with, a request's transaction.
+    """
+    global _flush_client, _flush_client_pid
+    if _flush_client is None or _flush_client_pid != os.getpid():
+        _flush_client = get_mongo_client()
+        _flush_client_pid = os.getpid()
+    return _flush_client
+
+
+#: Page view increments of the current process not yet written to `pagecounters`
+#: and its buckets
+counter_buffer = CounterBuffer(
+    _get_flush_client,
+    flush_interval=settings.PAGE_COUNTER_FLUSH_INTERVAL,
+    max_pending=settings.PAGE_COUNTER_MAX_PENDING,
+)
+
+# Maps each request (see `framework.mongo.get_cache_key`) to the number of
+# flushes of `counter_buffer` and the page counters read since, by cleaned
+# page key
+_counter_caches = weakref.WeakKeyDictionary()
+
+
+def _get_counter_cache():
+    """Return the page counters read so far in the current request, or `None`
+    outside of requests, where reads are not memoized.
+    """
+    key = get_cache_key()
+    if key is dummy_request:
+        return None
+    flushes, cache = _counter_caches.get(key, (None, None))
+    # Counters read before a flush miss the increments it wrote
+    if flushes != counter_buffer.flushes:
+        cache = {}
+        _counter_caches[key] = (counter_buffer.flushes, cache)
+    return cache
+
+
+def flush_counters():
+    """Write the page view increments buffered by the current process."""
+    counter_buffer.flush()
+
+atexit.register(flush_counters)
+
+
+def get_bucket_id(key, date):
+    """Return the id of the bucket holding the counts of `key` on `date`."""
+    return '{0}:{1}'.format(key, date.strftime(MONTH_FORMAT))
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def iter_buckets(collection, key, start, end):
+    """Yield the (date, counts) pairs stored in the buckets of `key` for each
+    day between the dates `start` and `end` inclusive, in order.
+    """
+    start, end = _to_date(start), _to_date(end)
+    buckets = collection.find({
+        '_id': {
+            '$gte': get_bucket_id(key, start),
+            '$lte': get_bucket_id(key, end),
+        },
+        'key': key,
+    }).sort('_id', 1)
+    for bucket in buckets:
+        for day, counts in sorted(bucket.get('date', {}).items()):
+            date = datetime.strptime(
+                '{0}/{1}'.format(bucket['month'], day),
+                '{0}/{1}'.format(MONTH_FORMAT, DAY_FORMAT),
+            ).date()
+            if start <= date <= end:
+                yield date, counts
+
 
 def increment_user_activity_counters(user_id, action, date, db=None):
     db = db or database  # default to local proxy
-    collection = database['useractivitycounters']
-    date = date.strftime('%Y/%m/%d')
-    query = {
-        '$inc': {
-            'total': 1,
-            'date.{0}.total'.format(date): 1,
-            'action.{0}.total'.format(action): 1,
-            'action.{0}.date.{1}'.format(action, date): 1,
-        }
-    }
-    collection.update(
+    day = date.strftime(DAY_FORMAT)
+    db['useractivitycounters'].update(
         {'_id': user_id},
-        query,
+        {
+            '$inc': {
+                'total': 1,
+                'action.{0}.total'.format(action): 1,
+            }
+        },
+        upsert=True,
+        manipulate=False,
+    )
+    db[USER_ACTIVITY_BUCKETS].update(
+        {
+            '_id': get_bucket_id(user_id, date),
+            'key': user_id,
+            'month': date.strftime(MONTH_FORMAT),
+        },
+        {
+            '$inc': {
+                'date.{0}.total'.format(day): 1,
+                'date.{0}.action.{1}'.format(day, action): 1,
+            }
+        },
         upsert=True,
         manipulate=False,
     )
     return True
 
 
+def get_activity_counts_by_date(user_id, start, end, db=None):
+    """Return the activity of a user on each day between `start` and `end`.
+
+    :return: List of (date, total, {action: count}) tuples for the days with
+        activity, in order
+    """
+    db = db or database
+    return [
+        (date, counts.get('total', 0), counts.get('action', {}))
+        for date, counts in iter_buckets(db[USER_ACTIVITY_BUCKETS], user_id, start, end)
+    ]
+
+
 def get_total_activity_count(user_id, db=None):
     db = db or database
-    collection = database['useractivitycounters']
+    collection = db['useractivitycounters']
     result = collection.find_one(
         {'_id': user_id}, {'total': 1}
     )
@@ -73,7 +198,10 @@ def build_page(rex, kwargs):
 
 
 def update_counter(page, db=None):
-    """Update counters for page.
+    """Update counters for page. Increments are buffered by the current
+    process (see `counter_buffer`); unique visits are tracked with one Bloom
+    filter of the pages visited by the session, and another of the pages
+    visited today.
 
     :param str page: Colon-delimited page key in analytics collection
     :param db: MongoDB database or `None`
@@ -81,40 +209,35 @@ def update_counter(page, db=None):
     db = db or database
     collection = db['pagecounters']
 
-    date = datetime.utcnow()
-    date = date.strftime('%Y/%m/%d')
+    now = datetime.utcnow()
+    date = now.strftime('%Y/%m/%d')
+    day = now.strftime(DAY_FORMAT)
 
     page = clean_page(page)
 
-    d = {'$inc': {}}
+    increments = {'total': 1}
+    bucket_increments = {'date.%s.total' % day: 1}
 
     visited_by_date = session.data.get('visited_by_date')
-    if not visited_by_date:
-        visited_by_date = {'date': date, 'pages': []}
-
-    if date == visited_by_date['date']:
-        if page not in visited_by_date['pages']:
-            d['$inc']['date.%s.unique' % date] = 1
-            visited_by_date['pages'].append(page)
-            session.data['visited_by_date'] = visited_by_date
-    else:
-        visited_by_date['date'] = date
-        visited_by_date['pages'] = []
-        d['$inc']['date.%s.unique' % date] = 1
-        visited_by_date['pages'].append(page)
-        session.data['visited_by_date'] = visited_by_date
-
-    d['$inc']['date.%s.total' % date] = 1
-
-    visited = session.data.get('visited')  # '/project/x/, project/y/'
-    if not visited:
-        visited = []
-    if page not in visited:
-        d['$inc']['unique'] = 1
-        visited.append(page)
-        session.data['visited'] = visited
-    d['$inc']['total'] = 1
-    collection.update({'_id': page}, d, True, False)
+    if not visited_by_date or visited_by_date['date'] != date:
+        visited_by_date = {'date': date, 'pages': None}
+    visited_today = PageFilter.load(visited_by_date['pages'])
+    if visited_today.add(page):
+        bucket_increments['date.%s.unique' % day] = 1
+        session.data['visited_by_date'] = {'date': date, 'pages': visited_today.dump()}
+
+    visited = PageFilter.load(session.data.get('visited'))
+    if visited.add(page):
+        increments['unique'] = 1
+        session.data['visited'] = visited.dump()
+
+    counter_buffer.add(
+        db[PAGE_BUCKETS].full_name,
+        get_bucket_id(page, now),
+        bucket_increments,
+        fields={'key': page, 'month': now.strftime(MONTH_FORMAT)},
+    )
+    counter_buffer.add(collection.full_name, page, increments)
 
 
 def update_counters(rex, db=None):
@@ -137,20 +260,74 @@ def update_counters(rex, db=None):
 
 
 def get_basic_counters(page, db=None):
+    return get_basic_counters_many([page], db=db)[page]
+
+
+def get_basic_counters_many(pages, db=None):
+    """Fetch the counters of several pages with a single query. Counters are
+    memoized for the rest of the request, so that repeated lookups of the same
+    page are free. Increments buffered by the current process are included.
+
+    :param list pages: Page keys
+    :param db: MongoDB database or `None`
+    :return: Dictionary mapping each page to its (unique, total) counters, or
+        to (None, None) if the page was never counted
+    """
     db = db or database
     collection = db['pagecounters']
-    unique = 0
-    total = 0
-    collection = database['pagecounters']
-    result = collection.find_one(
-        {'_id': clean_page(page)},
-        {'total': 1, 'unique': 1}
-    )
-    if result:
-        if 'unique' in result:
-            unique = result['unique']
-        if 'total' in result:
-            total = result['total']
-        return unique, total
-    else:
-        return None, None
+    cache = _get_counter_cache()
+    if cache is None:
+        cache = {}
+
+    keys = dict((page, clean_page(page)) for page in pages)
+    missing = list(set(keys.values()) - set(cache))
+    if missing:
+        cache.update(dict.fromkeys(missing, (None, None)))
+        results = collection.find(
+            {'_id': {'$in': missing}},
+            {'total': 1, 'unique': 1}
+        )
+        for result in results:
+            cache[result['_id']] = (result.get('unique', 0), result.get('total', 0))
+
+    ret = {}
+    for page, key in keys.items():
+        unique, total = cache[key]
+        pending = counter_buffer.get_pending(collection.full_name, key)
+        if pending:
+            unique = (unique or 0) + pending.get('unique', 0)
+            total = (total or 0) + pending.get('total', 0)
+        ret[page] = (unique, total)
+    return ret
+
+
+def get_counters_by_date(page, start, end, db=None):
+    """Return the counters of a page for each day between the dates `start`
+    and `end` inclusive. Increments buffered by the current process are
+    included.
+
+    :return: List of (date, unique, total) tuples for the days with visits,
+        in order
+    """
+    db = db or database
+    collection = db[PAGE_BUCKETS]
+    page = clean_page(page)
+    start, end = _to_date(start), _to_date(end)
+    counts = dict(iter_buckets(collection, page, start, end))
+
+    month = start.replace(day=1)
+    while month <= end:
+        pending = counter_buffer.get_pending(collection.full_name, get_bucket_id(page, month))
+        for field, amount in pending.items():
+            # Fields are named date.<day>.<counter>
+            _, day, name = field.split('.')
+            date = month.replace(day=int(day))
+            if start <= date <= end:
+                day_counts = counts.setdefault(date, {})
+                day_counts[name] = day_counts.get(name, 0) + amount
+        month = (month + timedelta(days=32)).replace(day=1)
+
+    return [
+        (date, counts[date].get('unique', 0), counts[date].get('total', 0))
+        for date in sorted(counts)
+    ]
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Per-process write-behind buffer for analytics counters.
+
+Incrementing a counter document on every page view costs a write per request,
+most of them to the same few popular pages. Increments are instead summed in
+memory and written as a single ``$inc`` upsert per document by a background
+thread: every `flush_interval` seconds, as soon as `max_pending` documents
+have pending increments, and when the process exits. Readers add the
+increments still pending in their process, so that a process always sees its
+own writes.
+
+Only collection names are buffered; writes go through the client returned by
+`get_client`, which should be a client of its own rather than one lent to a
+request, so that they never run inside a request's transaction.
+"""
+
+import os
+import time
+import logging
+import threading
+import collections
+
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer(object):
+    """Buffer of ``$inc`` updates keyed by the full name of a collection, of
+    the form ``<database>.<collection>``, and document id.
+
+    :param get_client: Callable returning the MongoDB client written with
+    :param float flush_interval: Seconds after which pending increments are
+        written; 0 writes them as soon as possible
+    :param int max_pending: Number of documents with pending increments after
+        which they are written
+    """
+    def __init__(self, get_client, flush_interval=10, max_pending=1000):
+        self.get_client = get_client
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        # Held while writing, so that the flusher thread and exit handlers
+        # never write the same increments twice
+        self._flush_lock = threading.Lock()
+        # Set to have the flusher thread write pending increments right away
+        self._wake = threading.Event()
+        self._thread = None
+        # Maps (full collection name, document id) to the fields set on new documents
+        self._fields = {}
+        # Maps (full collection name, document id) to a Counter of field increments
+        self._pending = collections.defaultdict(collections.Counter)
+        # Increments being written by `flush`, still visible to readers
+        self._flushing = {}
+        self.flushes = 0
+        self.last_flush = time.time()
+
+    def _ensure_pid(self):
+        # Increments inherited from a parent process are written by the parent
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='counter-buffer')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        pid = self._pid
+        while self._pid == pid:
+            self._wake.wait(self.flush_interval or None)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not flush counters')
+
+    def add(self, name, key, increments, fields=None):
+        """Buffer `increments` to the document `key` of the collection `name`.
+        Never writes; the flusher thread is woken up early if too many
+        documents have pending increments.
+
+        :param dict increments: Amounts by field name, as passed to ``$inc``
+        :param dict fields: Values of other fields of the document, set when
+            it is created; these must not change for a given `key`
+        """
+        self._ensure_pid()
+        with self._lock:
+            self._fields[(name, key)] = fields or {}
+            self._pending[(name, key)].update(increments)
+            if not self.flush_interval or len(self._pending) >= self.max_pending:
+                self._wake.set()
+        self._ensure_thread()
+
+    def get_pending(self, name, key):
+        """Return the increments to the document `key` of the collection
+        `name` that are not written yet.
+        """
+        self._ensure_pid()
+        with self._lock:
+            pending = collections.Counter(self._pending.get((name, key), {}))
+            pending.update(self._flushing.get((name, key), {}))
+            return dict(pending)
+
+    def flush(self):
+        """Write all pending increments.
+
+        :return: Number of documents updated
+        """
+        self._ensure_pid()
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            pending, fields = self._pending, self._fields
+            self._pending = collections.defaultdict(collections.Counter)
+            self._fields = {}
+            self._flushing = pending
+            self.last_flush = time.time()
+        if not pending:
+            return 0
+        written, failed = 0, {}
+        try:
+            client = self.get_client()
+        except Exception:
+            logger.exception('Could not connect to write counters; keeping them pending')
+            failed = pending
+        else:
+            for (name, key), increments in pending.items():
+                # Fields matched by an upsert are set on the document it creates
+                spec = dict(fields.get((name, key), {}), _id=key)
+                database_name, collection_name = name.split('.', 1)
+                try:
+                    client[database_name][collection_name].update(
+                        spec,
+                        {'$inc': dict(increments)},
+                        upsert=True,
+                        manipulate=False,
+                    )
+                    written += 1
+                except Exception:
+                    logger.exception('Could not write counters of {0}; keeping them pending'.format(key))
+                    failed[(name, key)] = increments
+        with self._lock:
+            for each, increments in failed.items():
+                self._fields.setdefault(each, fields.get(each, {}))
+                self._pending[each].update(increments)
+            self._flushing = {}
+            self.flushes += 1
+        return written
+
+    def stats(self):
+        self._ensure_pid()
+        with self._lock:
+            return {
+                'pid': self._pid,
+                'pending': len(self._pending),
+                'flushes': self.flushes,
+                'last_flush': self.last_flush,
+            }
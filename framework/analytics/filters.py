@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Fixed-size Bloom filter of page keys.
+
+Sessions remember the pages they visited in order to count unique visits.
+A Bloom filter answers "was this page visited?" in a constant amount of
+space, whatever the number of pages, at the price of rare false positives,
+i.e. a unique visit that is not counted. With the default size of 8192 bits
+and 4 hashes, a session that visited 500 pages miscounts about 0.2% of new
+pages.
+"""
+
+import base64
+import struct
+import hashlib
+
+#: Number of bits of new filters
+FILTER_SIZE = 8192
+#: Number of bits set per page
+FILTER_HASHES = 4
+
+
+class PageFilter(object):
+
+    def __init__(self, bits=None, size=FILTER_SIZE, hashes=FILTER_HASHES):
+        if bits is None:
+            bits = bytearray(size // 8)
+        self.bits = bytearray(bits)
+        self.size = len(self.bits) * 8
+        self.hashes = hashes
+
+    @classmethod
+    def load(cls, value):
+        """Load a filter saved with `dump`. Lists of page keys, as stored in
+        sessions before filters were used, are converted to a filter.
+        """
+        if isinstance(value, basestring):
+            return cls(base64.b64decode(value))
+        page_filter = cls()
+        for page in value or []:
+            page_filter.add(page)
+        return page_filter
+
+    def dump(self):
+        """Return the filter as a string that can be stored in a session."""
+        return base64.b64encode(str(self.bits))
+
+    def _positions(self, page):
+        if isinstance(page, unicode):
+            page = page.encode('utf-8')
+        # Double hashing: derive all positions from the two halves of one digest
+        first, second = struct.unpack('<QQ', hashlib.md5(page).digest())
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def __contains__(self, page):
+        return all(
+            self.bits[position // 8] & (1 << (position % 8))
+            for position in self._positions(page)
+        )
+
+    def add(self, page):
+        """Add `page` to the filter.
+
+        :return: False if `page` was (probably) already in the filter
+        """
+        added = False
+        for position in self._positions(page):
+            mask = 1 << (position % 8)
+            if not self.bits[position // 8] & mask:
+                self.bits[position // 8] |= mask
+                added = True
+        return added
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from framework.sessions import session, create_session
+from framework.sessions.utils import remove_cached_auth_for_user
 from framework import bcrypt
 from framework.auth.exceptions import DuplicateEmailError
 
@@ -43,6 +44,8 @@ def authenticate(user, access_token, response):
 
 
 def logout():
+    if session.data.get('auth_user_id'):
+        remove_cached_auth_for_user(session.data['auth_user_id'])
     for key in ['auth_user_username', 'auth_user_id', 'auth_user_fullname', 'auth_user_access_token']:
         try:
             del session.data[key]
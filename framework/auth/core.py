@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import re
+import heapq
 import logging
 import urlparse
 import itertools
@@ -21,7 +22,7 @@ from framework.auth import exceptions, utils, signals
 from framework.sentry import log_exception
 from framework.addons import AddonModelMixin
 from framework.sessions.model import Session
-from framework.sessions.utils import remove_sessions_for_user
+from framework.sessions.utils import remove_sessions_for_user, remove_cached_auth_for_user
 from framework.exceptions import PermissionsError
 from framework.guid.model import GuidStoredObject
 from framework.bcrypt import generate_password_hash, check_password_hash
@@ -612,6 +613,8 @@ class User(GuidStoredObject, AddonModelMixin):
     def set_password(self, raw_password):
         """Set the password for this user to the hash of ``raw_password``."""
         self.password = generate_password_hash(raw_password)
+        if self._id:
+            remove_cached_auth_for_user(self._id)
 
     def check_password(self, raw_password):
         """Return a boolean of whether ``raw_password`` was correct."""
@@ -1079,31 +1082,36 @@ class User(GuidStoredObject, AddonModelMixin):
         watched_node_ids = set([config.node._id for config in self.watched])
         return node._id in watched_node_ids
 
-    def get_recent_log_ids(self, since=None):
-        '''Return a generator of recent logs' ids.
+    def get_recent_log_ids(self, since=None, before=None):
+        '''Return a generator of the ids of the logs of watched nodes, newest
+        first and without duplicates. The logs of the nodes are merged lazily,
+        so that only as many logs as the caller consumes are fetched.
 
         :param since: A datetime specifying the oldest time to retrieve logs
         from. If ``None``, defaults to 60 days before today. Must be a tz-aware
         datetime because PyMongo's generation times are tz-aware.
+        :param str before: Only return the ids of logs older than the log with
+            this id, e.g. the last log of the previous page
 
         :rtype: generator of log ids (strings)
         '''
-        log_ids = []
         # Default since to 60 days before today if since is None
         # timezone aware utcnow
         utcnow = dt.datetime.utcnow().replace(tzinfo=pytz.utc)
         since_date = since or (utcnow - dt.timedelta(days=60))
-        for config in self.watched:
-            # Extract the timestamps for each log from the log_id (fast!)
-            # The first 4 bytes of Mongo's ObjectId encodes time
-            # This prevents having to load each Log Object and access their
-            # date fields
-            node_log_ids = [log_id for log_id in config.node.logs._to_primary_keys()
-                                   if bson.ObjectId(log_id).generation_time > since_date and
-                                   log_id not in log_ids]
-            # Log ids in reverse chronological order
-            log_ids = _merge_into_reversed(log_ids, node_log_ids)
-        return (l_id for l_id in log_ids)
+        # The first 4 bytes of Mongo's ObjectId encode time, so that log ids
+        # sort by creation time and the date range is a range of log ids
+        since_id = str(bson.ObjectId.from_datetime(since_date))
+        log_ids = (
+            (log._id for log in config.node.get_logs_queryset(after=since_id, before=before))
+            for config in self.watched
+        )
+        previous = None
+        for log_id in _merge_into_reversed(*log_ids):
+            # Logs shared by several nodes come out next to each other
+            if log_id != previous:
+                yield log_id
+            previous = log_id
 
     def get_daily_digest_log_ids(self):
         '''Return a generator of log ids generated in the past day
@@ -1279,6 +1287,35 @@ class User(GuidStoredObject, AddonModelMixin):
 
 
 def _merge_into_reversed(*iterables):
-    '''Merge multiple sorted inputs into a single output in reverse order.
+    '''Lazily merge multiple inputs sorted in reverse order into a single
+    output in reverse order, with a heap of the next item of each input.
     '''
-    return sorted(itertools.chain(*iterables), reverse=True)
+    heap = []
+    for index, iterator in enumerate(itertools.imap(iter, iterables)):
+        for item in iterator:
+            heap.append((_Reversed(item), index, iterator))
+            break
+    heapq.heapify(heap)
+    while heap:
+        key, index, iterator = heap[0]
+        yield key.value
+        for item in iterator:
+            heapq.heapreplace(heap, (_Reversed(item), index, iterator))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+class _Reversed(object):
+    '''Heap key ordering values in reverse order.'''
+
+    __slots__ = ('value', )
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
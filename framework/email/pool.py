@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Per-process pool of authenticated SMTP sessions.
+
+Opening a session (connect, EHLO, STARTTLS, LOGIN) costs several round-trips,
+so sessions are kept open between tasks and reused for every message sent by
+the worker to the same server with the same credentials. Sessions that have
+been idle for a while are checked with NOOP before reuse, sessions are
+recycled after a number of messages (servers limit messages per session),
+and a message that fails because the server dropped the connection is retried
+once on a new session.
+"""
+
+import os
+import time
+import socket
+import smtplib
+import logging
+import threading
+import collections
+
+
+logger = logging.getLogger(__name__)
+
+#: Errors after which the session can no longer be used
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, socket.error)
+#: Errors that only concern one message; the session stays usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class SMTPSession(object):
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.time()
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class SMTPConnectionPool(object):
+    """Pool of SMTP sessions keyed by server and credentials.
+
+    :param int max_size: Maximum number of idle sessions kept per server
+    :param float max_idle: Seconds after which an idle session is checked
+        with NOOP before reuse
+    :param int max_messages: Number of messages after which a session is
+        replaced by a new one
+    """
+    def __init__(self, max_size=2, max_idle=60, max_messages=100):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle = collections.defaultdict(collections.deque)
+        self.created = 0
+
+    def _ensure_pid(self):
+        # Sessions inherited from a parent process share its sockets
+        if self._pid != os.getpid():
+            self._reset()
+
+    def connect(self, config):
+        """Open and authenticate a new session.
+
+        :param tuple config: (server, username, password, ttls, login)
+        """
+        server, username, password, ttls, login = config
+        smtp = smtplib.SMTP(server)
+        smtp.ehlo()
+        if ttls:
+            smtp.starttls()
+            smtp.ehlo()
+        if login:
+            smtp.login(username, password)
+        self.created += 1
+        return SMTPSession(smtp)
+
+    def checkout(self, config):
+        self._ensure_pid()
+        while True:
+            with self._lock:
+                try:
+                    session = self._idle[config].pop()
+                except IndexError:
+                    break
+            if time.time() - session.last_used < self.max_idle:
+                return session
+            try:
+                if session.smtp.noop()[0] == 250:
+                    return session
+            except CONNECTION_ERRORS:
+                pass
+            session.close()
+        return self.connect(config)
+
+    def checkin(self, config, session):
+        if self._pid != os.getpid():
+            return
+        session.last_used = time.time()
+        with self._lock:
+            idle = self._idle[config]
+            if len(idle) < self.max_size and session.sent < self.max_messages:
+                idle.append(session)
+                return
+        session.close()
+
+    def send(self, config, messages, skip_refused=True):
+        """Send messages over a pooled session.
+
+        :param tuple config: (server, username, password, ttls, login)
+        :param messages: Iterable of (from_addr, to_addrs, message string)
+        :param bool skip_refused: Log and skip messages refused by the server
+            instead of raising
+        :return: Number of messages sent
+        :raises: The connection error if a message cannot be sent on a new
+            session either
+        """
+        sent = 0
+        session = self.checkout(config)
+        try:
+            for from_addr, to_addrs, msg in messages:
+                if session.sent >= self.max_messages:
+                    session.close()
+                    session = self.connect(config)
+                for retry in (False, True):
+                    try:
+                        session.smtp.sendmail(from_addr, to_addrs, msg)
+                    except MESSAGE_ERRORS as error:
+                        if not skip_refused:
+                            raise
+                        logger.error('Message to {0} refused: {1!r}'.format(to_addrs, error))
+                        break
+                    except CONNECTION_ERRORS as error:
+                        if retry:
+                            raise
+                        logger.info('SMTP session lost ({0!r}); reconnecting'.format(error))
+                        session.close()
+                        session = self.connect(config)
+                    else:
+                        session.sent += 1
+                        sent += 1
+                        break
+        except Exception:
+            session.close()
+            raise
+        self.checkin(config, session)
+        return sent
+
+    def close(self):
+        """Close all idle sessions."""
+        with self._lock:
+            for idle in self._idle.values():
+                while idle:
+                    idle.pop().close()
+
+    def stats(self):
+        self._ensure_pid()
+        with self._lock:
+            return {
+                'pid': self._pid,
+                'idle': sum(len(idle) for idle in self._idle.values()),
+                'created': self.created,
+            }
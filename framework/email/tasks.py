@@ -1,12 +1,43 @@
-import smtplib
 import logging
 from email.mime.text import MIMEText
 
 from framework.tasks import app
+from framework.email.pool import SMTPConnectionPool
 from website import settings
 
 logger = logging.getLogger(__name__)
 
+#: SMTP sessions of the current worker process
+smtp_pool = SMTPConnectionPool(
+    max_size=settings.MAIL_POOL_SIZE,
+    max_idle=settings.MAIL_POOL_MAX_IDLE,
+    max_messages=settings.MAIL_MAX_MESSAGES_PER_CONNECTION,
+)
+
+
+def build_message(from_addr, to_addr, subject, message, mimetype='html'):
+    msg = MIMEText(message, mimetype, _charset='utf-8')
+    msg['Subject'] = subject
+    msg['From'] = from_addr
+    msg['To'] = to_addr
+    return msg
+
+
+def _get_config(ttls, login, username, password, mail_server):
+    """Return the pool key for the given connection options, or None if
+    sending should be skipped.
+    """
+    username = username or settings.MAIL_USERNAME
+    password = password or settings.MAIL_PASSWORD
+    mail_server = mail_server or settings.MAIL_SERVER
+
+    if not settings.USE_EMAIL:
+        return None
+    if login and (username is None or password is None):
+        logger.error('Mail username and password not set; skipping send.')
+        return None
+    return (mail_server, username, password, ttls, login)
+
 
 @app.task
 def send_email(from_addr, to_addr, subject, message, mimetype='html', ttls=True, login=True,
@@ -22,32 +53,30 @@ def send_email(from_addr, to_addr, subject, message, mimetype='html', ttls=True,
 
     :return: True if successful
     """
-    username = username or settings.MAIL_USERNAME
-    password = password or settings.MAIL_PASSWORD
-    mail_server = mail_server or settings.MAIL_SERVER
-
-    if not settings.USE_EMAIL:
+    config = _get_config(ttls, login, username, password, mail_server)
+    if config is None:
         return
-    if login and (username is None or password is None):
-        logger.error('Mail username and password not set; skipping send.')
-        return
-
-    msg = MIMEText(message, mimetype, _charset='utf-8')
-    msg['Subject'] = subject
-    msg['From'] = from_addr
-    msg['To'] = to_addr
 
-    s = smtplib.SMTP(mail_server)
-    s.ehlo()
-    if ttls:
-        s.starttls()
-        s.ehlo()
-    if login:
-        s.login(username, password)
-    s.sendmail(
-        from_addr=from_addr,
-        to_addrs=[to_addr],
-        msg=msg.as_string()
-    )
-    s.quit()
+    msg = build_message(from_addr, to_addr, subject, message, mimetype)
+    smtp_pool.send(config, [(from_addr, [to_addr], msg.as_string())], skip_refused=False)
     return True
+
+
+@app.task
+def send_emails(messages, ttls=True, login=True, username=None, password=None, mail_server=None):
+    """Send several emails over one SMTP session.
+
+    :param list messages: Dictionaries with the ``from_addr``, ``to_addr``,
+        ``subject``, ``message`` and (optionally) ``mimetype`` arguments of
+        :func:`send_email`
+    :return: Number of messages sent
+    """
+    config = _get_config(ttls, login, username, password, mail_server)
+    if config is None:
+        return
+
+    def build():
+        for each in messages:
+            msg = build_message(**each)
+            yield each['from_addr'], [each['to_addr']], msg.as_string()
+    return smtp_pool.send(config, build())
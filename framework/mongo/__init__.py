@@ -6,6 +6,7 @@ from modularodm.ext.concurrency import with_proxies, proxied_members
 
 from bson import ObjectId
 from .handlers import client, database, set_up_storage
+from .identity import get_identity_map, count_queries
 
 
 from api.base.api_globals import api_globals
@@ -31,13 +32,107 @@ def get_cache_key():
             return dummy_request
 
 
+def get_query_count():
+    """Return the number of queries issued so far in the current request.
+    """
+    return get_identity_map(get_cache_key()).query_count
+
+
+def query_counter():
+    """Context manager counting queries issued in the current request; see
+    `framework.mongo.identity.count_queries`.
+    """
+    return count_queries(get_cache_key())
+
+
 @with_proxies(proxied_members, get_cache_key)
 class StoredObject(GenericStoredObject):
-    pass
+
+    @classmethod
+    def load(cls, key=None, data=None, _is_loaded=True):
+        """Load a record by primary key, returning the instance already loaded
+        in the current request if there is one.
+        """
+        identity_map = get_identity_map(get_cache_key())
+        lookup = key
+        if lookup is None and data is not None:
+            lookup = data.get(cls._primary_name)
+        if lookup is not None:
+            loaded = identity_map.get(cls, lookup)
+            if loaded is not None:
+                return loaded
+        if data is None:
+            identity_map.count_query()
+        obj = super(StoredObject, cls).load(key=key, data=data, _is_loaded=_is_loaded)
+        if obj is not None:
+            identity_map.add(obj)
+        return obj
+
+    @classmethod
+    def load_many(cls, keys):
+        """Load the records for a list of primary keys, fetching all records
+        not already loaded in the current request with a single ``$in`` query.
+        Records are returned in the order of `keys`; missing keys are skipped.
+
+        Example: ::
+
+            contributors = User.load_many(node.contributors._to_primary_keys())
+        """
+        identity_map = get_identity_map(get_cache_key())
+        missing = identity_map.missing(cls, keys)
+        if missing:
+            identity_map.count_query()
+            cursor = cls._storage[0].store.find({
+                cls._primary_name: {'$in': missing},
+            })
+            for data in cursor:
+                cls.load(data=data)
+        loaded = (identity_map.get(cls, key) for key in keys)
+        return [obj for obj in loaded if obj is not None]
+
+    def save(self, *args, **kwargs):
+        ret = super(StoredObject, self).save(*args, **kwargs)
+        get_identity_map(get_cache_key()).add(self)
+        return ret
+
+    @classmethod
+    def find(cls, *args, **kwargs):
+        get_identity_map(get_cache_key()).count_query()
+        return super(StoredObject, cls).find(*args, **kwargs)
+
+    @classmethod
+    def find_one(cls, *args, **kwargs):
+        get_identity_map(get_cache_key()).count_query()
+        return super(StoredObject, cls).find_one(*args, **kwargs)
+
+    @classmethod
+    def remove_one(cls, *args, **kwargs):
+        get_identity_map(get_cache_key()).evict(cls)
+        return super(StoredObject, cls).remove_one(*args, **kwargs)
+
+    @classmethod
+    def remove(cls, *args, **kwargs):
+        get_identity_map(get_cache_key()).evict(cls)
+        return super(StoredObject, cls).remove(*args, **kwargs)
+
+    @classmethod
+    def _clear_caches(cls, key=None):
+        # Mirror the scope of the modular-odm caches being cleared: a single
+        # record, a whole schema, or everything when called on the base class
+        identity_map = get_identity_map(get_cache_key())
+        if not cls._fields:
+            identity_map.evict()
+        elif key is not None:
+            identity_map.discard(cls, key)
+        else:
+            identity_map.evict(cls)
+        return super(StoredObject, cls)._clear_caches(key)
 
 
 __all__ = [
     'StoredObject',
+    'get_query_count',
+    'query_counter',
     'ObjectId',
     'client',
     'database',
@@ -2,11 +2,15 @@
 
 import logging
 
+import os
+
 import pymongo
+from pymongo.errors import ConnectionFailure
 from flask import g
 from werkzeug.local import LocalProxy
 
 from website import settings
+from framework.mongo.pool import MongoClientPool
 
 
 logger = logging.getLogger(__name__)
@@ -25,20 +29,40 @@ def get_mongo_client():
     return client
 
 
+client_pool = MongoClientPool(
+    get_mongo_client,
+    max_size=settings.DB_POOL_SIZE,
+    wait_timeout=settings.DB_POOL_WAIT_TIMEOUT,
+)
+
+
+def get_pool_stats():
+    """Return checkout statistics for this worker's client pool.
+    """
+    return client_pool.stats()
+
+
 def connection_before_request():
-    """Attach MongoDB client to `g`.
+    """Check out a MongoDB client from the pool and attach it to `g`.
     """
-    g._mongo_client = get_mongo_client()
+    g._mongo_client = client_pool.checkout()
 
 
 def connection_teardown_request(error=None):
-    """Close MongoDB client if attached to `g`.
+    """Return MongoDB client attached to `g` to the pool. Clients whose
+    connection failed during the request are closed instead of reused.
     """
     try:
-        g._mongo_client.close()
+        mongo_client = g._mongo_client
     except AttributeError:
         if not settings.DEBUG_MODE:
             logger.error('MongoDB client not attached to request.')
+        return
+    del g._mongo_client
+    if isinstance(error, ConnectionFailure):
+        client_pool.discard(mongo_client)
+    else:
+        client_pool.checkin(mongo_client)
 
 
 handlers = {
@@ -48,7 +72,19 @@ handlers = {
 
 
 # Set up getters for `LocalProxy` objects
-_mongo_client = get_mongo_client()
+_mongo_client = None
+_mongo_client_pid = None
+
+
+def _get_default_client():
+    """Return the client used outside of requests, creating it on first use
+    in each process so that forked workers do not share its sockets.
+    """
+    global _mongo_client, _mongo_client_pid
+    if _mongo_client is None or _mongo_client_pid != os.getpid():
+        _mongo_client = get_mongo_client()
+        _mongo_client_pid = os.getpid()
+    return _mongo_client
 
 
 def _get_current_client():
@@ -58,7 +94,7 @@ def _get_current_client():
     try:
         return g._mongo_client
     except (AttributeError, RuntimeError):
-        return _mongo_client
+        return _get_default_client()
 
 
 def _get_current_database():
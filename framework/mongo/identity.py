@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Request-scoped identity map for modular-odm records.
+
+Every record loaded during a request is registered here under its schema and
+primary key, so that repeated loads of the same record (e.g. the same
+contributor referenced from several nodes) return the same instance without
+another round-trip, and so that a list of foreign keys can be loaded with a
+single ``$in`` query. The map also counts the queries issued on behalf of the
+request, which lets tests assert query budgets.
+"""
+
+import weakref
+import contextlib
+import collections
+
+
+class IdentityMap(object):
+
+    def __init__(self):
+        self.objects = collections.defaultdict(dict)
+        self.query_count = 0
+
+    def get(self, schema, key):
+        return self.objects[schema._name].get(key)
+
+    def add(self, obj):
+        self.objects[obj._name][obj._primary_key] = obj
+        return obj
+
+    def missing(self, schema, keys):
+        """Return the keys in `keys` that are not yet loaded, without duplicates,
+        in their original order.
+        """
+        loaded = self.objects[schema._name]
+        seen = set()
+        ret = []
+        for key in keys:
+            if key not in loaded and key not in seen:
+                seen.add(key)
+                ret.append(key)
+        return ret
+
+    def discard(self, schema, key):
+        self.objects[schema._name].pop(key, None)
+
+    def evict(self, schema=None):
+        if schema is None:
+            self.objects.clear()
+        else:
+            self.objects.pop(schema._name, None)
+
+    def count_query(self, count=1):
+        self.query_count += count
+
+
+# Maps the current request object (see `framework.mongo.get_cache_key`) to its
+# identity map; entries are dropped along with the request.
+_identity_maps = weakref.WeakKeyDictionary()
+
+
+def get_identity_map(key):
+    try:
+        return _identity_maps[key]
+    except KeyError:
+        identity_map = _identity_maps[key] = IdentityMap()
+        return identity_map
+
+
+@contextlib.contextmanager
+def count_queries(key):
+    """Context manager yielding a callable that returns the number of queries
+    issued since entering the block.
+
+    Example: ::
+
+        with count_queries(get_cache_key()) as query_count:
+            serialize_node(node)
+        assert query_count() <= 3
+    """
+    identity_map = get_identity_map(key)
+    start = identity_map.query_count
+    yield lambda: identity_map.query_count - start
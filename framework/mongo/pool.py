@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Process-wide pool of authenticated MongoDB clients.
+
+Each Flask request checks out a single client for its lifetime so that all
+operations issued during the request share a connection (TokuMX transactions
+are bound to the connection that began them). Clients are created lazily and
+the pool is rebuilt after a fork, so pre-forking servers (uWSGI, gunicorn)
+never share sockets between workers.
+"""
+
+import os
+import time
+import logging
+import threading
+import collections
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no client could be checked out within the wait timeout."""
+    pass
+
+
+class MongoClientPool(object):
+    """Bounded, fork-safe pool of MongoDB clients.
+
+    :param callable factory: Zero-argument callable returning a new,
+        authenticated client
+    :param int max_size: Maximum number of clients open at once
+    :param float wait_timeout: Seconds to wait for a client when the pool is
+        exhausted; ``None`` waits indefinitely
+    """
+    def __init__(self, factory, max_size=10, wait_timeout=None):
+        self.factory = factory
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = collections.deque()
+        self.size = 0
+        self.created = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.timeouts = 0
+
+    def _ensure_pid(self):
+        # Clients inherited from a parent process share its sockets; drop
+        # them without closing and start over in this process.
+        if self._pid != os.getpid():
+            logger.debug('Process forked; resetting MongoDB client pool')
+            self._reset()
+
+    def checkout(self):
+        """Return an idle client, creating one if the pool has room, else
+        block until a client is returned or the wait timeout elapses.
+
+        :raises: PoolTimeout
+        """
+        self._ensure_pid()
+        deadline = None
+        if self.wait_timeout is not None:
+            deadline = time.time() + self.wait_timeout
+        with self._lock:
+            while True:
+                if self._idle:
+                    self.checked_out += 1
+                    return self._idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    break
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            'No MongoDB client available after {0} seconds'.format(
+                                self.wait_timeout
+                            )
+                        )
+                self.waiting += 1
+                try:
+                    self._lock.wait(remaining)
+                finally:
+                    self.waiting -= 1
+        # Connect and authenticate outside the lock
+        try:
+            client = self.factory()
+        except Exception:
+            with self._lock:
+                self.size -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self.created += 1
+            self.checked_out += 1
+        return client
+
+    def checkin(self, client):
+        """Return a client previously obtained from :meth:`checkout`."""
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            self.checked_out -= 1
+            self._idle.append(client)
+            self._lock.notify()
+
+    def discard(self, client):
+        """Close a checked-out client that should not be reused, e.g. after
+        a connection failure, freeing its slot in the pool.
+        """
+        if self._pid != os.getpid():
+            return
+        try:
+            client.close()
+        finally:
+            with self._lock:
+                self.checked_out -= 1
+                self.size -= 1
+                self._lock.notify()
+
+    def close(self):
+        """Close all idle clients."""
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+                self.size -= 1
+
+    def stats(self):
+        """Snapshot of pool counters for monitoring."""
+        self._ensure_pid()
+        with self._lock:
+            return {
+                'pid': self._pid,
+                'max_size': self.max_size,
+                'size': self.size,
+                'idle': len(self._idle),
+                'checked_out': self.checked_out,
+                'waiting': self.waiting,
+                'created': self.created,
+                'timeouts': self.timeouts,
+            }
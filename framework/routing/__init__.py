@@ -5,18 +5,20 @@ import copy
 import json
 import functools
 import httplib as http
+from multiprocessing.pool import ThreadPool
 
 import lxml.html
 import werkzeug.wrappers
 from werkzeug.exceptions import NotFound
-from mako.template import Template
-from mako.lookup import TemplateLookup
 from flask import request, make_response
+from flask.globals import _app_ctx_stack, _request_ctx_stack
 
 from framework import sentry
 from framework.flask import app, redirect
 from framework.sessions import session
 from framework.exceptions import HTTPError
+from framework.routing.embeds import EmbedCollector
+from framework.routing.templates import registry as template_registry
 
 from website import settings
 
@@ -24,28 +26,6 @@ logger = logging.getLogger(__name__)
 
 TEMPLATE_DIR = settings.TEMPLATES_PATH
 
-_TPL_LOOKUP = TemplateLookup(
-    directories=[
-        TEMPLATE_DIR,
-        os.path.join(settings.BASE_PATH, 'addons/'),
-    ],
-    module_directory='/tmp/mako_modules'
-)
-
-_TPL_LOOKUP_SAFE = TemplateLookup(
-    default_filters=[
-        'unicode',  # default filter; must set explicitly when overriding
-        'temp_ampersand_fixer',  # FIXME: Temporary workaround for data stored in wrong format in DB. Unescape it before it gets re-escaped by Markupsafe.
-        'h',
-    ],
-    imports=['from website.util.sanitize import temp_ampersand_fixer'],  # FIXME: Temporary workaround for data stored in wrong format in DB. Unescape it before it gets re-escaped by Markupsafe.
-    directories=[
-        TEMPLATE_DIR,
-        os.path.join(settings.BASE_PATH, 'addons/'),
-    ],
-    module_directory='/tmp/mako_modules',
-)
-
 REDIRECT_CODES = [
     http.MOVED_PERMANENTLY,
     http.FOUND,
@@ -202,7 +182,6 @@ def render_mustache_string(tpl_string, data):
 def render_jinja_string(tpl, data):
     pass
 
-mako_cache = {}
 def render_mako_string(tpldir, tplname, data, trust=True):
     """Render a mako template to a string.
 
@@ -215,23 +194,10 @@ def render_mako_string(tpldir, tplname, data, trust=True):
     # TODO: The "trust" flag is expected to be temporary, and should be removed
     #       once all templates manually set it to False.
 
-    lookup_obj = _TPL_LOOKUP_SAFE if trust is False else _TPL_LOOKUP
-
-    tpl = mako_cache.get(tplname)
-    if tpl is None:
-        with open(os.path.join(tpldir, tplname)) as f:
-            tpl_text = f.read()
-        tpl = Template(
-            tpl_text,
-            lookup=lookup_obj,
-            input_encoding='utf-8',
-            output_encoding='utf-8',
-            default_filters=lookup_obj.template_args['default_filters'],
-            imports=lookup_obj.template_args['imports']  # FIXME: Temporary workaround for data stored in wrong format in DB. Unescape it before it gets re-escaped by Markupsafe.
-        )
-    # Don't cache in debug mode
-    if not app.debug:
-        mako_cache[tplname] = tpl
+    tpl = template_registry.get_template(
+        os.path.join(tpldir, tplname),
+        trust=trust is not False,
+    )
     return tpl.render(**data)
 
 
@@ -295,6 +261,27 @@ def call_url(url, view_kwargs=None):
 
     return rv
 
+
+def in_current_context(func):
+    """Wrap `func` to run in the current application and request contexts,
+    e.g. from a worker thread. Unlike ``flask.copy_current_request_context``,
+    the contexts are not popped (and teardown handlers are not run) when
+    `func` returns.
+    """
+    app_ctx = _app_ctx_stack.top
+    request_ctx = _request_ctx_stack.top
+
+    @functools.wraps(func)
+    def wrapped(*args, **kwargs):
+        _app_ctx_stack.push(app_ctx)
+        _request_ctx_stack.push(request_ctx)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _request_ctx_stack.pop()
+            _app_ctx_stack.pop()
+    return wrapped
+
 ### Renderers ###
 
 class Renderer(object):
@@ -414,7 +401,7 @@ class WebRenderer(Renderer):
     def __init__(self, template_name,
                  renderer=None, error_renderer=None,
                  data=None, detect_render_nested=True,
-                 trust=True, template_dir=TEMPLATE_DIR):
+                 trust=True, template_dir=TEMPLATE_DIR, single_pass=None):
         """Construct WebRenderer.
 
         :param template_name: Name of template file
@@ -427,6 +414,8 @@ class WebRenderer(Renderer):
             templates?
         :param trust: Boolean: If true, turn off markup-safe escaping
         :param template_dir: Path to template directory
+        :param single_pass: Resolve embedded templates without re-parsing
+            the rendered page; defaults to ``settings.SINGLE_PASS_RENDERING``
 
         """
         self.template_name = template_name
@@ -435,12 +424,19 @@ class WebRenderer(Renderer):
         self.trust = trust
 
         self.template_dir = template_dir
+        self._single_pass = single_pass
         self.renderer = self.detect_renderer(renderer, template_name)
         self.error_renderer = self.detect_renderer(
             error_renderer,
             self.error_template
         )
 
+    @property
+    def single_pass(self):
+        if self._single_pass is None:
+            return settings.SINGLE_PASS_RENDERING
+        return self._single_pass
+
     def handle_error(self, error):
         """Handle an HTTPError.
 
@@ -470,41 +466,94 @@ class WebRenderer(Renderer):
         :return: 2-tuple: (<result>, <flag: replace div>)
         """
         attributes_string = element.get("mod-meta")
+        element_meta = self.load_meta(attributes_string)
+        if element_meta is None:
+            return self.invalid_meta(attributes_string), True
+        return self.render_embed(element_meta, data, self.fetch_embed(element_meta))
 
-        # Return debug <div> if JSON cannot be parsed
+    def load_meta(self, attributes_string):
+        """Parse the JSON metadata of an embed, or return ``None`` if invalid."""
         try:
-            element_meta = json.loads(attributes_string)
+            return json.loads(attributes_string)
         except ValueError:
-            return '<div>No JSON object could be decoded: {}</div>'.format(
-                attributes_string
-            ), True
+            return None
+
+    def invalid_meta(self, attributes_string):
+        return '<div>No JSON object could be decoded: {}</div>'.format(
+            attributes_string
+        )
 
+    def fetch_embed(self, element_meta):
+        """Call the view function of an embed, if any.
+
+        :param element_meta: Parsed embed metadata
+        :return: 2-tuple: (<data from view function>, <debug div on error>)
+        """
         uri = element_meta.get('uri')
-        is_replace = element_meta.get('replace', False)
-        kwargs = element_meta.get('kwargs', {})
+        if not uri:
+            return {}, None
         view_kwargs = element_meta.get('view_kwargs', {})
         error_msg = element_meta.get('error', None)
 
+        # Catch errors and return appropriate debug divs
+        # todo: add debug parameter
+        try:
+            return call_url(uri, view_kwargs=view_kwargs), None
+        except NotFound:
+            return None, '<div>URI {} not found</div>'.format(uri)
+        except Exception as error:
+            logger.exception(error)
+            if error_msg:
+                return None, '<div>{}</div>'.format(error_msg)
+            return None, '<div>Error retrieving URI {}: {}</div>'.format(
+                uri,
+                repr(error)
+            )
+
+    def fetch_embeds(self, metas):
+        """Call the view functions of several embeds, in parallel if
+        ``settings.MOD_META_FETCH_WORKERS`` allows. Invalid metadata (``None``)
+        is skipped.
+
+        :return: List of return values of :meth:`fetch_embed`
+        """
+        uris = [meta for meta in metas if meta is not None and meta.get('uri')]
+        workers = min(settings.MOD_META_FETCH_WORKERS, len(uris))
+        if workers <= 1:
+            return [
+                self.fetch_embed(meta) if meta is not None else (None, None)
+                for meta in metas
+            ]
+        fetch = in_current_context(self.fetch_embed)
+        pool = ThreadPool(workers)
+        try:
+            results = iter(pool.map(fetch, uris))
+        finally:
+            pool.close()
+        return [
+            next(results) if meta is not None and meta.get('uri') else ({}, None)
+            for meta in metas
+        ]
+
+    def render_embed(self, element_meta, data, fetched):
+        """Render the template of an embed.
+
+        :param element_meta: Parsed embed metadata
+        :param data: Dictionary to be passed to the template as context
+        :param fetched: Return value of :meth:`fetch_embed` for this embed
+        :return: 2-tuple: (<result>, <flag: replace div>)
+        """
+        is_replace = element_meta.get('replace', False)
+        kwargs = element_meta.get('kwargs', {})
+
+        uri_data, error = fetched
+        if error is not None:
+            return error, is_replace
+
         # TODO: Is copy enough? Discuss.
         render_data = copy.copy(data)
         render_data.update(kwargs)
-
-        if uri:
-            # Catch errors and return appropriate debug divs
-            # todo: add debug parameter
-            try:
-                uri_data = call_url(uri, view_kwargs=view_kwargs)
-                render_data.update(uri_data)
-            except NotFound:
-                return '<div>URI {} not found</div>'.format(uri), is_replace
-            except Exception as error:
-                logger.exception(error)
-                if error_msg:
-                    return '<div>{}</div>'.format(error_msg), is_replace
-                return '<div>Error retrieving URI {}: {}</div>'.format(
-                    uri,
-                    repr(error)
-                ), is_replace
+        render_data.update(uri_data)
 
         try:
             template_rendered = self._render(
@@ -520,6 +569,26 @@ class WebRenderer(Renderer):
 
         return template_rendered, is_replace
 
+    def render_embeds(self, embeds, data):
+        """Fetch the data of all embeds of a page up front, then render each
+        embed.
+
+        :param embeds: List of :class:`framework.routing.embeds.Embed`
+        :param data: Dictionary to be passed to the templates as context
+        :return: List of UTF-8 encoded HTML strings, one per embed
+        """
+        metas = [self.load_meta(embed.unescaped_meta) for embed in embeds]
+        contents = []
+        for embed, element_meta, fetched in zip(embeds, metas, self.fetch_embeds(metas)):
+            if element_meta is None:
+                template_rendered, is_replace = self.invalid_meta(embed.unescaped_meta), True
+            else:
+                template_rendered, is_replace = self.render_embed(element_meta, data, fetched)
+            if isinstance(template_rendered, unicode):
+                template_rendered = template_rendered.encode('utf-8')
+            contents.append(template_rendered if is_replace else embed.wrap(template_rendered))
+        return contents
+
     def _render(self, data, template_name=None):
         """Render output of view function to HTML.
 
@@ -539,14 +608,30 @@ class WebRenderer(Renderer):
         else:
             renderer = self.renderer
 
+        if self.single_pass:
+            # Embeds are recorded while the template renders and left as
+            # placeholders, which are substituted once all embeds are rendered
+            collector = EmbedCollector()
+            render_data = dict(data, _mod_meta_embeds=collector)
+        else:
+            render_data = data
+
         # Catch errors and return appropriate debug divs
         # todo: add debug parameter
         try:
             # TODO: Seems like Jinja2 and handlebars renderers would not work with this call sig
-            rendered = renderer(self.template_dir, template_name, data, trust=self.trust)
+            rendered = renderer(self.template_dir, template_name, render_data, trust=self.trust)
         except IOError:
             return '<div>Template {} not found.</div>'.format(template_name)
 
+        if self.single_pass:
+            if collector.embeds:
+                rendered = collector.substitute(
+                    rendered,
+                    self.render_embeds(collector.embeds, data),
+                )
+            return rendered
+
         html = lxml.html.fragment_fromstring(rendered, create_parent='remove')
 
         for element in html.findall('.//*[@mod-meta]'):
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Compile-time support for ``mod-meta`` template embeds.
+
+Templates embed other views with elements such as ::
+
+    <div mod-meta='{"tpl": "util/render_nodes.mako", "uri": "...", "replace": true}'></div>
+
+Rather than searching the rendered page for these elements, templates are
+preprocessed when compiled so that each element becomes a call to
+:func:`embed`. While the page renders, each call records the embed's
+(rendered) metadata and writes a placeholder; the renderer then fetches the
+data for all embeds of the page, renders their templates and substitutes the
+placeholders in a single pass over the output.
+"""
+
+import re
+import uuid
+import HTMLParser
+
+from mako.runtime import capture, supports_caller
+
+
+NAMESPACE = '_mod_meta'
+
+MOD_META_RE = re.compile(
+    r"<(?P<tag>\w+)(?P<before>[^>]*?)\s+mod-meta='(?P<meta>\{.*?\})'(?=[\s/>])"
+    r"(?P<after>[^>]*)>.*?</(?P=tag)>",
+    re.DOTALL,
+)
+
+_html_parser = HTMLParser.HTMLParser()
+
+
+def preprocess_mod_meta(source):
+    """Mako preprocessor rewriting ``mod-meta`` elements to :func:`embed`
+    calls. The metadata and opening tag stay template text, so expressions in
+    them are evaluated (and escaped) as before; line breaks are preserved so
+    that line numbers in template errors do not change.
+    """
+    def replace(match):
+        return (
+            '<%call expr="{namespace}.embed(tag=\'{tag}\')">'
+            '<%def name="open_tag()"><{tag}{before}{after}></%def>'
+            '{meta}</%call>'
+        ).format(
+            namespace=NAMESPACE,
+            tag=match.group('tag'),
+            before=match.group('before'),
+            after=match.group('after'),
+            meta=match.group('meta'),
+        )
+    source, count = MOD_META_RE.subn(replace, source)
+    if count:
+        source += '<%namespace name="{0}" module="{1}"/>'.format(NAMESPACE, __name__)
+    return source
+
+
+class Embed(object):
+    """An embed found while rendering a template.
+
+    :param str meta: The rendered, still-escaped JSON metadata
+    :param str open_tag: The rendered opening tag of the element, without
+        the ``mod-meta`` attribute
+    :param str tag: Tag name of the element
+    """
+    def __init__(self, meta, open_tag, tag):
+        self.meta = meta
+        self.open_tag = open_tag
+        self.tag = tag
+
+    @property
+    def unescaped_meta(self):
+        return _html_parser.unescape(self.meta)
+
+    def to_html(self):
+        """The original element, for renderers that resolve embeds by parsing
+        the rendered page.
+        """
+        return u"{0} mod-meta='{1}'></{2}>".format(self.open_tag[:-1], self.meta, self.tag)
+
+    def wrap(self, content):
+        """Wrap `content`, a UTF-8 encoded string, in the element."""
+        return ''.join([
+            self.open_tag.encode('utf-8'),
+            content,
+            '</{0}>'.format(self.tag),
+        ])
+
+
+class EmbedCollector(object):
+    """Records the embeds of one template render. Passed to the template as
+    the ``_mod_meta_embeds`` context variable.
+    """
+    def __init__(self):
+        self.token = uuid.uuid4().hex
+        self.embeds = []
+        self.placeholder_re = re.compile(r'<!--mod-meta:{0}:(\d+)-->'.format(self.token))
+
+    def add(self, embed):
+        self.embeds.append(embed)
+        return '<!--mod-meta:{0}:{1}-->'.format(self.token, len(self.embeds) - 1)
+
+    def substitute(self, rendered, contents):
+        """Replace the placeholders in `rendered` with the corresponding items
+        of `contents`.
+        """
+        return self.placeholder_re.sub(lambda match: contents[int(match.group(1))], rendered)
+
+
+@supports_caller
+def embed(context, tag='div'):
+    caller = context['caller']
+    item = Embed(
+        meta=capture(context, caller.body),
+        open_tag=capture(context, caller.open_tag),
+        tag=tag,
+    )
+    collector = context.get('_mod_meta_embeds')
+    if collector is None:
+        context.write(item.to_html())
+    else:
+        context.write(collector.add(item))
+    return ''
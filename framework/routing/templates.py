@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""Registry of compiled Mako templates.
+
+Templates are compiled once per process and kept in memory, keyed by their
+absolute path and whether they are rendered trusted (unescaped) or with
+markup-safe escaping, so that the two variants of a template never collide.
+Compiled modules are written to a separate directory under
+``MODULE_DIRECTORY`` for each variant and reused across processes; every
+template can be compiled ahead of time with :meth:`TemplateRegistry.precompile`.
+Template files are only checked for changes in debug mode.
+"""
+
+import os
+import fnmatch
+import logging
+
+from mako.lookup import TemplateLookup
+from mako.template import Template
+
+from framework.routing.embeds import preprocess_mod_meta
+
+from website import settings
+
+
+logger = logging.getLogger(__name__)
+
+MODULE_DIRECTORY = '/tmp/mako_modules'
+
+TEMPLATE_DIRS = [
+    settings.TEMPLATES_PATH,
+    os.path.join(settings.BASE_PATH, 'addons/'),
+]
+
+trusted_lookup = TemplateLookup(
+    directories=TEMPLATE_DIRS,
+    module_directory=os.path.join(MODULE_DIRECTORY, 'trusted'),
+    input_encoding='utf-8',
+    output_encoding='utf-8',
+    filesystem_checks=settings.DEBUG_MODE,
+    preprocessor=preprocess_mod_meta,
+)
+
+safe_lookup = TemplateLookup(
+    default_filters=[
+        'unicode',  # default filter; must set explicitly when overriding
+        'temp_ampersand_fixer',  # FIXME: Temporary workaround for data stored in wrong format in DB. Unescape it before it gets re-escaped by Markupsafe.
+        'h',
+    ],
+    imports=['from website.util.sanitize import temp_ampersand_fixer'],  # FIXME: Temporary workaround for data stored in wrong format in DB. Unescape it before it gets re-escaped by Markupsafe.
+    directories=TEMPLATE_DIRS,
+    module_directory=os.path.join(MODULE_DIRECTORY, 'safe'),
+    input_encoding='utf-8',
+    output_encoding='utf-8',
+    filesystem_checks=settings.DEBUG_MODE,
+    preprocessor=preprocess_mod_meta,
+)
+
+
+class TemplateRegistry(object):
+    """Compiled templates keyed by (path, trust).
+
+    :param dict lookups: Maps the `trust` flag to the ``TemplateLookup`` whose
+        settings (filters, imports, encodings, module directory) are used to
+        compile templates and resolve their includes
+    """
+    def __init__(self, lookups):
+        self.lookups = lookups
+        self.templates = {}
+        self.strings = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def check_mtimes(self):
+        return settings.DEBUG_MODE
+
+    def get_template(self, path, trust=True):
+        """Return the compiled template for the file at `path`.
+
+        :raises: IOError if the file does not exist
+        """
+        path = os.path.abspath(path)
+        key = (path, trust)
+        try:
+            template, mtime = self.templates[key]
+        except KeyError:
+            pass
+        else:
+            if not self.check_mtimes or os.path.getmtime(path) <= mtime:
+                self.hits += 1
+                return template
+        self.misses += 1
+        if not os.path.exists(path):
+            raise IOError('No such template: {0}'.format(path))
+        mtime = os.path.getmtime(path)
+        lookup = self.lookups[trust]
+        template = Template(
+            filename=path,
+            uri=self.get_uri(path, lookup),
+            lookup=lookup,
+            **lookup.template_args
+        )
+        self.templates[key] = (template, mtime)
+        return template
+
+    def get_uri(self, path, lookup):
+        """Return the URI of the template at `path`: its path relative to the
+        lookup directory containing it, with the separators replaced.
+
+        Pages rendered directly (rather than included) have always resolved
+        relative ``<%inherit>`` and ``<%include>`` paths against the lookup
+        directories, e.g. ``project/project_base.mako`` from
+        ``project/project.mako``. Mako resolves them against the directory
+        part of the URI, so the URI must not have one.
+        """
+        for directory in lookup.directories:
+            directory = os.path.abspath(directory)
+            if path.startswith(directory.rstrip(os.sep) + os.sep):
+                path = os.path.relpath(path, directory)
+                break
+        return path.strip(os.sep).replace(os.sep, ':')
+
+    def get_string_template(self, text, trust=True):
+        """Return a compiled template for the template source `text`, e.g. an
+        email subject.
+        """
+        key = (text, trust)
+        try:
+            template = self.strings[key]
+        except KeyError:
+            self.misses += 1
+            lookup = self.lookups[trust]
+            template = self.strings[key] = Template(
+                text,
+                lookup=lookup,
+                default_filters=lookup.template_args['default_filters'],
+                imports=lookup.template_args['imports'],
+            )
+        else:
+            self.hits += 1
+        return template
+
+    def precompile(self, directories, pattern='*.mako', exclude=None):
+        """Compile every template matching `pattern` under `directories`, in
+        every trust mode.
+
+        :param list exclude: Directories to skip
+        :return: Number of templates compiled
+        """
+        exclude = [os.path.abspath(path) for path in exclude or []]
+        count = 0
+        for directory in directories:
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [
+                    name for name in dirs
+                    if os.path.abspath(os.path.join(root, name)) not in exclude
+                ]
+                for name in fnmatch.filter(files, pattern):
+                    path = os.path.join(root, name)
+                    for trust in self.lookups:
+                        try:
+                            self.get_template(path, trust=trust)
+                        except Exception as error:
+                            logger.warning('Could not compile template {0}: {1!r}'.format(path, error))
+                        else:
+                            count += 1
+        return count
+
+    def stats(self):
+        return {
+            'templates': len(self.templates) + len(self.strings),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+registry = TemplateRegistry({
+    True: trusted_lookup,
+    False: safe_lookup,
+})
+
+
+def get_addon_template_dirs():
+    addons_path = os.path.join(settings.BASE_PATH, 'addons')
+    return [
+        path for path in (
+            os.path.join(addons_path, name, 'templates')
+            for name in sorted(os.listdir(addons_path))
+        )
+        if os.path.isdir(path)
+    ]
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import hmac
 import furl
 import urllib
+import hashlib
 import urlparse
 import bson.objectid
 import httplib as http
@@ -15,7 +17,13 @@ from framework.flask import redirect
 
 from website import settings
 
-from .model import Session
+from .model import Session, utcnow
+from .cache import TTLCache
+
+
+#: (user id, password hash) of the users of recently verified bearer tokens
+#: and Basic credentials, keyed by `get_auth_cache_key`
+auth_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
 
 
 def add_key_to_url(url, scheme, key):
@@ -91,17 +99,115 @@ def set_session(session):
     sessions[request._get_current_object()] = session
 
 
+def get_cookie_value(session_id):
+    return itsdangerous.Signer(settings.SECRET_KEY).sign(session_id)
+
+
+def load_session(cookie):
+    """Return the session for a signed cookie.
+
+    :raises: itsdangerous.BadSignature if the cookie is not signed
+    """
+    session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie)
+    return Session.load(session_id) or Session(_id=session_id)
+
+
+def save_session(session):
+    """Save the session, unless it was written by another request since it
+    was loaded (e.g. by a logout handled by another process).
+
+    :return: Whether the session was saved
+    """
+    return session.save_if_unchanged()
+
+
+def get_auth_cache_key(*secrets):
+    """Keyed hash of a token or credentials, so that the cache does not hold
+    them in clear.
+    """
+    message = '\0'.join(
+        secret.encode('utf-8') if isinstance(secret, unicode) else secret
+        for secret in secrets
+    )
+    return hmac.new(settings.SECRET_KEY, message, hashlib.sha256).hexdigest()
+
+
+def get_cached_user(key):
+    """Return the user verified recently for `key`, unless their password
+    changed since (possibly in another process).
+    """
+    from framework.auth.core import User
+    cached = auth_cache.get(key)
+    if cached is None:
+        return None
+    user_id, password = cached
+    user = User.load(user_id)
+    if user is None or user.password != password:
+        auth_cache.discard(key)
+        return None
+    return user
+
+
+def cache_user(key, user):
+    auth_cache.set(key, (user._id, user.password))
+
+
+def verify_access_token(access_token):
+    """Return the user of a CAS access token, only asking CAS if the token
+    was not verified recently.
+
+    :return: User, or None if CAS rejects the token or the user does not exist
+    :raises: CasError if CAS returns an unexpected response
+    """
+    from framework.auth import cas
+    from framework.auth.core import User
+    key = get_auth_cache_key('bearer', access_token)
+    user = get_cached_user(key)
+    if user is None:
+        cas_resp = cas.get_client().profile(access_token)
+        if not cas_resp.authenticated:
+            return None
+        user = User.load(cas_resp.user)
+        if user is not None:
+            cache_user(key, user)
+    return user
+
+
+def verify_credentials(username, password):
+    """Return the user matching Basic credentials, only checking the
+    password hash if they were not verified recently.
+
+    :return: User, or a falsy value if the credentials are invalid
+    """
+    from framework.auth.core import get_user
+    key = get_auth_cache_key('basic', username or '', password or '')
+    user = get_cached_user(key)
+    if user is None:
+        user = get_user(email=username, password=password)
+        if user:
+            cache_user(key, user)
+    return user
+
+
 def create_session(response, data=None):
     current_session = get_session()
     if current_session:
         current_session.data.update(data or {})
-        current_session.save()
-        cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(current_session._id)
+        if not save_session(current_session):
+            # Written by another request since it was loaded; set the new
+            # values on the stored session instead
+            updates = dict(('data.' + key, value) for key, value in (data or {}).items())
+            updates['date_modified'] = utcnow()
+            Session._storage[0].store.update({'_id': current_session._id}, {'$set': updates})
+            Session._clear_caches(current_session._id)
+            current_session.reload()
+            current_session.mark_clean()
+        cookie_value = get_cookie_value(current_session._id)
     else:
         session_id = str(bson.objectid.ObjectId())
         session = Session(_id=session_id, data=data or {})
-        session.save()
-        cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(session_id)
+        save_session(session)
+        cookie_value = get_cookie_value(session_id)
         set_session(session)
     if response is not None:
         response.set_cookie(settings.COOKIE_NAME, value=cookie_value)
@@ -118,7 +224,6 @@ session = LocalProxy(get_session)
 def before_request():
     from framework import sentry
     from framework.auth import cas
-    from framework.auth.core import User
     from framework.auth import authenticate
     from framework.routing import json_renderer
 
@@ -133,25 +238,21 @@ def before_request():
     # Central Authentication Server OAuth Bearer Token
     authorization = request.headers.get('Authorization')
     if authorization and authorization.startswith('Bearer '):
-        client = cas.get_client()
         try:
             access_token = cas.parse_auth_header(authorization)
-            cas_resp = client.profile(access_token)
+            user = verify_access_token(access_token)
         except cas.CasError as err:
             sentry.log_exception()
             # NOTE: We assume that the request is an AJAX request
             return json_renderer(err)
-        if cas_resp.authenticated:
-            user = User.load(cas_resp.user)
+        if user:
             return authenticate(user, access_token=access_token, response=None)
         return make_response('', http.UNAUTHORIZED)
 
     if request.authorization:
-        # TODO: Fix circular import
-        from framework.auth.core import get_user
-        user = get_user(
-            email=request.authorization.username,
-            password=request.authorization.password
+        user = verify_credentials(
+            request.authorization.username,
+            request.authorization.password,
         )
         # Create empty session
         # TODO: Shoudn't need to create a session for Basic Auth
@@ -171,8 +272,7 @@ def before_request():
     cookie = request.cookies.get(settings.COOKIE_NAME)
     if cookie:
         try:
-            session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie)
-            session = Session.load(session_id) or Session(_id=session_id)
+            session = load_session(cookie)
             set_session(session)
             return
         except:
@@ -180,7 +280,11 @@ def before_request():
 
 
 def after_request(response):
-    if session.data.get('auth_user_id'):
-        session.save()
+    # Only write sessions that are authenticated or were stored before (e.g.
+    # to record a logout), and only if their data changed or they are due
+    # for a write postponing their expiration
+    if session.data.get('auth_user_id') or session._is_loaded:
+        if session.needs_save:
+            save_session(session)
 
     return response
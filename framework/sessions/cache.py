@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import collections
+
+
+class TTLCache(object):
+    """Thread-safe mapping whose items expire `ttl` seconds after being set,
+    holding at most `max_size` items and evicting the oldest one when full.
+    """
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires <= time.time():
+                del self._items[key]
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (time.time() + self.ttl, value)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def discard_if(self, predicate):
+        """Remove the items for which `predicate(key, value)` is true."""
+        with self._lock:
+            for key, (_, value) in self._items.items():
+                if predicate(key, value):
+                    del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -1,18 +1,94 @@
 # -*- coding: utf-8 -*-
 
+import copy
+import datetime
+
+import pymongo
 from bson import ObjectId
 from modularodm import fields
 
 from framework.mongo import StoredObject
+from website import settings
+
+
+def utcnow():
+    """Return the current time at the precision stored by Mongo
+    (milliseconds), so that the `date_modified` of a saved session compares
+    equal to the stored one.
+    """
+    now = datetime.datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
 
 
 class Session(StoredObject):
 
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
     date_created = fields.DateTimeField(auto_now_add=True)
-    date_modified = fields.DateTimeField(auto_now=True)
+    date_modified = fields.DateTimeField(auto_now=utcnow)
     data = fields.DictionaryField()
 
+    __indices__ = [
+        {
+            # Mongo removes sessions that have not been written for
+            # SESSION_EXPIRATION seconds
+            'key_or_list': [('date_modified', pymongo.ASCENDING)],
+            'expireAfterSeconds': settings.SESSION_EXPIRATION,
+        },
+    ]
+
+    def __init__(self, **kwargs):
+        super(Session, self).__init__(**kwargs)
+        self.mark_clean()
+
     @property
     def is_authenticated(self):
         return 'auth_user_id' in self.data
+
+    def mark_clean(self):
+        """Record the current data as the stored state."""
+        self._clean_data = copy.deepcopy(self.data)
+        self._clean_date_modified = self.date_modified
+
+    @property
+    def is_dirty(self):
+        """Whether the session is new or its data (including nested values)
+        changed since it was loaded or saved.
+        """
+        return not self._is_loaded or self.data != self._clean_data
+
+    @property
+    def needs_save(self):
+        """Whether the session is dirty or due for a write postponing its
+        expiration.
+        """
+        if self.is_dirty or self.date_modified is None:
+            return True
+        age = datetime.datetime.utcnow() - self.date_modified
+        return age > datetime.timedelta(seconds=settings.SESSION_TOUCH_INTERVAL)
+
+    def save(self, *args, **kwargs):
+        ret = super(Session, self).save(*args, **kwargs)
+        self.mark_clean()
+        return ret
+
+    def save_if_unchanged(self):
+        """Save the session unless it was written by another request since it
+        was loaded, so that data loaded before that write (e.g. from a stale
+        cache entry) is never written back.
+
+        :return: Whether the session was saved
+        """
+        if not self._is_loaded:
+            self.save()
+            return True
+        date_modified = utcnow()
+        result = self._storage[0].store.update(
+            {'_id': self._id, 'date_modified': self._clean_date_modified},
+            {'$set': {'data': self.data, 'date_modified': date_modified}},
+        )
+        self._clear_caches(self._id)
+        if not result['n']:
+            return False
+        self._fields['date_modified'].__set__(self, date_modified, safe=True)
+        self.mark_clean()
+        return True
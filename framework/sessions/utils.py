@@ -9,3 +9,14 @@ def remove_sessions_for_user(user):
     :param User user:
     """
     Session.remove(Q('data.auth_user_id', 'eq', user._id))
+    remove_cached_auth_for_user(user._id)
+
+
+def remove_cached_auth_for_user(user_id):
+    """Forget the bearer tokens and Basic credentials verified for the user
+    by the current process.
+
+    :param str user_id:
+    """
+    from framework.sessions import auth_cache
+    auth_cache.discard_if(lambda key, value: value[0] == user_id)
@@ -8,6 +8,7 @@ from modularodm import storage
 
 from framework.mongo import set_up_storage, StoredObject
 
+from website import mails
 from website import models
 
 
@@ -24,3 +25,18 @@ def attach_models(*args, **kwargs):
     """Attach models to database collections on worker initialization.
     """
     set_up_storage(models.MODELS, storage.MongoStorage)
+
+
+@signals.worker_process_init.connect
+def precompile_templates(*args, **kwargs):
+    """Compile email templates before the first task is received.
+    """
+    mails.precompile_templates()
+
+
+@signals.worker_process_shutdown.connect
+def close_smtp_sessions(*args, **kwargs):
+    """Log out of the SMTP sessions kept open by the worker.
+    """
+    from framework.email.tasks import smtp_pool
+    smtp_pool.close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""Compare the cost of fetching deep pages of the API node list with page
+numbers (count plus skip/limit) against keyset (cursor) pagination.
+
+Fills the ``node`` collection of a scratch database with synthetic public
+nodes, then times the queries issued for one page at increasing depths. The
+scratch database is dropped afterwards unless ``--keep`` is passed.
+
+    python -m scripts.benchmarks.api_node_list --db osf_benchmark --nodes 200000 --iterations 5
+"""
+
+import time
+import logging
+import argparse
+import datetime
+
+from modularodm import Q
+
+from website import settings
+from website.app import init_app
+from api.base.pagination import JSONAPIPagination
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+PAGE_SIZE = 10
+DEPTHS = [1, 10, 100, 1000, 10000]
+
+
+def make_nodes(Node, count, batch_size=5000):
+    collection = Node._storage[0].store
+    start = datetime.datetime.utcnow()
+    for offset in range(0, count, batch_size):
+        collection.insert([
+            {
+                '_id': 'bench{0:07d}'.format(index),
+                'title': 'Benchmark node {0}'.format(index),
+                'category': 'project',
+                'is_public': True,
+                'is_deleted': False,
+                'is_folder': False,
+                # Several nodes per millisecond, so that ties are broken by _id
+                'date_created': start - datetime.timedelta(milliseconds=index // 3),
+            }
+            for index in range(offset, min(offset + batch_size, count))
+        ])
+
+
+def get_query():
+    return (
+        Q('is_deleted', 'ne', True) &
+        Q('is_folder', 'ne', True) &
+        Q('is_public', 'eq', True)
+    )
+
+
+def page_number(Node, query, page):
+    queryset = Node.find(query).sort('-date_created')
+    queryset.count()
+    offset = (page - 1) * PAGE_SIZE
+    return list(queryset[offset:offset + PAGE_SIZE])
+
+
+def make_cursor_page(Node, query, page):
+    """Return a function fetching `page` by cursor, as when following the
+    ``next`` link of the previous page.
+    """
+    paginator = JSONAPIPagination()
+    paginator.schema = Node
+    offset = (page - 1) * PAGE_SIZE
+    if not offset:
+        keyset = query
+    else:
+        previous = Node.find(query).sort('-date_created', '-_id')[offset - 1]
+        keyset = query & paginator.get_keyset_query('date_created', previous.date_created, previous._id, True)
+
+    def cursor_page():
+        return list(Node.find(keyset).sort('-date_created', '-_id').limit(PAGE_SIZE + 1))[:PAGE_SIZE]
+    return cursor_page
+
+
+def run(func, iterations):
+    """Call `func` `iterations` times; return milliseconds per call."""
+    start = time.time()
+    for _ in range(iterations):
+        func()
+    return (time.time() - start) * 1000 / iterations
+
+
+def main(node_count, iterations, keep):
+    from website.models import Node
+    if not Node.find().count():
+        logger.info('Creating {0} nodes'.format(node_count))
+        make_nodes(Node, node_count)
+    query = get_query()
+    try:
+        for page in DEPTHS:
+            if (page - 1) * PAGE_SIZE >= node_count:
+                break
+            cursor_page = make_cursor_page(Node, query, page)
+            assert [node._id for node in cursor_page()] == [node._id for node in page_number(Node, query, page)]
+            skip_ms = run(lambda: page_number(Node, query, page), iterations)
+            cursor_ms = run(cursor_page, iterations)
+            logger.info('page {0:>6}  page number: {1:8.1f} ms  cursor: {2:6.1f} ms  speedup: {3:.1f}x'.format(
+                page, skip_ms, cursor_ms, skip_ms / cursor_ms,
+            ))
+    finally:
+        if not keep:
+            Node._storage[0].store.database.connection.drop_database(settings.DB_NAME)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark page number against cursor pagination of nodes.')
+    parser.add_argument('--db', dest='db', required=True, help='Scratch database; dropped afterwards')
+    parser.add_argument('--nodes', dest='nodes', type=int, default=100000)
+    parser.add_argument('--iterations', dest='iterations', type=int, default=5)
+    parser.add_argument('--keep', dest='keep', action='store_true', help='Keep the scratch database')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.db == settings.DB_NAME:
+        raise SystemExit('Refusing to use the configured database {0!r}'.format(settings.DB_NAME))
+    settings.DB_NAME = args.db
+    init_app(set_backends=True, routes=False)
+    main(args.nodes, args.iterations, args.keep)
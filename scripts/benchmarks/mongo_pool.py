@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""Compare request throughput with a MongoDB client created per request
+against clients checked out from the process-wide pool.
+
+Each simulated request runs the same connection handlers as a Flask request
+and issues a single primary-key lookup against the ``user`` collection.
+
+    python -m scripts.benchmarks.mongo_pool --requests 2000 --threads 8
+"""
+
+import time
+import logging
+import argparse
+import threading
+
+from website import settings
+from website.app import init_app
+from framework.mongo import handlers
+from framework.mongo.pool import MongoClientPool
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def per_request_client():
+    client = handlers.get_mongo_client()
+    try:
+        client[settings.DB_NAME]['user'].find_one({'_id': 'benchmark'})
+    finally:
+        client.close()
+
+
+def make_pooled_request(pool):
+    def pooled_client():
+        client = pool.checkout()
+        try:
+            client[settings.DB_NAME]['user'].find_one({'_id': 'benchmark'})
+        finally:
+            pool.checkin(client)
+    return pooled_client
+
+
+def run(func, requests, threads):
+    """Call `func` `requests` times spread across `threads` threads; return
+    requests per second.
+    """
+    per_thread = requests // threads
+
+    def worker():
+        for _ in range(per_thread):
+            func()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.time()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return (per_thread * threads) / (time.time() - start)
+
+
+def main(requests, threads):
+    pool = MongoClientPool(
+        handlers.get_mongo_client,
+        max_size=settings.DB_POOL_SIZE,
+        wait_timeout=settings.DB_POOL_WAIT_TIMEOUT,
+    )
+    before = run(per_request_client, requests, threads)
+    logger.info('Client per request: {0:.1f} requests/second'.format(before))
+    after = run(make_pooled_request(pool), requests, threads)
+    logger.info('Pooled clients:     {0:.1f} requests/second'.format(after))
+    logger.info('Speedup: {0:.2f}x'.format(after / before))
+    logger.info('Pool stats: {0}'.format(pool.stats()))
+    pool.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark MongoDB client pooling.')
+    parser.add_argument('--requests', dest='requests', type=int, default=1000)
+    parser.add_argument('--threads', dest='threads', type=int, default=4)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    init_app(set_backends=True, routes=False)
+    args = parse_args()
+    main(args.requests, args.threads)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""Compare page render times with `mod-meta` embeds resolved by re-parsing
+the rendered HTML against the single-pass renderer.
+
+Renders the project, dashboard and profile pages as the given user, using
+HTTP basic auth against the in-process application.
+
+    python -m scripts.benchmarks.render_pages --email me@example.com --password secret --node abc12 --iterations 20
+"""
+
+import time
+import base64
+import logging
+import argparse
+
+from website import settings
+from website.app import init_app
+from website.models import User
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def get_pages(user, node_id):
+    return [
+        ('project', '/{0}/'.format(node_id)),
+        ('dashboard', '/dashboard/'),
+        ('profile', '/profile/{0}/'.format(user._id)),
+    ]
+
+
+def run(client, url, headers, iterations):
+    """Request `url` `iterations` times; return milliseconds per request."""
+    start = time.time()
+    for _ in range(iterations):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, '{0} returned {1}'.format(url, response.status_code)
+    return (time.time() - start) * 1000 / iterations
+
+
+def main(app, email, password, node_id, iterations):
+    user = User.find_by_email(email)[0]
+    headers = {
+        'Authorization': 'Basic ' + base64.b64encode('{0}:{1}'.format(email, password)),
+    }
+    client = app.test_client()
+    for name, url in get_pages(user, node_id):
+        timings = {}
+        for single_pass in (False, True):
+            settings.SINGLE_PASS_RENDERING = single_pass
+            client.get(url, headers=headers)  # Warm template caches
+            timings[single_pass] = run(client, url, headers, iterations)
+        logger.info('{0:<10} re-parsing: {1:7.1f} ms  single pass: {2:7.1f} ms  speedup: {3:.2f}x'.format(
+            name, timings[False], timings[True], timings[False] / timings[True],
+        ))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark rendering of pages with embedded templates.')
+    parser.add_argument('--email', dest='email', required=True)
+    parser.add_argument('--password', dest='password', required=True)
+    parser.add_argument('--node', dest='node', required=True, help='ID of a project visible to the user')
+    parser.add_argument('--iterations', dest='iterations', type=int, default=20)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    app = init_app(set_backends=True, routes=True)
+    main(app, args.email, args.password, args.node, args.iterations)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Render the current version of every wiki page into the wiki render cache
+and remove the entries left behind by earlier versions of the rendering
+pipeline. Run after deploying a change to `WIKI_RENDER_VERSION` or to the
+Markdown / bleach / Pygments versions.
+
+    python -m scripts.cache_wiki_renders [dry]
+"""
+import sys
+import logging
+
+from modularodm import Q
+
+from website.app import init_app
+from website.models import Node
+from website.addons.wiki import cache as wiki_cache
+from website.addons.wiki.model import NodeWikiPage
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_targets():
+    return Node.find(
+        Q('is_deleted', 'eq', False) &
+        Q('wiki_pages_current', 'ne', {})
+    )
+
+
+def do_migration(records, dry=False):
+    count = 0
+    for node in records:
+        pages = NodeWikiPage.load_many(node.wiki_pages_current.values())
+        for page in pages:
+            count += 1
+            if not dry:
+                page.html(node)
+        wiki_cache.clear()
+        Node._clear_caches()
+        NodeWikiPage._clear_caches()
+    logger.info('Rendered {0} wiki pages'.format(count))
+    if not dry:
+        logger.info('Removed {0} stale entries'.format(wiki_cache.prune()))
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    do_migration(get_targets(), dry)
+
+
+if __name__ == '__main__':
+    main()
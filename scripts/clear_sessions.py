@@ -1,4 +1,11 @@
 # -*- coding: utf-8 -*-
+"""Remove stale sessions ahead of time.
+
+Sessions are removed by Mongo once they have not been written for
+``SESSION_EXPIRATION`` seconds (TTL index on ``date_modified``), so this
+script is only needed to purge sessions earlier than that, e.g. after
+shortening the expiration. Its queries use the same index.
+"""
 from __future__ import absolute_import
 
 import logging
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Move the daily counts stored in the `date.<YYYY/MM/DD>` fields of
+`pagecounters` and `useractivitycounters` documents to monthly bucket
+documents, leaving the running totals in place.
+
+Daily counts are added to the buckets (which already hold the counts recorded
+since the bucketed schema was deployed) and removed from the source document
+in turn, so the script can be interrupted and run again.
+
+    python -m scripts.migrate_counter_buckets [dry]
+"""
+import sys
+import logging
+import collections
+from datetime import datetime
+
+from framework.mongo import database
+from framework.analytics import (
+    PAGE_BUCKETS, USER_ACTIVITY_BUCKETS, MONTH_FORMAT, DAY_FORMAT, get_bucket_id,
+)
+from website.app import init_app
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_targets(collection_name):
+    """Counter documents that still hold daily counts."""
+    return database[collection_name].find({'date': {'$exists': True}})
+
+
+def split_by_month(key, daily):
+    """Group the daily counts of `key`, a dictionary of `{'YYYY/MM/DD':
+    {<counter>: <count>}}`, by bucket.
+
+    :return: Dictionary mapping bucket ids to (month, {<field>: <count>})
+    """
+    buckets = {}
+    for date, counts in daily.items():
+        date = datetime.strptime(date, '%Y/%m/%d')
+        month = date.strftime(MONTH_FORMAT)
+        day = date.strftime(DAY_FORMAT)
+        _, increments = buckets.setdefault(get_bucket_id(key, date), (month, {}))
+        for field, count in counts.items():
+            increments['date.{0}.{1}'.format(day, field)] = count
+    return buckets
+
+
+def migrate_record(record, bucket_collection, source_collection, dry=False):
+    """Move the daily counts of a counter document to its buckets.
+
+    :return: Number of buckets updated
+    """
+    key = record['_id']
+    daily = collections.defaultdict(dict)
+    for date, counts in record.get('date', {}).items():
+        daily[date].update(counts)
+    unset = {'date': True}
+    # Daily counts of each action of a user
+    for action, counts in record.get('action', {}).items():
+        for date, count in counts.get('date', {}).items():
+            daily[date]['action.{0}'.format(action)] = count
+        if 'date' in counts:
+            unset['action.{0}.date'.format(action)] = True
+
+    buckets = split_by_month(key, daily)
+    if dry:
+        return len(buckets)
+    for bucket_id, (month, increments) in buckets.items():
+        bucket_collection.update(
+            {'_id': bucket_id, 'key': key, 'month': month},
+            {'$inc': increments},
+            upsert=True,
+            manipulate=False,
+        )
+    source_collection.update({'_id': key}, {'$unset': unset})
+    return len(buckets)
+
+
+def do_migration(collection_name, bucket_collection_name, dry=False):
+    source_collection = database[collection_name]
+    bucket_collection = database[bucket_collection_name]
+    count = 0
+    buckets = 0
+    for record in get_targets(collection_name):
+        buckets += migrate_record(record, bucket_collection, source_collection, dry=dry)
+        count += 1
+    logger.info('Split {0} {1} documents into {2} buckets'.format(count, collection_name, buckets))
+
+
+def main():
+    init_app(routes=False)
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    do_migration('pagecounters', PAGE_BUCKETS, dry=dry)
+    do_migration('useractivitycounters', USER_ACTIVITY_BUCKETS, dry=dry)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Backfill the `feed_ids` field of every log, i.e. the ids of the nodes
+having the log in their history and of their primary ancestors, with one
+multi-update per node and source of shared logs. Run after
+`scripts.migrate_node_ancestry` and `scripts.migrate_node_logs`.
+
+    python -m scripts.migrate_log_feeds [dry]
+"""
+import sys
+import logging
+
+from modularodm import Q
+
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.models import Node
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_targets():
+    """Nodes with at least one log in their history.
+    """
+    return Node.find(Q('log_count', 'gt', 0))
+
+
+def do_migration(records, dry=False):
+    count = 0
+    for node in records:
+        count += node.log_count
+        if not dry:
+            with TokuTransaction():
+                node._add_logs_to_feeds()
+        Node._clear_caches(node._id)
+    logger.info('Added {0} logs to feeds'.format(count))
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    do_migration(get_targets(), dry)
+
+
+if __name__ == '__main__':
+    main()
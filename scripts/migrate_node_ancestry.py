@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Backfill the materialized `ancestor_ids` and `ancestor_admin_ids` fields
+on every node by walking each component tree from its root.
+
+    python -m scripts.migrate_node_ancestry [dry]
+"""
+import sys
+import logging
+
+from modularodm import Q
+
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.models import Node
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_targets():
+    """Top-level nodes, i.e. nodes that are not a primary child of any node.
+    """
+    return Node.find(Q('__backrefs.parent.node.nodes', 'eq', None))
+
+
+def count_descendants(node):
+    return sum(1 + count_descendants(child) for child in node.nodes_primary)
+
+
+def do_migration(records, dry=False):
+    count = 0
+    for node in records:
+        descendants = count_descendants(node)
+        if not descendants:
+            continue
+        logger.info('Updating lineage of {0} descendants of node {1}'.format(descendants, node._id))
+        count += descendants
+        if not dry:
+            with TokuTransaction():
+                node.update_descendant_ancestry()
+        Node._clear_caches()
+    logger.info('Updated lineage of {0} nodes'.format(count))
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    do_migration(get_targets(), dry)
+
+
+if __name__ == '__main__':
+    main()
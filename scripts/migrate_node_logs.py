@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Move node logs out of the embedded `Node.logs` lists. Sets the `owner` of
+every log, points forks, registrations and templated nodes at the history
+they share with the node they were copied from instead of copies of its log
+ids, and caches `log_count` and `last_log`. Logs added since this version
+was deployed are already owned by their node but missing from its embedded
+list, and are counted as well. Once every node is migrated, the embedded
+lists and the `logged` backreferences of logs are removed.
+
+    python -m scripts.migrate_node_logs [dry]
+"""
+import sys
+import logging
+
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.models import Node, NodeLog
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+FIELDS = [
+    'logs',
+    'is_fork',
+    'is_registration',
+    'forked_from',
+    'registered_from',
+    'template_node',
+]
+
+
+def get_targets():
+    """Raw documents of nodes that still embed their logs.
+    """
+    return Node._storage[0].store.find({'logs': {'$exists': True}}, fields=FIELDS)
+
+
+def get_source_id(node):
+    """Return the id of the node that `node` was copied from, if any.
+    Registrations of forks and forks of templated nodes keep the
+    `forked_from` and `template_node` of the original.
+    """
+    if node.get('is_registration'):
+        return node.get('registered_from')
+    if node.get('is_fork'):
+        return node.get('forked_from')
+    return node.get('template_node')
+
+
+def migrate_node(node, dry=False):
+    """Set the owner of the logs of `node` (a raw document) that are not
+    shared with its source, and its pointer to the shared history; return
+    the number of logs owned by the node.
+    """
+    log_ids = node.get('logs') or []
+    shared = set()
+    source_id = get_source_id(node)
+    if source_id:
+        source = Node._storage[0].store.find_one({'_id': source_id}, fields=['logs'])
+        shared = set(log_ids).intersection((source or {}).get('logs') or [])
+    owned = [each for each in log_ids if each not in shared]
+    # Logs added by `Node.add_log` since the embedded list stopped growing
+    added = [
+        record['_id'] for record in NodeLog._storage[0].store.find(
+            {'owner': node['_id'], '_id': {'$nin': log_ids}},
+            fields=['_id'],
+        )
+    ]
+    if added:
+        last_log = max(added)
+    else:
+        last_log = log_ids[-1] if log_ids else None
+    update = {
+        'log_count': len(log_ids) + len(added),
+        'last_log': last_log,
+    }
+    if shared:
+        update['shared_logs_from'] = source_id
+        update['shared_logs_until'] = max(shared)
+    if not dry:
+        NodeLog._storage[0].store.update(
+            {'_id': {'$in': owned}},
+            {'$set': {'owner': node['_id']}},
+            multi=True,
+        )
+        Node._storage[0].store.update({'_id': node['_id']}, {'$set': update})
+    return len(owned)
+
+
+def remove_embedded_logs():
+    Node._storage[0].store.update(
+        {'logs': {'$exists': True}},
+        {'$unset': {'logs': True}},
+        multi=True,
+    )
+    NodeLog._storage[0].store.update(
+        {'__backrefs.logged': {'$exists': True}},
+        {'$unset': {'__backrefs.logged': True}},
+        multi=True,
+    )
+
+
+def do_migration(records, dry=False):
+    nodes = count = 0
+    for node in records:
+        with TokuTransaction():
+            count += migrate_node(node, dry=dry)
+        nodes += 1
+    # Sources must keep their embedded lists until all copies are migrated
+    if not dry:
+        remove_embedded_logs()
+    Node._clear_caches()
+    NodeLog._clear_caches()
+    logger.info('Set the owner of {0} logs of {1} nodes'.format(count, nodes))
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    do_migration(get_targets(), dry)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Backfill the materialized `reader_ids` field (contributors and admins of
+ancestors) on every node. Run after `scripts.migrate_node_ancestry`, which
+fills the `ancestor_admin_ids` this depends on.
+
+    python -m scripts.migrate_node_reader_ids [dry]
+"""
+import sys
+import logging
+
+from website.app import init_app
+from website.models import Node
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_targets():
+    """Raw node documents, with only the fields `reader_ids` is computed from.
+    """
+    return Node._storage[0].store.find(
+        {},
+        fields=['contributors', 'ancestor_admin_ids', 'reader_ids'],
+        timeout=False,
+    )
+
+
+def do_migration(records, dry=False):
+    collection = Node._storage[0].store
+    count = 0
+    for record in records:
+        reader_ids = sorted(
+            set(record.get('contributors') or []).union(record.get('ancestor_admin_ids') or [])
+        )
+        if record.get('reader_ids') == reader_ids:
+            continue
+        count += 1
+        if not dry:
+            collection.update(
+                {'_id': record['_id']},
+                {'$set': {'reader_ids': reader_ids}},
+            )
+    Node._clear_caches()
+    logger.info('Updated reader ids of {0} nodes'.format(count))
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    do_migration(get_targets(), dry)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Backfill the `ancestor_ids` field of every OsfStorageFileNode by walking
+each file tree from its root, one multi-update per folder.
+
+    python -m scripts.osfstorage.migrate_ancestor_ids [dry]
+"""
+import sys
+import logging
+
+from modularodm import Q
+
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.addons.osfstorage.model import OsfStorageFileNode
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_targets():
+    """Root file nodes, i.e. file nodes without a parent.
+    """
+    return OsfStorageFileNode.find(Q('parent', 'eq', None))
+
+
+def migrate_tree(root, dry=False):
+    """Set the `ancestor_ids` of all descendants of `root`; return the number
+    of descendants.
+    """
+    collection = OsfStorageFileNode._storage[0].store
+    count = 0
+    # Folders still to visit, with the ancestor ids of their children
+    folders = [(root._id, [root._id])]
+    while folders:
+        folder_id, ancestor_ids = folders.pop()
+        count += collection.find({'parent': folder_id}).count()
+        if not dry:
+            collection.update(
+                {'parent': folder_id},
+                {'$set': {'ancestor_ids': ancestor_ids}},
+                multi=True,
+            )
+        for child in collection.find({'parent': folder_id, 'kind': 'folder'}, fields=['_id']):
+            folders.append((child['_id'], ancestor_ids + [child['_id']]))
+    return count
+
+
+def do_migration(records, dry=False):
+    count = 0
+    for root in records:
+        with TokuTransaction():
+            descendants = migrate_tree(root, dry=dry)
+        if descendants:
+            logger.info('Updated lineage of {0} descendants of file node {1}'.format(descendants, root._id))
+        count += descendants
+    OsfStorageFileNode._clear_caches()
+    logger.info('Updated lineage of {0} file nodes'.format(count))
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    do_migration(get_targets(), dry)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@
 
 import datetime
 import logging
-from bson.code import Code
+import itertools
 
 from modularodm import Q
 
@@ -33,45 +33,57 @@ def main():
     script_utils.add_file_logger(logger, __file__)
     app = init_app(attach_request_handlers=False)
     celery_app.main = 'scripts.send_digest'
-    grouped_digests = group_digest_notifications_by_user()
     with app.test_request_context():
-        send_digest(grouped_digests)
+        send_digest(group_digest_notifications_by_user())
 
 
 def send_digest(grouped_digests):
-    """ Send digest emails and remove digests for sent messages in a callback.
-    :param grouped_digests: digest notification messages from the past 24 hours grouped by user
+    """ Send digest emails in batches of ``settings.MAIL_BATCH_SIZE`` and remove
+    digests for sent messages in a callback.
+    :param grouped_digests: digest notification messages from the past 24 hours grouped by user;
+        consumed one user at a time
     :return:
     """
+    messages, digest_notification_ids = [], []
     for group in grouped_digests:
         user = User.load(group['user_id'])
         if not user:
             sentry.log_exception()
             sentry.log_message("A user with this username does not exist.")
-            return
+            continue
 
         info = group['info']
-        digest_notification_ids = [message['_id'] for message in info]
         sorted_messages = group_messages_by_node(info)
 
         if sorted_messages:
             logger.info('Sending email digest to user {0!r}'.format(user))
-            mails.send_mail(
+            messages.append(mails.render_mail(
                 to_addr=user.username,
                 mimetype='html',
                 mail=mails.DIGEST,
                 name=user.fullname,
                 message=sorted_messages,
-                callback=remove_sent_digest_notifications.si(
-                    digest_notification_ids=digest_notification_ids
-                )
-            )
+            ))
+            digest_notification_ids.extend(message['_id'] for message in info)
+            if len(messages) >= settings.MAIL_BATCH_SIZE:
+                send_digest_batch(messages, digest_notification_ids)
+                messages, digest_notification_ids = [], []
+    if messages:
+        send_digest_batch(messages, digest_notification_ids)
+
+
+def send_digest_batch(messages, digest_notification_ids):
+    mails.send_mails(
+        messages,
+        callback=remove_sent_digest_notifications.si(
+            digest_notification_ids=digest_notification_ids
+        )
+    )
 
 
 @celery_app.task
 def remove_sent_digest_notifications(digest_notification_ids=None):
-    for digest_id in digest_notification_ids:
-        NotificationDigest.remove(Q('_id', 'eq', digest_id))
+    NotificationDigest.remove(Q('_id', 'in', digest_notification_ids))
 
 
 def group_messages_by_node(notifications):
@@ -82,8 +94,10 @@ def group_messages_by_node(notifications):
 
 
 def group_digest_notifications_by_user():
-    """ Group digest notification messages from the past 24 hours by user
-    :return: [{
+    """ Group digest notification messages from the past 24 hours by user.
+    Digests are streamed from the database in user order, so only one user's
+    messages are held in memory at a time.
+    :return: iterator of {
                 'user_id': 'se8ea',
                 'info': [{
                     'message': {
@@ -94,31 +108,33 @@ def group_digest_notifications_by_user():
                     '_id': NotificationDigest._id
                 }, ...
                 }]
-              },
-              {
-                'user_id': ...
-              }]
+              }, ordered by user id
     """
-    return db['notificationdigest'].group(
-        key={'user_id': 1},
-        condition={
+    cursor = db['notificationdigest'].find(
+        {
             'timestamp': {
                 '$lt': datetime.datetime.utcnow()
             }
         },
-        initial={'info': []},
-        reduce=Code(
-            """
-            function(curr, result) {
-                result.info.push({
-                    'message': curr.message,
-                    'node_lineage': curr.node_lineage,
-                    '_id': curr._id
-                });
-            };
-            """
-        )
+        fields=['user_id', 'message', 'node_lineage'],
+        sort=[('user_id', 1), ('timestamp', 1)],
+        timeout=False,
     )
+    try:
+        for user_id, digests in itertools.groupby(cursor, key=lambda digest: digest['user_id']):
+            yield {
+                'user_id': user_id,
+                'info': [
+                    {
+                        'message': digest['message'],
+                        'node_lineage': digest['node_lineage'],
+                        '_id': digest['_id'],
+                    }
+                    for digest in digests
+                ],
+            }
+    finally:
+        cursor.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,39 @@
+from nose.tools import *  # noqa
+
+from website.models import Node
+from website.addons.wiki import cache as wiki_cache
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, NodeWikiFactory
+
+from scripts.cache_wiki_renders import do_migration, get_targets
+
+
+class TestCacheWikiRenders(OsfTestCase):
+
+    def setUp(self):
+        super(TestCacheWikiRenders, self).setUp()
+        self.project = ProjectFactory()
+        self.wiki = NodeWikiFactory(node=self.project, content='**bold**')
+        self.empty = ProjectFactory()
+
+    def tearDown(self):
+        wiki_cache.clear()
+        wiki_cache.get_cache().remove()
+        super(TestCacheWikiRenders, self).tearDown()
+        Node.remove()
+
+    def test_get_targets(self):
+        targets = list(get_targets())
+        assert_in(self.project, targets)
+        assert_not_in(self.empty, targets)
+
+    def test_do_migration(self):
+        do_migration(get_targets())
+        key = wiki_cache.get_cache_key(self.wiki.content, self.project)
+        record = wiki_cache.get_cache().find_one({'_id': key})
+        assert_in('<strong>bold</strong>', record['html'])
+        assert_equal(record['page_id'], self.wiki._id)
+
+    def test_do_migration_dry(self):
+        do_migration(get_targets(), dry=True)
+        assert_equal(wiki_cache.get_cache().count(), 0)
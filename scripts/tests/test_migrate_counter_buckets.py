@@ -0,0 +1,89 @@
+from nose.tools import *  # noqa
+
+from framework.analytics import PAGE_BUCKETS, USER_ACTIVITY_BUCKETS
+from tests.base import OsfTestCase
+
+from scripts.migrate_counter_buckets import do_migration, get_targets
+
+
+class TestMigrateCounterBuckets(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateCounterBuckets, self).setUp()
+        # Documents as written before counts were bucketed
+        self.db['pagecounters'].insert({
+            '_id': 'node:abc12',
+            'total': 6,
+            'unique': 3,
+            'date': {
+                '2015/01/31': {'total': 1, 'unique': 1},
+                '2015/02/01': {'total': 2, 'unique': 1},
+                '2015/02/02': {'total': 3, 'unique': 1},
+            },
+        })
+        self.db['useractivitycounters'].insert({
+            '_id': 'user1',
+            'total': 3,
+            'date': {
+                '2015/01/31': {'total': 1},
+                '2015/02/01': {'total': 2},
+            },
+            'action': {
+                'project_created': {'total': 2, 'date': {'2015/01/31': 1, '2015/02/01': 1}},
+                'comment_added': {'total': 1, 'date': {'2015/02/01': 1}},
+            },
+        })
+        # Counted after the bucketed schema was deployed
+        self.db[PAGE_BUCKETS].insert({
+            '_id': 'node:abc12:2015/02',
+            'key': 'node:abc12',
+            'month': '2015/02',
+            'date': {'02': {'total': 1}},
+        })
+
+    def tearDown(self):
+        super(TestMigrateCounterBuckets, self).tearDown()
+        for name in ('pagecounters', 'useractivitycounters', PAGE_BUCKETS, USER_ACTIVITY_BUCKETS):
+            self.db[name].remove()
+
+    def test_get_targets(self):
+        assert_equal([each['_id'] for each in get_targets('pagecounters')], ['node:abc12'])
+
+    def test_migrate_page_counters(self):
+        do_migration('pagecounters', PAGE_BUCKETS)
+        record = self.db['pagecounters'].find_one({'_id': 'node:abc12'})
+        assert_equal(record, {'_id': 'node:abc12', 'total': 6, 'unique': 3})
+        january = self.db[PAGE_BUCKETS].find_one({'_id': 'node:abc12:2015/01'})
+        assert_equal(january['key'], 'node:abc12')
+        assert_equal(january['month'], '2015/01')
+        assert_equal(january['date'], {'31': {'total': 1, 'unique': 1}})
+        february = self.db[PAGE_BUCKETS].find_one({'_id': 'node:abc12:2015/02'})
+        assert_equal(february['date'], {
+            '01': {'total': 2, 'unique': 1},
+            '02': {'total': 4, 'unique': 1},
+        })
+
+    def test_migrate_user_activity_counters(self):
+        do_migration('useractivitycounters', USER_ACTIVITY_BUCKETS)
+        record = self.db['useractivitycounters'].find_one({'_id': 'user1'})
+        assert_equal(record['total'], 3)
+        assert_not_in('date', record)
+        assert_equal(record['action'], {
+            'project_created': {'total': 2},
+            'comment_added': {'total': 1},
+        })
+        february = self.db[USER_ACTIVITY_BUCKETS].find_one({'_id': 'user1:2015/02'})
+        assert_equal(february['date'], {
+            '01': {'total': 2, 'action': {'project_created': 1, 'comment_added': 1}},
+        })
+
+    def test_migration_is_idempotent(self):
+        do_migration('pagecounters', PAGE_BUCKETS)
+        do_migration('pagecounters', PAGE_BUCKETS)
+        february = self.db[PAGE_BUCKETS].find_one({'_id': 'node:abc12:2015/02'})
+        assert_equal(february['date']['02'], {'total': 4, 'unique': 1})
+
+    def test_dry_run(self):
+        do_migration('pagecounters', PAGE_BUCKETS, dry=True)
+        assert_in('date', self.db['pagecounters'].find_one({'_id': 'node:abc12'}))
+        assert_equal(self.db[PAGE_BUCKETS].find().count(), 1)
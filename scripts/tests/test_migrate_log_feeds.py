@@ -0,0 +1,41 @@
+from nose.tools import *  # noqa
+
+from website.models import NodeLog
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, NodeFactory, UserFactory
+
+from scripts.migrate_log_feeds import do_migration, get_targets
+
+
+class TestMigrateLogFeeds(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateLogFeeds, self).setUp()
+        self.user = UserFactory()
+        self.project = ProjectFactory(creator=self.user)
+        self.component = NodeFactory(parent=self.project, creator=self.user)
+        # Simulate logs created before feeds were materialized
+        NodeLog._storage[0].store.update(
+            {},
+            {'$unset': {'feed_ids': True}},
+            multi=True,
+        )
+        NodeLog._clear_caches()
+
+    def test_get_targets(self):
+        targets = [node._id for node in get_targets()]
+        assert_in(self.project._id, targets)
+        assert_in(self.component._id, targets)
+
+    def test_do_migration(self):
+        do_migration(get_targets())
+        log = NodeLog.load(self.component.logs[0]._id)
+        assert_equal(set(log.feed_ids), {self.project._id, self.component._id})
+        assert_equal(
+            self.project.get_aggregate_logs_queryset(None).count(),
+            len(self.project.logs) + len(self.component.logs),
+        )
+
+    def test_dry_run(self):
+        do_migration(get_targets(), dry=True)
+        assert_equal(NodeLog.load(self.component.logs[0]._id).feed_ids, [])
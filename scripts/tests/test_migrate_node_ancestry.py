@@ -0,0 +1,43 @@
+from nose.tools import *  # noqa
+
+from website.models import Node
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, NodeFactory, UserFactory
+
+from scripts.migrate_node_ancestry import do_migration, get_targets
+
+
+class TestMigrateNodeAncestry(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateNodeAncestry, self).setUp()
+        self.user = UserFactory()
+        self.project = ProjectFactory(creator=self.user)
+        self.component = NodeFactory(parent=self.project, creator=self.user)
+        self.subcomponent = NodeFactory(parent=self.component, creator=self.user)
+        # Simulate nodes created before lineage was materialized
+        for node in (self.component, self.subcomponent):
+            Node._storage[0].store.update(
+                {'_id': node._id},
+                {'$set': {'ancestor_ids': [], 'ancestor_admin_ids': []}},
+            )
+        Node._clear_caches()
+
+    def tearDown(self):
+        super(TestMigrateNodeAncestry, self).tearDown()
+        Node.remove()
+
+    def test_get_targets_returns_roots(self):
+        targets = [node._id for node in get_targets()]
+        assert_in(self.project._id, targets)
+        assert_not_in(self.component._id, targets)
+
+    def test_do_migration(self):
+        do_migration(get_targets())
+        subcomponent = Node.load(self.subcomponent._id)
+        assert_equal(subcomponent.ancestor_ids, [self.project._id, self.component._id])
+        assert_in(self.user._id, subcomponent.ancestor_admin_ids)
+
+    def test_dry_run(self):
+        do_migration(get_targets(), dry=True)
+        assert_equal(Node.load(self.subcomponent._id).ancestor_ids, [])
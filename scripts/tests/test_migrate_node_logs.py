@@ -0,0 +1,74 @@
+from nose.tools import *  # noqa
+
+from framework.auth import Auth
+from website.models import Node, NodeLog
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory
+
+from scripts.migrate_node_logs import do_migration, get_targets
+
+
+class TestMigrateNodeLogs(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateNodeLogs, self).setUp()
+        self.project = ProjectFactory()
+        self.auth = Auth(self.project.creator)
+        self.fork = self.project.fork_node(self.auth)
+        self.project.add_log('file_added', {'node': self.project._id}, auth=self.auth)
+        self.project_log_ids = [log._id for log in self.project.logs]
+        self.fork_log_ids = [log._id for log in self.fork.logs]
+        # Simulate nodes embedding the ids of their logs
+        nodes = Node._storage[0].store
+        for node, log_ids in ((self.project, self.project_log_ids), (self.fork, self.fork_log_ids)):
+            nodes.update(
+                {'_id': node._id},
+                {
+                    '$set': {'logs': log_ids},
+                    '$unset': {
+                        'log_count': True,
+                        'last_log': True,
+                        'shared_logs_from': True,
+                        'shared_logs_until': True,
+                    },
+                },
+            )
+        NodeLog._storage[0].store.update({}, {'$unset': {'owner': True}}, multi=True)
+        Node._clear_caches()
+        NodeLog._clear_caches()
+
+    def test_get_targets(self):
+        targets = [node['_id'] for node in get_targets()]
+        assert_in(self.project._id, targets)
+        assert_in(self.fork._id, targets)
+
+    def test_do_migration(self):
+        do_migration(get_targets())
+        project = Node.load(self.project._id)
+        fork = Node.load(self.fork._id)
+        assert_equal([log._id for log in project.logs], self.project_log_ids)
+        assert_equal([log._id for log in fork.logs], self.fork_log_ids)
+        assert_equal(fork.shared_logs_from, project)
+        assert_equal(NodeLog.load(self.fork_log_ids[0]).owner, project)
+        assert_equal(fork.log_count, len(self.fork_log_ids))
+        assert_equal(fork.last_log._id, self.fork_log_ids[-1])
+        assert_not_in('logs', Node._storage[0].store.find_one({'_id': project._id}))
+
+    def test_logs_added_before_migration(self):
+        project = Node.load(self.project._id)
+        project.add_log('file_removed', {'node': project._id}, auth=self.auth)
+        new_log_id = project.last_log._id
+        do_migration(get_targets())
+        Node._clear_caches()
+        project = Node.load(self.project._id)
+        assert_equal(project.log_count, len(self.project_log_ids) + 1)
+        assert_equal(project.last_log._id, new_log_id)
+        assert_equal(
+            [log._id for log in project.logs],
+            self.project_log_ids + [new_log_id],
+        )
+
+    def test_dry_run(self):
+        do_migration(get_targets(), dry=True)
+        assert_is_none(NodeLog.load(self.project_log_ids[0]).owner)
+        assert_in('logs', Node._storage[0].store.find_one({'_id': self.project._id}))
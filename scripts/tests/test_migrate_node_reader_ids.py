@@ -0,0 +1,34 @@
+from nose.tools import *  # noqa
+
+from website.models import Node
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, NodeFactory, UserFactory
+
+from scripts.migrate_node_reader_ids import do_migration, get_targets
+
+
+class TestMigrateNodeReaderIds(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateNodeReaderIds, self).setUp()
+        self.admin = UserFactory()
+        self.user = UserFactory()
+        self.project = ProjectFactory(creator=self.admin)
+        self.component = NodeFactory(parent=self.project, creator=self.user)
+        # Simulate nodes saved before reader ids were materialized
+        Node._storage[0].store.update({}, {'$unset': {'reader_ids': True}}, multi=True)
+        Node._clear_caches()
+
+    def tearDown(self):
+        super(TestMigrateNodeReaderIds, self).tearDown()
+        Node.remove()
+
+    def test_do_migration(self):
+        do_migration(get_targets())
+        component = Node.load(self.component._id)
+        assert_equal(component.reader_ids, sorted([self.admin._id, self.user._id]))
+        assert_equal(Node.load(self.project._id).reader_ids, [self.admin._id])
+
+    def test_dry_run(self):
+        do_migration(get_targets(), dry=True)
+        assert_false(Node.load(self.component._id).reader_ids)
@@ -0,0 +1,41 @@
+from nose.tools import *  # noqa
+
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory
+
+from website.addons.osfstorage.model import OsfStorageFileNode
+from scripts.osfstorage.migrate_ancestor_ids import do_migration, get_targets
+
+
+class TestMigrateAncestorIds(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateAncestorIds, self).setUp()
+        self.project = ProjectFactory()
+        self.root = self.project.get_addon('osfstorage').root_node
+        self.folder = self.root.append_folder('Cloud')
+        self.subfolder = self.folder.append_folder('Carp')
+        self.file = self.subfolder.append_file('A dee um')
+        # Simulate file nodes created before ancestor ids were stored
+        OsfStorageFileNode._storage[0].store.update(
+            {},
+            {'$unset': {'ancestor_ids': True}},
+            multi=True,
+        )
+        OsfStorageFileNode._clear_caches()
+
+    def test_get_targets_returns_roots(self):
+        targets = [each._id for each in get_targets()]
+        assert_in(self.root._id, targets)
+        assert_not_in(self.folder._id, targets)
+
+    def test_do_migration(self):
+        do_migration(get_targets())
+        file_node = OsfStorageFileNode.load(self.file._id)
+        assert_equal(file_node.ancestor_ids, [self.root._id, self.folder._id, self.subfolder._id])
+        assert_equal(OsfStorageFileNode.load(self.folder._id).ancestor_ids, [self.root._id])
+        assert_equal(file_node.materialized_path(), '/Cloud/Carp/A dee um')
+
+    def test_dry_run(self):
+        do_migration(get_targets(), dry=True)
+        assert_equal(OsfStorageFileNode.load(self.file._id).ancestor_ids, [])
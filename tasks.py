@@ -315,10 +315,15 @@ def elasticsearch():
         print("Your system is not recognized, you will have to start elasticsearch manually")
 
 @task
-def migrate_search(delete=False, index=settings.ELASTIC_INDEX):
-    """Migrate the search-enabled models."""
+def migrate_search(delete=False, index=settings.ELASTIC_INDEX, workers=None, resume=False):
+    """Migrate the search-enabled models. Documents are built by `workers`
+    processes (default: one per CPU); pass `resume` to continue an interrupted
+    migration.
+    """
+    import multiprocessing
     from website.search_migration.migrate import migrate
-    migrate(delete, index=index)
+    workers = int(workers) if workers else multiprocessing.cpu_count()
+    migrate(delete, index=index, workers=workers, resume=resume)
 
 @task
 def rebuild_search():
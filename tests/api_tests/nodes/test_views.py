@@ -92,6 +92,16 @@ class TestNodeList(ApiTestCase):
         assert_in(self.public._id, ids)
         assert_not_in(self.private._id, ids)
 
+    def test_return_private_component_to_parent_admin(self):
+        component = NodeFactory(parent=self.private, creator=self.non_contrib, is_public=False)
+        res = self.app.get(self.url, auth=self.user.auth)
+        ids = [each['id'] for each in res.json['data']]
+        assert_in(component._id, ids)
+        res = self.app.get(self.url, auth=self.non_contrib.auth)
+        ids = [each['id'] for each in res.json['data']]
+        assert_in(component._id, ids)
+        assert_not_in(self.private._id, ids)
+
 
 
 class TestNodeFiltering(ApiTestCase):
@@ -296,6 +306,181 @@ class TestNodeFiltering(ApiTestCase):
         assert_not_in(self.dashboard._id, ids)
 
 
+class TestNodeListCounts(ApiTestCase):
+
+    def setUp(self):
+        super(TestNodeListCounts, self).setUp()
+        self.user = AuthUserFactory()
+        self.non_contrib = AuthUserFactory()
+        self.project = ProjectFactory(is_public=True, creator=self.user)
+        self.public_child = NodeFactory(parent=self.project, creator=self.user, is_public=True)
+        self.private_child = NodeFactory(parent=self.project, creator=self.user, is_public=False)
+        self.project.add_pointer(ProjectFactory(), auth=Auth(self.user), save=True)
+        self.project.add_contributor(self.non_contrib, auth=Auth(self.user), save=True)
+        self.registration = RegistrationFactory(project=self.project)
+        self.other = ProjectFactory(is_public=True)
+        self.url = '/{}nodes/'.format(API_BASE)
+
+    def tearDown(self):
+        super(TestNodeListCounts, self).tearDown()
+        Node.remove()
+
+    def get_links(self, url, **kwargs):
+        res = self.app.get(url, **kwargs)
+        return dict((each['id'], each['links']) for each in res.json['data'])
+
+    def test_counts_in_list_match_detail(self):
+        links = self.get_links(self.url, auth=self.user.auth)
+        for node_id in (self.project._id, self.other._id):
+            res = self.app.get('{}{}/'.format(self.url, node_id), auth=self.user.auth)
+            detail = res.json['data']['links']
+            for relation in ('children', 'contributors', 'node_links', 'registrations'):
+                assert_equal(links[node_id][relation]['count'], detail[relation]['count'])
+
+    def test_counts_respect_visibility(self):
+        links = self.get_links(self.url, auth=self.user.auth)[self.project._id]
+        assert_equal(links['children']['count'], 2)
+        assert_equal(links['node_links']['count'], 1)
+        assert_equal(links['contributors']['count'], 2)
+        links = self.get_links(self.url)[self.project._id]
+        assert_equal(links['children']['count'], 1)
+
+    def test_counts_false(self):
+        links = self.get_links(self.url + '?counts=false', auth=self.user.auth)[self.project._id]
+        for relation in ('children', 'contributors', 'node_links', 'registrations'):
+            assert_is_none(links[relation]['count'])
+        assert_in('related', links['children'])
+
+
+class TestNodeSparseFieldsAndEmbeds(ApiTestCase):
+
+    def setUp(self):
+        super(TestNodeSparseFieldsAndEmbeds, self).setUp()
+        self.user = AuthUserFactory()
+        self.contributor = AuthUserFactory()
+        self.project = ProjectFactory(is_public=True, creator=self.user)
+        self.project.add_contributor(self.contributor, auth=Auth(self.user), save=True)
+        self.public_child = NodeFactory(parent=self.project, creator=self.user, is_public=True)
+        self.private_child = NodeFactory(parent=self.project, creator=self.user, is_public=False)
+        self.url = '/{}nodes/'.format(API_BASE)
+
+    def tearDown(self):
+        super(TestNodeSparseFieldsAndEmbeds, self).tearDown()
+        Node.remove()
+
+    def get_project(self, url, **kwargs):
+        res = self.app.get(url, **kwargs)
+        return [each for each in res.json['data'] if each['id'] == self.project._id][0]
+
+    def test_sparse_fieldset(self):
+        data = self.get_project(self.url + '?fields[nodes]=title,children')
+        assert_equal(data['title'], self.project.title)
+        assert_equal(data['type'], 'nodes')
+        assert_not_in('description', data)
+        assert_not_in('tags', data)
+        assert_equal(data['links']['children']['count'], 1)
+        assert_not_in('contributors', data['links'])
+        assert_not_in('registrations', data['links'])
+
+    def test_sparse_fieldset_on_detail(self):
+        res = self.app.get('{}{}/?fields[nodes]=title'.format(self.url, self.project._id))
+        assert_equal(set(res.json['data'].keys()), set(['id', 'type', 'title', 'links']))
+
+    def test_embed_contributors(self):
+        data = self.get_project(self.url + '?embed=contributors')
+        contributors = data['embeds']['contributors']['data']
+        assert_equal([each['id'] for each in contributors], [self.user._id, self.contributor._id])
+        assert_equal(contributors[0]['type'], 'users')
+
+    def test_embed_children_respects_visibility(self):
+        data = self.get_project(self.url + '?embed=children,contributors')
+        assert_equal([each['id'] for each in data['embeds']['children']['data']], [self.public_child._id])
+        assert_not_in('embeds', data['embeds']['children']['data'][0])
+        data = self.get_project(self.url + '?embed=children', auth=self.user.auth)
+        assert_equal(
+            [each['id'] for each in data['embeds']['children']['data']],
+            [self.public_child._id, self.private_child._id]
+        )
+
+    def test_embed_with_sparse_fieldsets(self):
+        data = self.get_project(self.url + '?embed=contributors&fields[nodes]=title&fields[users]=fullname')
+        contributor = data['embeds']['contributors']['data'][0]
+        assert_equal(set(contributor.keys()), set(['id', 'type', 'fullname', 'links']))
+
+    def test_unknown_embed_is_ignored(self):
+        data = self.get_project(self.url + '?embed=nonsense')
+        assert_not_in('embeds', data)
+
+
+class TestNodeListCursorPagination(ApiTestCase):
+
+    def setUp(self):
+        super(TestNodeListCursorPagination, self).setUp()
+        self.user = AuthUserFactory()
+        self.projects = [ProjectFactory(is_public=True) for _ in range(5)]
+        self.private = ProjectFactory(is_public=False, creator=self.user)
+        self.url = '/{}nodes/'.format(API_BASE)
+        Node._clear_caches()
+        nodes = [Node.load(project._id) for project in self.projects]
+        self.expected = [
+            node._id for node in
+            sorted(nodes, key=lambda node: (node.date_created, node._id), reverse=True)
+        ]
+
+    def tearDown(self):
+        super(TestNodeListCursorPagination, self).tearDown()
+        Node.remove()
+
+    def get_pages(self, url, link, **kwargs):
+        pages = []
+        while url:
+            res = self.app.get(url, **kwargs)
+            pages.append(res.json)
+            url = res.json['links'][link]
+        return pages
+
+    def test_follows_next_links_in_order(self):
+        pages = self.get_pages(self.url + '?page[cursor]=&page[size]=2', 'next')
+        ids = [each['id'] for page in pages for each in page['data']]
+        assert_equal(ids, self.expected)
+        assert_equal([len(page['data']) for page in pages], [2, 2, 1])
+        assert_is_none(pages[0]['links']['prev'])
+        assert_is_none(pages[0]['links']['first'])
+        assert_is_none(pages[0]['links']['meta']['total'])
+        assert_equal(pages[0]['links']['meta']['per_page'], 2)
+
+    def test_follows_prev_links_back_to_first_page(self):
+        pages = self.get_pages(self.url + '?page[cursor]=&page[size]=2', 'next')
+        last = pages[-1]['links']
+        assert_is_not_none(last['first'])
+        pages = self.get_pages(last['prev'], 'prev')
+        ids = [each['id'] for page in reversed(pages) for each in page['data']]
+        assert_equal(ids, self.expected[:4])
+        assert_is_not_none(pages[0]['links']['next'])
+
+    def test_respects_permissions_and_filters(self):
+        pages = self.get_pages(self.url + '?page[cursor]=&page[size]=2', 'next', auth=self.user.auth)
+        ids = [each['id'] for page in pages for each in page['data']]
+        assert_in(self.private._id, ids)
+        res = self.app.get(self.url + '?page[cursor]=&filter[public]=false', auth=self.user.auth)
+        assert_equal([each['id'] for each in res.json['data']], [self.private._id])
+
+    def test_total(self):
+        res = self.app.get(self.url + '?page[cursor]=&page[total]=exact')
+        assert_equal(res.json['links']['meta']['total'], 5)
+        res = self.app.get(self.url + '?page[cursor]=&page[total]=estimate')
+        assert_equal(res.json['links']['meta']['total'], 5)
+
+    def test_invalid_cursor(self):
+        res = self.app.get(self.url + '?page[cursor]=notacursor', expect_errors=True)
+        assert_equal(res.status_code, 404)
+
+    def test_page_numbers_without_cursor(self):
+        res = self.app.get(self.url + '?page[size]=2')
+        assert_equal(res.json['links']['meta']['total'], 5)
+        assert_in('page=3', res.json['links']['last'])
+
+
 class TestNodeCreate(ApiTestCase):
 
     def setUp(self):
@@ -785,6 +970,27 @@ class TestNodeContributorFiltering(ApiTestCase):
         assert_equal(len(res.json['data']), 1)
         assert_false(res.json['data'][0].get('bibliographic', None))
 
+    def test_filtering_preserves_contributor_order(self):
+        contributors = [UserFactory(fullname='Lise Meitner {}'.format(i)) for i in range(3)]
+        other = UserFactory(fullname='Otto Hahn')
+        for contributor in reversed(contributors):
+            self.project.add_contributor(contributor)
+        self.project.add_contributor(other, visible=False)
+        self.project.save()
+
+        base_url = '/{}nodes/{}/contributors/'.format(API_BASE, self.project._id)
+        res = self.app.get(base_url + '?filter[fullname]=meitner', auth=self.basic_auth)
+        assert_equal(
+            [each['id'] for each in res.json['data']],
+            [contributor._id for contributor in reversed(contributors)]
+        )
+
+        res = self.app.get(base_url + '?filter[fullname]=hahn&filter[bibliographic]=False', auth=self.basic_auth)
+        assert_equal([each['id'] for each in res.json['data']], [other._id])
+
+        res = self.app.get(base_url + '?filter[fullname]=hahn&filter[bibliographic]=True', auth=self.basic_auth)
+        assert_equal(res.json['data'], [])
+
 class TestNodeRegistrationList(ApiTestCase):
     def setUp(self):
         super(TestNodeRegistrationList, self).setUp()
@@ -106,6 +106,16 @@ class TestUserDetail(ApiTestCase):
         assert_not_equal(user_json['fullname'], self.user_one.fullname)
         assert_equal(user_json['fullname'], self.user_two.fullname)
 
+    def test_sparse_fieldset(self):
+        url = "/{}users/{}/?fields[users]=fullname".format(API_BASE, self.user_one._id)
+        res = self.app.get(url)
+        user_json = res.json['data']
+        assert_equal(user_json['fullname'], self.user_one.fullname)
+        assert_equal(user_json['id'], self.user_one._id)
+        assert_not_in('social_accounts', user_json)
+        assert_not_in('nodes', user_json['links'])
+        assert_in('html', user_json['links'])
+
 
 class TestUserNodes(ApiTestCase):
 
@@ -21,6 +21,7 @@ from modularodm import storage
 
 
 from api.base.wsgi import application as django_app
+from framework import analytics, sessions
 from framework.mongo import set_up_storage
 from framework.auth import User
 from framework.sessions.model import Session
@@ -127,6 +128,13 @@ class DbTestCase(unittest.TestCase):
         )
         cls.db = database_proxy
 
+    def tearDown(self):
+        super(DbTestCase, self).tearDown()
+        # Write buffered page counters before the next test reads them
+        analytics.counter_buffer.flush()
+        # Forget credentials verified by this test
+        sessions.auth_cache.clear()
+
     @classmethod
     def tearDownClass(cls):
         super(DbTestCase, cls).tearDownClass()
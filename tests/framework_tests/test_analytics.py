@@ -3,15 +3,20 @@
 Unit tests for analytics logic in framework/analytics/__init__.py
 """
 
+import time
 import unittest
 
+import mock
 from nose.tools import *  # flake8: noqa  (PEP8 asserts)
 from flask import Flask
 
-from datetime import datetime
+from datetime import date, datetime
 
 from framework import analytics, sessions
 from framework.sessions import session
+from framework.analytics.buffer import CounterBuffer
+from framework.analytics.filters import PageFilter
+from framework.mongo import handlers
 
 from tests.base import OsfTestCase
 from tests.factories import UserFactory, ProjectFactory
@@ -39,6 +44,24 @@ class TestAnalytics(OsfTestCase):
         analytics.increment_user_activity_counters(user._id, 'project_created', date, db=self.db)
         assert_equal(user.get_activity_points(db=self.db), 1)
 
+    def test_activity_counts_by_date(self):
+        user = UserFactory()
+        dates = [datetime(2015, 1, 31), datetime(2015, 2, 1), datetime(2015, 2, 1), datetime(2015, 4, 2)]
+        for each in dates:
+            analytics.increment_user_activity_counters(user._id, 'project_created', each, db=self.db)
+        analytics.increment_user_activity_counters(user._id, 'comment_added', dates[1], db=self.db)
+
+        counts = analytics.get_activity_counts_by_date(user._id, date(2015, 1, 1), date(2015, 3, 31), db=self.db)
+        assert_equal(counts, [
+            (date(2015, 1, 31), 1, {'project_created': 1}),
+            (date(2015, 2, 1), 3, {'project_created': 2, 'comment_added': 1}),
+        ])
+        # Totals are kept apart from the buckets
+        record = self.db['useractivitycounters'].find_one({'_id': user._id})
+        assert_equal(record['total'], 5)
+        assert_not_in('date', record)
+        assert_equal(self.db[analytics.USER_ACTIVITY_BUCKETS].find({'key': user._id}).count(), 3)
+
 
 class UpdateCountersTestCase(OsfTestCase):
 
@@ -75,9 +98,7 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, self.fid), db=self.db)
         assert_equal(count, (1, 1))
 
-        page = 'download:{0}:{1}'.format(self.node, self.fid)
-
-        session.data['visited'].append(page)
+        # A second visit from the same session
         download_file_(node=self.node, fid=self.fid)
 
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, self.fid), db=self.db)
@@ -96,9 +117,7 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters('download:{0}:{1}:{2}'.format(self.node, self.fid, self.vid), db=self.db)
         assert_equal(count, (1, 1))
 
-        page = 'download:{0}:{1}:{2}'.format(self.node, self.fid, self.vid)
-
-        session.data['visited'].append(page)
+        # A second visit from the same session
         download_file_version_(node=self.node, fid=self.fid, vid=self.vid)
 
         count = analytics.get_basic_counters('download:{0}:{1}:{2}'.format(self.node, self.fid, self.vid), db=self.db)
@@ -116,6 +135,80 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters(page, db=self.db)
         assert_equal(count, (3, 5))
 
+    def test_get_basic_counters_many(self):
+        collection = self.db['pagecounters']
+        collection.update({'_id': 'node:abc'}, {'$inc': {'total': 5, 'unique': 3}}, True, False)
+        collection.update({'_id': 'node:def'}, {'$inc': {'total': 2, 'unique': 1}}, True, False)
+
+        counts = analytics.get_basic_counters_many(['node:abc', 'node:def', 'node:ghi'], db=self.db)
+        assert_equal(counts, {
+            'node:abc': (3, 5),
+            'node:def': (1, 2),
+            'node:ghi': (None, None),
+        })
+
+    @mock.patch('framework.analytics.counter_buffer', CounterBuffer(mock.Mock(), flush_interval=3600))
+    @mock.patch.object(CounterBuffer, '_ensure_thread', mock.Mock())
+    def test_get_basic_counters_memoized_in_request(self):
+        page = 'node:' + str(self.node._id)
+        collection = self.db['pagecounters']
+        collection.update({'_id': page}, {'$inc': {'total': 1, 'unique': 1}}, True, False)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (1, 1))
+
+        # Writes that bypass update_counter are not seen until the next request
+        collection.update({'_id': page}, {'$inc': {'total': 1, 'unique': 1}}, True, False)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (1, 1))
+
+        # Buffered increments are added to memoized counters
+        analytics.update_counter(page, db=self.db)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (2, 2))
+
+        # Memoized counters are read again once increments are written
+        analytics.counter_buffer.get_client = lambda: self.db.connection
+        analytics.flush_counters()
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (3, 3))
+
+    def test_unique_visits_tracked_with_filters(self):
+        page = 'node:' + str(self.node._id)
+        analytics.update_counter(page, db=self.db)
+        analytics.update_counter(page, db=self.db)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (1, 2))
+        assert_true(isinstance(session.data['visited'], basestring))
+        assert_in(page, PageFilter.load(session.data['visited']))
+        assert_in(page, PageFilter.load(session.data['visited_by_date']['pages']))
+
+    def test_counters_by_date(self):
+        page = 'node:' + str(self.node._id)
+        analytics.update_counter(page, db=self.db)
+        analytics.update_counter(page, db=self.db)
+        today = datetime.utcnow().date()
+        assert_equal(analytics.get_counters_by_date(page, today, today, db=self.db), [(today, 1, 2)])
+
+        analytics.flush_counters()
+        assert_equal(analytics.get_counters_by_date(page, today, today, db=self.db), [(today, 1, 2)])
+        record = self.db['pagecounters'].find_one({'_id': page})
+        assert_equal((record['unique'], record['total']), (1, 2))
+        assert_not_in('date', record)
+
+    def test_counters_by_date_range(self):
+        page = 'node:abc12'
+        buckets = self.db[analytics.PAGE_BUCKETS]
+        for day in (date(2014, 12, 31), date(2015, 1, 1), date(2015, 1, 15), date(2015, 3, 1)):
+            buckets.update(
+                {'_id': analytics.get_bucket_id(page, day), 'key': page, 'month': day.strftime('%Y/%m')},
+                {'$inc': {'date.{0}.total'.format(day.strftime('%d')): day.day}},
+                upsert=True,
+            )
+        counts = analytics.get_counters_by_date(page, date(2015, 1, 1), date(2015, 2, 28), db=self.db)
+        assert_equal(counts, [(date(2015, 1, 1), 0, 1), (date(2015, 1, 15), 0, 15)])
+
+    def test_legacy_visited_list(self):
+        page = 'node:' + str(self.node._id)
+        session.data['visited'] = [page]
+        analytics.update_counter(page, db=self.db)
+        # The page was already visited according to the old list
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (0, 1))
+
     @unittest.skip('Reverted the fix for #2281. Unskip this once we use GUIDs for keys in the download counts collection')
     def test_update_counters_different_files(self):
         # Regression test for https://github.com/CenterForOpenScience/osf.io/issues/2281
@@ -133,9 +226,7 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, fid2), db=self.db)
         assert_equal(count, (None, None))
 
-        page = 'download:{0}:{1}'.format(self.node, fid1)
-
-        session.data['visited'].append(page)
+        # A second visit from the same session
         download_file_(node=self.node, fid=fid1)
         download_file_(node=self.node, fid=fid2)
 
@@ -143,3 +234,154 @@ class TestUpdateCounters(UpdateCountersTestCase):
         assert_equal(count, (1, 2))
         count = analytics.get_basic_counters('download:{0}:{1}'.format(self.node, fid2), db=self.db)
         assert_equal(count, (1, 1))
+
+
+class TestPageFilter(unittest.TestCase):
+
+    def test_add(self):
+        page_filter = PageFilter()
+        assert_true(page_filter.add('node:abc12'))
+        assert_false(page_filter.add('node:abc12'))
+        assert_in('node:abc12', page_filter)
+        assert_not_in('node:def34', page_filter)
+
+    def test_unicode_pages(self):
+        page_filter = PageFilter()
+        assert_true(page_filter.add(u'download:abc12:mag\xedc'))
+        assert_in(u'download:abc12:mag\xedc', page_filter)
+
+    def test_dump_and_load(self):
+        page_filter = PageFilter()
+        page_filter.add('node:abc12')
+        loaded = PageFilter.load(page_filter.dump())
+        assert_in('node:abc12', loaded)
+        assert_not_in('node:def34', loaded)
+
+    def test_load_list(self):
+        loaded = PageFilter.load(['node:abc12', 'node:def34'])
+        assert_in('node:abc12', loaded)
+        assert_in('node:def34', loaded)
+
+    def test_size_is_fixed(self):
+        page_filter = PageFilter()
+        size = len(page_filter.dump())
+        for index in range(1000):
+            page_filter.add('node:{0}'.format(index))
+        assert_equal(len(page_filter.dump()), size)
+
+    def test_few_false_positives(self):
+        page_filter = PageFilter()
+        for index in range(500):
+            page_filter.add('download:abc12:{0}'.format(index))
+        false_positives = sum(
+            'download:def34:{0}'.format(index) in page_filter
+            for index in range(10000)
+        )
+        assert_less(false_positives, 100)
+
+
+class TestCounterBuffer(UpdateCountersTestCase):
+
+    def setUp(self):
+        super(TestCounterBuffer, self).setUp()
+        self.buffer = CounterBuffer(lambda: self.db.connection, flush_interval=3600, max_pending=1000)
+        self.patcher = mock.patch('framework.analytics.counter_buffer', self.buffer)
+        self.patcher.start()
+        # Flushes are run by the tests rather than a thread
+        self.thread_patcher = mock.patch.object(self.buffer, '_ensure_thread')
+        self.thread_patcher.start()
+        self.collection = self.db['pagecounters']
+
+    def tearDown(self):
+        self.thread_patcher.stop()
+        self.patcher.stop()
+        super(TestCounterBuffer, self).tearDown()
+
+    def _failing_client(self):
+        collection = mock.Mock(update=mock.Mock(side_effect=Exception))
+        return mock.MagicMock(**{'__getitem__.return_value.__getitem__.return_value': collection})
+
+    def test_counts_preserved(self):
+        pages = ['node:abc{0}'.format(index) for index in range(5)]
+        for index, page in enumerate(pages):
+            for _ in range(index + 1):
+                analytics.update_counter(page, db=self.db)
+
+        # Nothing written yet, but the process sees its own increments
+        assert_equal(self.collection.find({'_id': {'$in': pages}}).count(), 0)
+        assert_equal(analytics.get_basic_counters(pages[2], db=self.db), (1, 3))
+
+        analytics.flush_counters()
+
+        assert_equal(self.buffer.stats()['pending'], 0)
+        for index, page in enumerate(pages):
+            record = self.collection.find_one({'_id': page})
+            assert_equal(record['total'], index + 1)
+            assert_equal(record['unique'], 1)
+            assert_equal(analytics.get_basic_counters(page, db=self.db), (1, index + 1))
+
+    def test_flush_adds_to_existing_counts(self):
+        page = 'node:abc12'
+        self.collection.update({'_id': page}, {'$inc': {'total': 5, 'unique': 3}}, True, False)
+        analytics.update_counter(page, db=self.db)
+        analytics.update_counter(page, db=self.db)
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (4, 7))
+        analytics.flush_counters()
+        assert_equal(analytics.get_basic_counters(page, db=self.db), (4, 7))
+
+    def test_add_never_writes(self):
+        self.buffer.flush_interval = 0
+        analytics.update_counter('node:abc12', db=self.db)
+        assert_equal(self.buffer.stats()['pending'], 2)
+        assert_equal(self.collection.find({'_id': 'node:abc12'}).count(), 0)
+        assert_true(self.buffer._ensure_thread.called)
+
+    def test_wake_flusher_when_too_many_pending(self):
+        # Each view increments the document of the page and its bucket
+        self.buffer.max_pending = 6
+        for index in range(2):
+            analytics.update_counter('node:abc{0}'.format(index), db=self.db)
+        assert_false(self.buffer._wake.is_set())
+        analytics.update_counter('node:abc2', db=self.db)
+        assert_true(self.buffer._wake.is_set())
+        assert_equal(self.buffer.stats()['pending'], 6)
+
+    def test_flusher_thread_writes_when_idle(self):
+        self.buffer.flush_interval = 0.01
+        analytics.update_counter('node:abc12', db=self.db)
+        CounterBuffer._ensure_thread(self.buffer)
+        for _ in range(100):
+            if self.buffer.stats()['flushes']:
+                break
+            time.sleep(0.05)
+        assert_equal(self.buffer.stats()['pending'], 0)
+        assert_equal(self.collection.find_one({'_id': 'node:abc12'})['total'], 1)
+        self.buffer.flush_interval = 3600
+
+    def test_flushes_with_own_client(self):
+        client = analytics._get_flush_client()
+        assert_is(analytics._get_flush_client(), client)
+        assert_is_not(client, handlers._get_default_client())
+        assert_is_not(client, self.db.connection)
+
+    def test_failed_writes_stay_pending(self):
+        analytics.update_counter('node:abc12', db=self.db)
+        with mock.patch.object(self.buffer, 'get_client', self._failing_client):
+            self.buffer.flush()
+        assert_equal(self.buffer.stats()['pending'], 2)
+        analytics.flush_counters()
+        assert_equal(self.collection.find_one({'_id': 'node:abc12'})['total'], 1)
+
+    def test_flush_forgets_fields(self):
+        analytics.update_counter('node:abc12', db=self.db)
+        assert_equal(len(self.buffer._fields), 2)
+        analytics.flush_counters()
+        assert_equal(self.buffer._fields, {})
+
+    def test_failed_writes_keep_fields(self):
+        self.buffer.add(self.collection.full_name, 'bucket', {'total': 1}, fields={'page': 'node:abc12'})
+        with mock.patch.object(self.buffer, 'get_client', self._failing_client):
+            self.buffer.flush()
+        assert_equal(self.buffer._fields, {(self.collection.full_name, 'bucket'): {'page': 'node:abc12'}})
+        self.buffer.flush()
+        assert_equal(self.collection.find_one({'_id': 'bucket'})['page'], 'node:abc12')
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
-import unittest
+import time
+import smtpd
+import socket
+import asyncore
 import smtplib
+import unittest
+import threading
 
+import mock
 from nose.tools import *  # PEP8 asserts
 
-from framework.email.tasks import send_email
+from framework.email.pool import SMTPConnectionPool, SMTPSession
+from framework.email.tasks import send_email, send_emails
 from website import settings
 
 # Check if local mail server is running
@@ -27,5 +34,108 @@ class TestEmail(unittest.TestCase):
                                  message="<h1>Greetings!</h1>", ttls=False, login=False))
 
 
+class DebuggingServer(smtpd.SMTPServer):
+    """In-process SMTP server that records connections and messages."""
+
+    def __init__(self):
+        smtpd.SMTPServer.__init__(self, ('localhost', 0), None)
+        self.connections = 0
+        self.messages = []
+
+    @property
+    def address(self):
+        return 'localhost:{0}'.format(self.socket.getsockname()[1])
+
+    def handle_accept(self):
+        self.connections += 1
+        smtpd.SMTPServer.handle_accept(self)
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        self.messages.append((mailfrom, rcpttos, data))
+
+
+class TestSMTPConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = DebuggingServer()
+        self.thread = threading.Thread(target=asyncore.loop, kwargs={'timeout': 0.01})
+        self.thread.daemon = True
+        self.thread.start()
+        self.pool = SMTPConnectionPool(max_size=1, max_idle=60, max_messages=3)
+        self.config = (self.server.address, None, None, False, False)
+
+    def tearDown(self):
+        self.pool.close()
+        asyncore.close_all()
+        self.thread.join(1)
+
+    def messages(self, count):
+        return [
+            ('foo@bar.com', ['user{0}@quux.com'.format(i)], 'Subject: {0}\n\nHello'.format(i))
+            for i in range(count)
+        ]
+
+    def wait_for(self, count):
+        deadline = time.time() + 2
+        while len(self.server.messages) < count and time.time() < deadline:
+            time.sleep(0.01)
+        assert_equal(len(self.server.messages), count)
+
+    def test_messages_share_a_session(self):
+        assert_equal(self.pool.send(self.config, self.messages(2)), 2)
+        assert_equal(self.pool.send(self.config, self.messages(1)), 1)
+        self.wait_for(3)
+        assert_equal(self.server.connections, 1)
+        assert_equal(self.pool.stats()['created'], 1)
+
+    def test_session_replaced_after_max_messages(self):
+        assert_equal(self.pool.send(self.config, self.messages(5)), 5)
+        self.wait_for(5)
+        assert_equal(self.pool.stats()['created'], 2)
+
+    def test_reconnects_when_session_is_lost(self):
+        self.pool.send(self.config, self.messages(1))
+        # Simulate the server dropping the idle connection
+        self.pool._idle[self.config][0].smtp.sock.shutdown(socket.SHUT_RDWR)
+        assert_equal(self.pool.send(self.config, self.messages(1)), 1)
+        self.wait_for(2)
+        assert_equal(self.pool.stats()['created'], 2)
+
+    def test_refused_messages_are_skipped(self):
+        smtp = mock.Mock()
+        smtp.sendmail.side_effect = [
+            smtplib.SMTPRecipientsRefused({'user0@quux.com': (550, 'No such user')}),
+            {},
+        ]
+        with mock.patch.object(self.pool, 'connect', return_value=SMTPSession(smtp)):
+            assert_equal(self.pool.send(self.config, self.messages(2)), 1)
+            with assert_raises(smtplib.SMTPRecipientsRefused):
+                smtp.sendmail.side_effect = smtplib.SMTPRecipientsRefused({})
+                self.pool.send(self.config, self.messages(1), skip_refused=False)
+
+    def test_idle_session_checked_before_reuse(self):
+        self.pool.max_idle = 0
+        self.pool.send(self.config, self.messages(1))
+        session = self.pool._idle[self.config][0]
+        with mock.patch.object(session.smtp, 'noop', return_value=(250, 'OK')) as mock_noop:
+            assert_is(self.pool.checkout(self.config), session)
+        assert_true(mock_noop.called)
+
+    @mock.patch('framework.email.tasks.settings.USE_EMAIL', True)
+    def test_send_emails_task(self):
+        with mock.patch('framework.email.tasks.smtp_pool', self.pool):
+            sent = send_emails(
+                [
+                    {'from_addr': 'foo@bar.com', 'to_addr': 'baz@quux.com', 'subject': 'one', 'message': 'Hello'},
+                    {'from_addr': 'foo@bar.com', 'to_addr': 'qux@quux.com', 'subject': 'two', 'message': 'Hi', 'mimetype': 'plain'},
+                ],
+                ttls=False, login=False, mail_server=self.server.address,
+            )
+        assert_equal(sent, 2)
+        self.wait_for(2)
+        assert_equal(self.server.connections, 1)
+        assert_equal([message[1] for message in self.server.messages], [['baz@quux.com'], ['qux@quux.com']])
+
+
 if __name__ == '__main__':
     unittest.main()
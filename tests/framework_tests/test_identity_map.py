@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from nose.tools import *  # noqa (PEP8 asserts)
+
+from framework.auth import User
+from framework.mongo import query_counter
+
+from tests.base import OsfTestCase
+from tests.factories import UserFactory, ProjectFactory
+
+
+class TestIdentityMap(OsfTestCase):
+
+    def setUp(self):
+        super(TestIdentityMap, self).setUp()
+        self.users = [UserFactory() for _ in range(3)]
+        User._clear_caches()
+
+    def test_load_returns_same_instance_without_query(self):
+        first = User.load(self.users[0]._id)
+        with query_counter() as query_count:
+            second = User.load(self.users[0]._id)
+        assert_is(first, second)
+        assert_equal(query_count(), 0)
+
+    def test_load_many_uses_single_query(self):
+        keys = [user._id for user in self.users]
+        with query_counter() as query_count:
+            loaded = User.load_many(keys)
+        assert_equal(query_count(), 1)
+        assert_equal([user._id for user in loaded], keys)
+
+    def test_load_many_skips_loaded_and_missing_keys(self):
+        User.load(self.users[0]._id)
+        keys = [user._id for user in self.users] + ['notauser']
+        with query_counter() as query_count:
+            loaded = User.load_many(keys)
+            User.load_many(keys[:-1])
+        assert_equal(query_count(), 1)
+        assert_equal(len(loaded), 3)
+
+    def test_remove_evicts_schema(self):
+        user = User.load(self.users[0]._id)
+        User.remove_one(user)
+        assert_is_none(User.load(self.users[0]._id))
+
+    def test_visible_contributors_query_budget(self):
+        project = ProjectFactory()
+        for user in self.users:
+            project.add_contributor(user, save=True)
+        User._clear_caches()
+        with query_counter() as query_count:
+            contributors = project.visible_contributors
+        assert_equal(query_count(), 1)
+        assert_equal(len(contributors), 4)
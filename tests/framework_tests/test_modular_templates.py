@@ -7,6 +7,8 @@ import json
 import unittest
 import os
 
+import mock
+
 import flask
 from lxml.html import fragment_fromstring
 import werkzeug.wrappers
@@ -16,6 +18,9 @@ from framework.routing import (
     Renderer, JSONRenderer, WebRenderer,
     render_mako_string,
 )
+from framework.routing.embeds import preprocess_mod_meta
+
+from nose.tools import *  # noqa
 
 from tests.base import AppTestCase, OsfTestCase
 
@@ -319,6 +324,84 @@ class WebRendererTemplateTestCase(OsfTestCase):
         )
 
 
+class SinglePassRenderingTestCase(OsfTestCase):
+
+    def test_preprocess_mod_meta(self):
+        source = u"""<p>before</p>
+<div class="a" mod-meta='{
+    "tpl": "${tpl}"
+}'></div>"""
+        result = preprocess_mod_meta(source)
+        assert_not_in('mod-meta', result.replace('_mod_meta', ''))
+        assert_in('<%call expr="_mod_meta.embed(tag=\'div\')">', result)
+        assert_in('<%def name="open_tag()"><div class="a"></%def>', result)
+        assert_in('"tpl": "${tpl}"', result)
+        assert_in('<%namespace name="_mod_meta" module="framework.routing.embeds"/>', result)
+        # Line numbers are preserved
+        assert_equal(source.count('\n'), result.count('\n'))
+
+    def test_preprocess_without_mod_meta(self):
+        source = u'<div class="a">${b}</div>'
+        assert_equal(preprocess_mod_meta(source), source)
+
+    def test_embed_wrapped_in_element(self):
+        self.app.app.preprocess_request()
+        r = WebRenderer(
+            'nested_parent_wrapped.html',
+            render_mako_string,
+            template_dir=TEMPLATES_PATH,
+        )
+        resp = r({'wrapper_class': 'wrapper', 'name': 'child'})
+        assert_in('<div class="wrapper"><p>child template content</p></div>', resp.data)
+        assert_not_in('mod-meta', resp.data)
+
+    def test_nested_templates_reparsing(self):
+        self.app.app.preprocess_request()
+        r = WebRenderer(
+            'nested_parent.html',
+            render_mako_string,
+            template_dir=TEMPLATES_PATH,
+            single_pass=False,
+        )
+        resp = r({})
+        assert_in('child template content', resp.data)
+        assert_not_in('mod-meta', resp.data)
+
+    def test_embed_data_fetched_before_rendering(self):
+        r = WebRenderer(
+            'nested_child.html',
+            render_mako_string,
+            template_dir=TEMPLATES_PATH,
+        )
+        metas = [
+            {'tpl': 'nested_child.html', 'uri': '/one/'},
+            None,
+            {'tpl': 'nested_child.html'},
+            {'tpl': 'nested_child.html', 'uri': '/two/'},
+        ]
+        with mock.patch('framework.routing.call_url') as mock_call_url:
+            mock_call_url.side_effect = lambda uri, view_kwargs: {'uri': uri}
+            results = r.fetch_embeds(metas)
+        assert_equal(
+            results,
+            [({'uri': '/one/'}, None), (None, None), ({}, None), ({'uri': '/two/'}, None)],
+        )
+
+    def test_embed_data_fetched_in_parallel(self):
+        self.app.app.preprocess_request()
+        r = WebRenderer(
+            'nested_child.html',
+            render_mako_string,
+            template_dir=TEMPLATES_PATH,
+        )
+        metas = [{'tpl': 'nested_child.html', 'uri': '/{0}/'.format(i)} for i in range(4)]
+        with mock.patch('framework.routing.settings.MOD_META_FETCH_WORKERS', 2):
+            with mock.patch('framework.routing.call_url') as mock_call_url:
+                mock_call_url.side_effect = lambda uri, view_kwargs: {'uri': uri}
+                results = r.fetch_embeds(metas)
+        assert_equal(results, [({'uri': meta['uri']}, None) for meta in metas])
+
+
 class JSONRendererEncoderTestCase(unittest.TestCase):
 
     def test_encode_custom_class(self):
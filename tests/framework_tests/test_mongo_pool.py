@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import unittest
+
+import mock
+from nose.tools import *  # noqa (PEP8 asserts)
+
+from framework.mongo.pool import MongoClientPool, PoolTimeout
+
+
+class TestMongoClientPool(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = mock.Mock(side_effect=lambda: mock.Mock())
+        self.pool = MongoClientPool(self.factory, max_size=2, wait_timeout=0.05)
+
+    def test_clients_created_lazily(self):
+        assert_equal(self.factory.call_count, 0)
+        self.pool.checkout()
+        assert_equal(self.factory.call_count, 1)
+
+    def test_checked_in_client_is_reused(self):
+        client = self.pool.checkout()
+        self.pool.checkin(client)
+        assert_is(self.pool.checkout(), client)
+        assert_equal(self.pool.stats()['created'], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        self.pool.checkout()
+        self.pool.checkout()
+        with assert_raises(PoolTimeout):
+            self.pool.checkout()
+        assert_equal(self.pool.stats()['timeouts'], 1)
+
+    def test_waiting_checkout_receives_returned_client(self):
+        self.pool.wait_timeout = 5
+        first = self.pool.checkout()
+        self.pool.checkout()
+        timer = threading.Timer(0.05, self.pool.checkin, args=(first, ))
+        timer.start()
+        assert_is(self.pool.checkout(), first)
+        timer.join()
+
+    def test_discard_closes_client_and_frees_slot(self):
+        client = self.pool.checkout()
+        self.pool.checkout()
+        self.pool.discard(client)
+        assert_true(client.close.called)
+        assert_is_not(self.pool.checkout(), client)
+        assert_equal(self.pool.stats()['created'], 3)
+
+    def test_failed_connection_frees_slot(self):
+        self.factory.side_effect = ValueError
+        with assert_raises(ValueError):
+            self.pool.checkout()
+        assert_equal(self.pool.stats()['size'], 0)
+
+    def test_stats(self):
+        client = self.pool.checkout()
+        self.pool.checkout()
+        self.pool.checkin(client)
+        stats = self.pool.stats()
+        assert_equal(stats['checked_out'], 1)
+        assert_equal(stats['idle'], 1)
+        assert_equal(stats['size'], 2)
+        assert_equal(stats['created'], 2)
+        assert_equal(stats['waiting'], 0)
+
+    @mock.patch('framework.mongo.pool.os.getpid')
+    def test_pool_reset_after_fork(self, mock_getpid):
+        mock_getpid.return_value = os.getpid()
+        pool = MongoClientPool(self.factory, max_size=2)
+        client = pool.checkout()
+        pool.checkin(client)
+        mock_getpid.return_value = -1
+        assert_is_not(pool.checkout(), client)
+        assert_false(client.close.called)
+        assert_equal(pool.stats()['created'], 1)
@@ -1,10 +1,18 @@
+import datetime
+
+import mock
+import itsdangerous
 from nose.tools import *
 
+from framework import sessions
+from framework.auth import cas, logout
 from framework.sessions import utils
+from framework.sessions.cache import TTLCache
 from tests import factories
-from tests.base import DbTestCase
+from tests.base import DbTestCase, OsfTestCase, test_app
 from website.models import User
 from website.models import Session
+from website import settings
 
 
 class SessionUtilsTestCase(DbTestCase):
@@ -34,3 +42,203 @@ class SessionUtilsTestCase(DbTestCase):
 
         utils.remove_sessions_for_user(self.user)
         assert_equal(1, Session.find().count())
+
+
+class TestTTLCache(object):
+
+    def test_get_set(self):
+        cache = TTLCache(max_size=10, ttl=60)
+        assert_is_none(cache.get('key'))
+        cache.set('key', 'value')
+        assert_equal(cache.get('key'), 'value')
+        assert_equal((cache.hits, cache.misses), (1, 1))
+
+    def test_expired_items_are_dropped(self):
+        cache = TTLCache(max_size=10, ttl=0)
+        cache.set('key', 'value')
+        assert_is_none(cache.get('key'))
+        assert_equal(len(cache), 0)
+
+    def test_oldest_item_is_evicted(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        for key in ['a', 'b', 'c']:
+            cache.set(key, key)
+        assert_is_none(cache.get('a'))
+        assert_equal(cache.get('c'), 'c')
+
+    def test_discard(self):
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set('key', 'value')
+        cache.discard('key')
+        cache.discard('missing')
+        assert_is_none(cache.get('key'))
+
+
+class TestSessionDirtyTracking(DbTestCase):
+
+    def tearDown(self):
+        super(TestSessionDirtyTracking, self).tearDown()
+        Session.remove()
+
+    def test_new_session_is_dirty(self):
+        assert_true(Session().is_dirty)
+
+    def test_saved_session_is_clean(self):
+        session = factories.SessionFactory()
+        assert_false(session.is_dirty)
+        assert_false(session.needs_save)
+
+    def test_nested_change_is_dirty(self):
+        session = factories.SessionFactory(data={'oauth_states': {}})
+        session.data['oauth_states']['github'] = {'state': 'abc'}
+        assert_true(session.is_dirty)
+        session.save()
+        assert_false(session.is_dirty)
+
+    def test_stale_session_needs_save(self):
+        session = factories.SessionFactory()
+        Session._storage[0].store.update(
+            {'_id': session._id},
+            {'$set': {'date_modified': datetime.datetime.utcnow() - datetime.timedelta(
+                seconds=settings.SESSION_TOUCH_INTERVAL + 1
+            )}},
+        )
+        Session._clear_caches()
+        session = Session.load(session._id)
+        assert_false(session.is_dirty)
+        assert_true(session.needs_save)
+
+    def test_expiration_index(self):
+        indexes = Session._storage[0].store.index_information()
+        index = indexes['date_modified_1']
+        assert_equal(index['expireAfterSeconds'], settings.SESSION_EXPIRATION)
+
+
+class TestLoadSaveSession(OsfTestCase):
+
+    def setUp(self):
+        super(TestLoadSaveSession, self).setUp()
+        self.user = factories.UserFactory()
+        self.session = factories.SessionFactory(user=self.user)
+        self.cookie = sessions.get_cookie_value(self.session._id)
+
+    def tearDown(self):
+        super(TestLoadSaveSession, self).tearDown()
+        Session.remove()
+
+    def test_load_session(self):
+        Session._clear_caches()
+        session = sessions.load_session(self.cookie)
+        assert_equal(session.data['auth_user_id'], self.user._id)
+        assert_false(session.is_dirty)
+
+    def test_load_session_bad_signature(self):
+        with assert_raises(itsdangerous.BadSignature):
+            sessions.load_session('{0}.forged'.format(self.session._id))
+
+    def test_after_request_skips_clean_session(self):
+        sessions.set_session(sessions.load_session(self.cookie))
+        with mock.patch.object(Session, 'save_if_unchanged') as mock_save:
+            sessions.after_request(None)
+        assert_false(mock_save.called)
+
+    def test_after_request_saves_changed_session(self):
+        session = sessions.load_session(self.cookie)
+        sessions.set_session(session)
+        del session.data['auth_user_id']
+        sessions.after_request(None)
+        Session._clear_caches()
+        assert_not_in('auth_user_id', Session.load(self.session._id).data)
+
+    def test_stale_session_is_not_written_back(self):
+        with test_app.test_request_context():
+            stale = sessions.load_session(self.cookie)
+        # Logged out by another request after `stale` was loaded
+        with test_app.test_request_context():
+            Session._clear_caches()
+            session = Session.load(self.session._id)
+            del session.data['auth_user_id']
+            assert_true(sessions.save_session(session))
+        with test_app.test_request_context():
+            stale.data['visited'] = 'page'
+            sessions.set_session(stale)
+            sessions.after_request(None)
+        Session._clear_caches()
+        stored = Session.load(self.session._id)
+        assert_not_in('auth_user_id', stored.data)
+        assert_not_in('visited', stored.data)
+
+    def test_create_session_after_concurrent_write(self):
+        with test_app.test_request_context():
+            session = sessions.load_session(self.cookie)
+            sessions.set_session(session)
+            Session._storage[0].store.update(
+                {'_id': self.session._id},
+                {'$set': {'data.other': 'value', 'date_modified': datetime.datetime.utcnow()}},
+            )
+            sessions.create_session(None, data={'auth_user_fullname': 'New Name'})
+        Session._clear_caches()
+        stored = Session.load(self.session._id)
+        assert_equal(stored.data['other'], 'value')
+        assert_equal(stored.data['auth_user_fullname'], 'New Name')
+
+
+class TestAuthCache(OsfTestCase):
+
+    def setUp(self):
+        super(TestAuthCache, self).setUp()
+        self.user = factories.AuthUserFactory()
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_verify_access_token_asks_cas_once(self, mock_profile):
+        mock_profile.return_value = cas.CasResponse(authenticated=True, user=self.user._id)
+        assert_equal(sessions.verify_access_token('token'), self.user)
+        assert_equal(sessions.verify_access_token('token'), self.user)
+        assert_equal(mock_profile.call_count, 1)
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_rejected_access_token_is_not_cached(self, mock_profile):
+        mock_profile.return_value = cas.CasResponse(authenticated=False)
+        assert_is_none(sessions.verify_access_token('token'))
+        assert_is_none(sessions.verify_access_token('token'))
+        assert_equal(mock_profile.call_count, 2)
+
+    @mock.patch('framework.auth.core.check_password_hash')
+    def test_verify_credentials_checks_password_once(self, mock_check):
+        mock_check.return_value = True
+        for _ in range(2):
+            user = sessions.verify_credentials(self.user.username, 'password')
+            assert_equal(user, self.user)
+        assert_equal(mock_check.call_count, 1)
+
+    def test_invalid_credentials_are_not_cached(self):
+        assert_false(sessions.verify_credentials(self.user.username, 'wrong'))
+        assert_equal(len(sessions.auth_cache), 0)
+
+    def test_cache_does_not_hold_credentials(self):
+        sessions.verify_credentials(self.user.username, 'password')
+        key = sessions.get_auth_cache_key('basic', self.user.username, 'password')
+        assert_not_in('password', key)
+        assert_equal(sessions.auth_cache.get(key)[0], self.user._id)
+
+    def test_password_change_invalidates(self):
+        sessions.verify_credentials(self.user.username, 'password')
+        self.user.set_password('new password')
+        assert_equal(len(sessions.auth_cache), 0)
+        self.user.save()
+        assert_false(sessions.verify_credentials(self.user.username, 'password'))
+
+    def test_password_change_in_other_process_invalidates(self):
+        key = sessions.get_auth_cache_key('basic', self.user.username, 'password')
+        sessions.cache_user(key, self.user)
+        self.user.password = 'changed elsewhere'
+        self.user.save()
+        assert_is_none(sessions.get_cached_user(key))
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_logout_invalidates(self, mock_profile):
+        mock_profile.return_value = cas.CasResponse(authenticated=True, user=self.user._id)
+        sessions.verify_access_token('token')
+        sessions.session.data['auth_user_id'] = self.user._id
+        logout()
+        assert_equal(len(sessions.auth_cache), 0)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+from mako.lookup import TemplateLookup
+from nose.tools import *  # noqa (PEP8 asserts)
+
+from framework.routing.templates import TemplateRegistry, trusted_lookup, safe_lookup
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_PATH = os.path.join(HERE, 'templates')
+
+
+class TestTemplateRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = TemplateRegistry({True: trusted_lookup, False: safe_lookup})
+        self.path = os.path.join(TEMPLATES_PATH, 'nested_child.html')
+
+    def test_template_compiled_once(self):
+        template = self.registry.get_template(self.path)
+        assert_is(self.registry.get_template(self.path), template)
+        assert_equal(self.registry.stats(), {'templates': 1, 'hits': 1, 'misses': 1})
+
+    def test_keyed_by_trust(self):
+        trusted = self.registry.get_template(self.path, trust=True)
+        safe = self.registry.get_template(self.path, trust=False)
+        assert_is_not(trusted, safe)
+        assert_equal(self.registry.stats()['misses'], 2)
+
+    def test_escaping_by_trust(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'escape.mako')
+            with open(path, 'w') as fp:
+                fp.write('${value}')
+            assert_equal(self.registry.get_template(path, trust=True).render(value='<b>'), '<b>')
+            assert_equal(self.registry.get_template(path, trust=False).render(value='<b>'), '&lt;b&gt;')
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_missing_template(self):
+        with assert_raises(IOError):
+            self.registry.get_template(os.path.join(TEMPLATES_PATH, 'not_a_real_file.html'))
+
+    def test_mtime_checked_in_debug_mode_only(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'changing.mako')
+            with open(path, 'w') as fp:
+                fp.write('old')
+            assert_equal(self.registry.get_template(path).render(), 'old')
+            with open(path, 'w') as fp:
+                fp.write('new')
+            mtime = os.path.getmtime(path) + 10
+            os.utime(path, (mtime, mtime))
+            with mock.patch('framework.routing.templates.settings.DEBUG_MODE', False):
+                assert_equal(self.registry.get_template(path).render(), 'old')
+            with mock.patch('framework.routing.templates.settings.DEBUG_MODE', True):
+                assert_equal(self.registry.get_template(path).render(), 'new')
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_string_templates(self):
+        template = self.registry.get_string_template(u'Hello ${name}')
+        assert_is(self.registry.get_string_template(u'Hello ${name}'), template)
+        assert_equal(template.render(name='Fred'), u'Hello Fred')
+
+    def test_precompile(self):
+        count = self.registry.precompile([TEMPLATES_PATH], pattern='*.html')
+        templates = [name for name in os.listdir(TEMPLATES_PATH) if name.endswith('.html')]
+        assert_equal(count, len(templates) * 2)
+        self.registry.get_template(self.path, trust=False)
+        assert_equal(self.registry.stats()['hits'], 1)
+
+    def test_inherit_and_include_relative_to_lookup(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(tempdir, 'pages'))
+            files = {
+                'base.mako': '<main>${self.body()}</main>',
+                'pages/base.mako': 'wrong base',
+                'pages/page.mako': '<%inherit file="base.mako"/><%include file="pages/part.mako"/>',
+                'pages/part.mako': 'part',
+            }
+            for name, content in files.items():
+                with open(os.path.join(tempdir, name), 'w') as fp:
+                    fp.write(content)
+            lookup = TemplateLookup(directories=[tempdir])
+            registry = TemplateRegistry({True: lookup})
+            template = registry.get_template(os.path.join(tempdir, 'pages', 'page.mako'))
+            assert_equal(template.uri, 'pages:page.mako')
+            assert_equal(template.render().strip(), '<main>part</main>')
+        finally:
+            shutil.rmtree(tempdir)
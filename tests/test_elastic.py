@@ -9,7 +9,9 @@ from framework.auth.core import Auth
 from website import settings
 import website.search.search as search
 from website.search import elastic_search
+from website.search import indexing
 from website.search.util import build_query
+from website.search_migration import migrate as migrate_module
 from website.search_migration.migrate import migrate
 
 from tests.base import OsfTestCase
@@ -30,10 +32,20 @@ class SearchTestCase(OsfTestCase):
         super(SearchTestCase, self).tearDown()
         search.delete_index(elastic_search.INDEX)
         search.create_index(elastic_search.INDEX)
+        self.enqueue_patcher.stop()
+        settings.ELASTIC_REFRESH_ON_WRITE = self._original_refresh_on_write
     def setUp(self):
         super(SearchTestCase, self).setUp()
         elastic_search.INDEX = TEST_INDEX
         settings.ELASTIC_INDEX = TEST_INDEX
+        # Index synchronously and make changes searchable immediately
+        self._original_refresh_on_write = settings.ELASTIC_REFRESH_ON_WRITE
+        settings.ELASTIC_REFRESH_ON_WRITE = True
+        self.enqueue_patcher = mock.patch(
+            'website.search.indexing.enqueue_task',
+            side_effect=lambda signature: signature(),
+        )
+        self.enqueue_patcher.start()
         search.delete_index(elastic_search.INDEX)
         search.create_index(elastic_search.INDEX)
 
@@ -670,6 +682,42 @@ class TestUserSearchResults(SearchTestCase):
             assert_in(name, were_starfleet_names)
 
 
+class TestIndexQueue(OsfTestCase):
+
+    def setUp(self):
+        super(TestIndexQueue, self).setUp()
+        self.project = ProjectFactory(is_public=True)
+        indexing.get_queue().remove()
+
+    @mock.patch('website.search.indexing.enqueue_task')
+    def test_repeated_updates_coalesce(self, mock_enqueue):
+        indexing.enqueue_node(self.project, index=TEST_INDEX)
+        indexing.enqueue_node(self.project, index=TEST_INDEX)
+        assert_equal(indexing.get_queue().count(), 1)
+        assert_equal(indexing.get_queue_stats()['pending'], 1)
+
+    @mock.patch('website.search.search.bulk_update_nodes')
+    @mock.patch('website.search.indexing.enqueue_task')
+    def test_flush_sends_one_bulk_request(self, mock_enqueue, mock_bulk):
+        component = NodeFactory(parent=self.project, is_public=True)
+        indexing.enqueue_node(self.project, index=TEST_INDEX)
+        indexing.enqueue_node(component, index=TEST_INDEX)
+        assert_equal(indexing.flush_queue(), 2)
+        assert_equal(mock_bulk.call_count, 1)
+        nodes = mock_bulk.call_args[0][0]
+        assert_equal({node._id for node in nodes}, {self.project._id, component._id})
+        assert_equal(indexing.get_queue_stats(), {'pending': 0, 'lag': 0})
+
+    @mock.patch('website.search.search.bulk_update_nodes')
+    @mock.patch('website.search.indexing.enqueue_task')
+    def test_flush_batches(self, mock_enqueue, mock_bulk):
+        component = NodeFactory(parent=self.project, is_public=True)
+        indexing.enqueue_node(self.project, index=TEST_INDEX)
+        indexing.enqueue_node(component, index=TEST_INDEX)
+        indexing.flush_queue(batch_size=1)
+        assert_equal(mock_bulk.call_count, 2)
+
+
 class TestSearchExceptions(OsfTestCase):
     # Verify that the correct exception is thrown when the connection is lost
 
@@ -745,3 +793,52 @@ class TestSearchMigration(SearchTestCase):
             var = self.es.indices.get_aliases()
             assert_equal(var[settings.ELASTIC_INDEX + '_v{}'.format(n + 1)]['aliases'].keys()[0], settings.ELASTIC_INDEX)
             assert not var.get(settings.ELASTIC_INDEX + '_v{}'.format(n))
+
+    def test_migration_indexes_documents(self):
+        migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        assert_equal(len(query(self.project.title)['results']), 1)
+        assert_equal(len(query_user(self.user.fullname)['results']), 1)
+        assert_is_none(migrate_module.get_checkpoint(settings.ELASTIC_INDEX))
+
+    def test_migration_skips_nodes_that_cannot_be_indexed(self):
+        archiving = ProjectFactory(title='Archiving project', creator=self.user, is_public=True)
+        should_be_indexed = elastic_search.node_should_be_indexed
+        with mock.patch.object(
+            elastic_search, 'node_should_be_indexed',
+            side_effect=lambda node: node._id != archiving._id and should_be_indexed(node),
+        ):
+            migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
+        assert_equal(len(query(self.project.title)['results']), 1)
+        assert_equal(len(query(archiving.title)['results']), 0)
+        assert_is_none(migrate_module.get_checkpoint(settings.ELASTIC_INDEX))
+
+    def test_resume_skips_migrated_models(self):
+        new_index = migrate_module.set_up_index(settings.ELASTIC_INDEX)
+        migrate_module.save_checkpoint(settings.ELASTIC_INDEX, index=new_index, node_done=True)
+        with mock.patch.object(migrate_module, 'build_actions', wraps=migrate_module.build_actions) as mock_build:
+            migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app, resume=True)
+        assert_true(all(args[0][0] == 'user' for args, _ in mock_build.call_args_list))
+        var = self.es.indices.get_aliases()
+        assert_equal(var[new_index]['aliases'].keys()[0], settings.ELASTIC_INDEX)
+
+
+class TestIdChunks(OsfTestCase):
+
+    def test_iter_id_chunks(self):
+        projects = [ProjectFactory(is_public=True) for _ in range(5)]
+        collection = projects[0]._storage[0].store
+        chunks = list(migrate_module.iter_id_chunks(
+            collection, migrate_module.NODE_QUERY, chunk_size=2,
+        ))
+        ids = [_id for chunk in chunks for _id in chunk]
+        assert_equal(ids, sorted(project._id for project in projects))
+        assert_true(all(len(chunk) <= 2 for chunk in chunks))
+
+    def test_iter_id_chunks_after(self):
+        projects = [ProjectFactory(is_public=True) for _ in range(3)]
+        collection = projects[0]._storage[0].store
+        ids = sorted(project._id for project in projects)
+        chunks = migrate_module.iter_id_chunks(
+            collection, migrate_module.NODE_QUERY, after=ids[0], chunk_size=10,
+        )
+        assert_equal(list(chunks), [ids[1:]])
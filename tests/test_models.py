@@ -17,6 +17,7 @@ from modularodm.exceptions import ValidationError, ValidationValueError, Validat
 
 
 from framework.analytics import get_total_activity_count
+from framework.mongo import query_counter
 from framework.exceptions import PermissionsError
 from framework.auth import User, Auth
 from framework.sessions.model import Session
@@ -1432,6 +1433,25 @@ class TestNode(OsfTestCase):
             addon_count
         )
 
+    def test_get_addons_loads_each_settings_model_once(self):
+        self.node.add_addon('github', self.consolidate_auth)
+        Node._clear_caches()
+        node = Node.load(self.node._id)
+        with query_counter() as query_count:
+            addons = node.get_addons()
+            node.get_addon_names()
+            node.get_addon('github')
+        assert_in('github', [addon.config.short_name for addon in addons])
+        assert_equal(query_count(), len(addons))
+
+    def test_get_addons_excludes_deleted_addons(self):
+        self.node.delete_addon('wiki', self.consolidate_auth)
+        Node._clear_caches()
+        node = Node.load(self.node._id)
+        assert_not_in('wiki', node.get_addon_names())
+        assert_is_none(node.get_addon('wiki'))
+        assert_true(node.get_addon('wiki', deleted=True).deleted)
+
     def test_url(self):
         assert_equal(
             self.node.url,
@@ -2309,7 +2329,7 @@ class TestProject(OsfTestCase):
     def test_is_admin_parent_parent_write(self):
         user = UserFactory()
         node = NodeFactory(parent=self.project, creator=user)
-        self.project.set_permissions(self.project.creator, ['read', 'write'])
+        self.project.set_permissions(self.project.creator, ['read', 'write'], save=True)
         assert_false(node.is_admin_parent(self.project.creator))
 
     def test_has_permission_read_parent_admin(self):
@@ -2359,7 +2379,7 @@ class TestProject(OsfTestCase):
     def test_can_view_parent_write(self):
         user = UserFactory()
         node = NodeFactory(parent=self.project, creator=user)
-        self.project.set_permissions(self.project.creator, ['read', 'write'])
+        self.project.set_permissions(self.project.creator, ['read', 'write'], save=True)
         assert_false(node.can_view(Auth(user=self.project.creator)))
         assert_false(node.can_edit(Auth(user=self.project.creator)))
 
@@ -2399,6 +2419,51 @@ class TestProject(OsfTestCase):
         assert_equal(child1.parents, [self.project])
         assert_equal(child2.parents, [child1, self.project])
 
+    def test_ancestor_ids(self):
+        child1 = ProjectFactory(parent=self.project)
+        child2 = ProjectFactory(parent=child1)
+        assert_equal(self.project.ancestor_ids, [])
+        assert_equal(child1.ancestor_ids, [self.project._id])
+        assert_equal(child2.ancestor_ids, [self.project._id, child1._id])
+
+    def test_ancestor_admin_ids_updated_on_permission_change(self):
+        user = UserFactory()
+        child = NodeFactory(parent=self.project, creator=user)
+        grandchild = NodeFactory(parent=child, creator=user)
+        assert_in(self.project.creator._id, grandchild.ancestor_admin_ids)
+        self.project.set_permissions(self.project.creator, ['read', 'write'], save=True)
+        assert_not_in(self.project.creator._id, grandchild.ancestor_admin_ids)
+        assert_in(user._id, grandchild.ancestor_admin_ids)
+
+    def test_reader_ids(self):
+        user = UserFactory()
+        child = NodeFactory(parent=self.project, creator=user)
+        assert_equal(self.project.reader_ids, [self.project.creator._id])
+        assert_equal(child.reader_ids, sorted([user._id, self.project.creator._id]))
+        reader = UserFactory()
+        child.add_contributor(reader, permissions=['read'], save=True)
+        assert_in(reader._id, child.reader_ids)
+        child.remove_contributor(reader, auth=Auth(user))
+        assert_not_in(reader._id, child.reader_ids)
+
+    def test_reader_ids_updated_on_parent_permission_change(self):
+        user = UserFactory()
+        child = NodeFactory(parent=self.project, creator=user)
+        self.project.set_permissions(self.project.creator, ['read', 'write'], save=True)
+        assert_equal(child.reader_ids, [user._id])
+
+    def test_root(self):
+        child1 = ProjectFactory(parent=self.project)
+        child2 = ProjectFactory(parent=child1)
+        assert_equal(self.project.root, self.project)
+        assert_equal(child2.root, self.project)
+
+    def test_pointer_does_not_change_ancestry(self):
+        pointed = ProjectFactory()
+        self.project.add_pointer(pointed, auth=self.consolidate_auth)
+        assert_equal(pointed.ancestor_ids, [])
+        assert_equal(pointed.ancestor_admin_ids, [])
+
     def test_admin_contributor_ids(self):
         assert_equal(self.project.admin_contributor_ids, set())
         child1 = ProjectFactory(parent=self.project)
@@ -2620,19 +2685,19 @@ class TestProject(OsfTestCase):
     def test_get_recent_logs(self):
         # Add some logs
         for _ in range(5):
-            self.project.logs.append(NodeLogFactory())
+            self.project.add_log('file_added', {'node': self.project._id}, auth=self.consolidate_auth)
         # Expected logs appears
         assert_equal(
             self.project.get_recent_logs(3),
-            list(reversed(self.project.logs)[:3])
+            self.project.logs[::-1][:3]
         )
         assert_equal(
             self.project.get_recent_logs(),
-            list(reversed(self.project.logs))
+            self.project.logs[::-1]
         )
 
     def test_date_modified(self):
-        self.project.logs.append(NodeLogFactory())
+        self.project.add_log('file_added', {'node': self.project._id}, auth=self.consolidate_auth)
         assert_equal(self.project.date_modified, self.project.logs[-1].date)
         assert_not_equal(self.project.date_modified, self.project.date_created)
 
@@ -2959,6 +3024,24 @@ class TestForkNode(OsfTestCase):
         # Compare fork to original
         self._cmp_fork_original(self.user, fork_date, fork, self.project)
 
+    def test_fork_ancestry(self):
+        component = NodeFactory(creator=self.user, parent=self.project)
+        subcomponent = NodeFactory(creator=self.user, parent=component)
+        fork = self.project.fork_node(auth=self.consolidate_auth)
+        forked_component = fork.nodes[0]
+        forked_subcomponent = forked_component.nodes[0]
+        assert_equal(fork.ancestor_ids, [])
+        assert_equal(forked_component.ancestor_ids, [fork._id])
+        assert_equal(forked_subcomponent.ancestor_ids, [fork._id, forked_component._id])
+        # Original lineage is untouched
+        assert_equal(subcomponent.ancestor_ids, [self.project._id, component._id])
+
+    def test_fork_component_is_top_level(self):
+        component = NodeFactory(creator=self.user, parent=self.project)
+        fork = component.fork_node(auth=self.consolidate_auth)
+        assert_equal(fork.ancestor_ids, [])
+        assert_equal(fork.parents, [])
+
     def test_fork_private_children(self):
         """Tests that only public components are created
 
@@ -3255,6 +3338,144 @@ class TestRegisterNode(OsfTestCase):
     def test_registration_list(self):
         assert_in(self.registration._id, self.project.node__registrations)
 
+class TestNodeLogHistory(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeLogHistory, self).setUp()
+        self.user = UserFactory()
+        self.auth = Auth(user=self.user)
+        self.project = ProjectFactory(creator=self.user)
+
+    def test_add_log(self):
+        count = self.project.log_count
+        log = self.project.add_log('file_added', {'node': self.project._id}, auth=self.auth)
+        assert_equal(log.owner, self.project)
+        assert_equal(self.project.log_count, count + 1)
+        assert_equal(self.project.last_log, log)
+        assert_equal(self.project.logs[-1], log)
+        assert_equal(len(self.project.logs), self.project.log_count)
+
+    def test_fork_shares_history(self):
+        logs = self.project.logs
+        fork = self.project.fork_node(self.auth)
+        self.project.add_log('file_added', {'node': self.project._id}, auth=self.auth)
+        assert_equal(fork.shared_logs_from, self.project)
+        assert_equal(fork.logs[:-1], logs)
+        assert_equal(fork.logs[-1].action, NodeLog.NODE_FORKED)
+        assert_equal(fork.logs[-1].owner, fork)
+        assert_equal(fork.log_count, len(logs) + 1)
+        assert_equal(fork.last_log, fork.logs[-1])
+
+    def test_registration_of_fork_shares_history(self):
+        fork = self.project.fork_node(self.auth)
+        registration = RegistrationFactory(project=fork)
+        fork_log = fork.add_log('file_added', {'node': fork._id}, auth=self.auth)
+        project_log = self.project.add_log('file_added', {'node': self.project._id}, auth=self.auth)
+        assert_equal(
+            registration.get_log_sources(),
+            [
+                (registration._id, None),
+                (fork._id, registration.shared_logs_until),
+                (self.project._id, fork.shared_logs_until),
+            ],
+        )
+        assert_in(fork.logs[0], registration.logs)
+        assert_not_in(fork_log, registration.logs)
+        assert_not_in(project_log, registration.logs)
+
+    def test_get_logs_queryset(self):
+        logs = [
+            self.project.add_log('file_added', {'node': self.project._id}, auth=self.auth)
+            for _ in range(3)
+        ]
+        queryset = self.project.get_logs_queryset(after=logs[0]._id, before=logs[2]._id)
+        assert_equal(list(queryset), [logs[1]])
+
+    def test_logs_read_only(self):
+        with assert_raises(AttributeError):
+            self.project.logs = []
+
+    def test_load_node_with_embedded_log_ids(self):
+        # Nodes not migrated yet by scripts/migrate_node_logs.py
+        log_ids = [log._id for log in self.project.logs]
+        Node._storage[0].store.update({'_id': self.project._id}, {'$set': {'logs': log_ids}})
+        Node._clear_caches()
+        project = Node.load(self.project._id)
+        assert_equal([log._id for log in project.logs], log_ids)
+        project.save()
+        assert_equal(Node._storage[0].store.find_one({'_id': project._id})['logs'], log_ids)
+
+
+class TestAggregateLogs(OsfTestCase):
+
+    def setUp(self):
+        super(TestAggregateLogs, self).setUp()
+        self.user = UserFactory()
+        self.auth = Auth(user=self.user)
+        self.project = ProjectFactory(creator=self.user, is_public=True)
+        self.component = NodeFactory(parent=self.project, creator=self.user, is_public=True)
+        self.subcomponent = NodeFactory(parent=self.component, creator=self.user, is_public=True)
+
+    def test_log_feed_ids(self):
+        log = self.subcomponent.add_log('file_added', {'node': self.subcomponent._id}, auth=self.auth)
+        assert_equal(log.feed_ids, [self.project._id, self.component._id, self.subcomponent._id])
+
+    def test_aggregate_logs(self):
+        log = self.subcomponent.add_log('file_added', {'node': self.subcomponent._id}, auth=self.auth)
+        logs = list(self.project.get_aggregate_logs_queryset(self.auth))
+        assert_equal(logs[0], log)
+        assert_equal(
+            set(logs),
+            set(self.project.logs).union(self.component.logs, self.subcomponent.logs),
+        )
+        assert_not_in(self.project.logs[0], self.component.get_aggregate_logs_queryset(self.auth))
+
+    def test_aggregate_logs_before(self):
+        logs = list(self.project.get_aggregate_logs_queryset(self.auth))
+        assert_equal(
+            list(self.project.get_aggregate_logs_queryset(self.auth, before=logs[1]._id)),
+            logs[2:],
+        )
+
+    def test_aggregate_logs_exclude_hidden_components(self):
+        self.component.set_privacy('private', auth=self.auth)
+        logs = self.project.get_aggregate_logs_queryset(Auth())
+        assert_not_in(self.component.logs[0], logs)
+        assert_not_in(self.subcomponent.logs[0], logs)
+        assert_in(self.project.logs[0], logs)
+        assert_in(self.component.logs[0], self.project.get_aggregate_logs_queryset(self.auth))
+
+    def test_aggregate_logs_private_link(self):
+        self.component.set_privacy('private', auth=self.auth)
+        link = PrivateLinkFactory()
+        link.nodes.append(self.component)
+        link.save()
+        logs = self.project.get_aggregate_logs_queryset(Auth(private_key=link.key))
+        assert_in(self.component.logs[0], logs)
+
+    def test_aggregate_logs_after_move(self):
+        other = ProjectFactory(creator=self.user)
+        self.project.nodes.remove(self.component)
+        self.project.save()
+        other.nodes.append(self.component)
+        other.save()
+        log = self.subcomponent.logs[0]
+        assert_in(log, other.get_aggregate_logs_queryset(self.auth))
+        assert_not_in(log, self.project.get_aggregate_logs_queryset(self.auth))
+
+    def test_aggregate_logs_of_fork(self):
+        fork = self.project.fork_node(self.auth)
+        forked_component = fork.nodes[0]
+        logs = list(fork.get_aggregate_logs_queryset(self.auth))
+        assert_in(self.project.logs[0], logs)
+        assert_in(forked_component.logs[-1], logs)
+        assert_in(self.component.logs[0], forked_component.get_aggregate_logs_queryset(self.auth))
+
+    def test_aggregate_logs_of_registration(self):
+        registration = RegistrationFactory(project=self.project)
+        assert_in(self.project.logs[0], registration.get_aggregate_logs_queryset(self.auth))
+
+
 class TestNodeLog(OsfTestCase):
 
     def setUp(self):
@@ -1068,9 +1068,9 @@ class TestSendEmails(OsfTestCase):
     #     )
     #     assert_true(email_transactional.called)
 
-    @mock.patch('website.mails.send_mail')
-    def test_send_email_transactional(self, send_mail):
-        # assert that send_mail is called with the correct person & args
+    @mock.patch('website.mails.send_mails')
+    def test_send_email_transactional(self, send_mails):
+        # assert that send_mails is called with the correct person & args
         subscribed_users = [self.user._id]
         timestamp = datetime.datetime.utcnow().replace(tzinfo=pytz.utc)
 
@@ -1106,8 +1106,8 @@ class TestSendEmails(OsfTestCase):
             localized_timestamp=emails.localize_timestamp(timestamp, self.user),
         )
 
-        assert_true(send_mail.called)
-        send_mail.assert_called_with(
+        assert_true(send_mails.called)
+        send_mails.assert_called_once_with([mails.render_mail(
             to_addr=self.user.username,
             mail=mails.TRANSACTIONAL,
             mimetype='html',
@@ -1117,7 +1117,7 @@ class TestSendEmails(OsfTestCase):
             subject=subject,
             message=message,
             url=self.project.absolute_url + 'settings/',
-        )
+        )])
 
     def test_send_email_digest_creates_digest_notification(self):
         subscribed_users = [factories.UserFactory()._id]
@@ -1232,7 +1232,7 @@ class TestSendDigest(OsfTestCase):
             node_lineage=[project._id]
         )
         d2.save()
-        user_groups = group_digest_notifications_by_user()
+        user_groups = list(group_digest_notifications_by_user())
         expected = [{
                     u'user_id': user._id,
                     u'info': [{
@@ -1251,11 +1251,33 @@ class TestSendDigest(OsfTestCase):
         }]
 
         assert_equal(len(user_groups), 2)
-        assert_equal(user_groups, expected)
+        assert_equal(user_groups, sorted(expected, key=lambda group: group['user_id']))
+
+    def test_group_digest_notifications_by_user_streams_in_user_order(self):
+        users = [factories.UserFactory() for _ in range(3)]
+        project = factories.ProjectFactory()
+        timestamp = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+        for i in range(2):
+            for user in reversed(users):
+                factories.NotificationDigestFactory(
+                    user_id=user._id,
+                    timestamp=timestamp + datetime.timedelta(minutes=i),
+                    message='Hello {0}'.format(i),
+                    node_lineage=[project._id]
+                ).save()
+        user_groups = group_digest_notifications_by_user()
+        assert_false(isinstance(user_groups, list))
+        user_groups = list(user_groups)
+        assert_equal(
+            [group['user_id'] for group in user_groups],
+            sorted(user._id for user in users),
+        )
+        for group in user_groups:
+            assert_equal([info['message'] for info in group['info']], ['Hello 0', 'Hello 1'])
 
     @mock.patch('scripts.send_digest.remove_sent_digest_notifications')
-    @mock.patch('website.mails.send_mail')
-    def test_send_digest_called_with_correct_args(self, mock_send_mail, mock_callback):
+    @mock.patch('website.mails.send_mails')
+    def test_send_digest_called_with_correct_args(self, mock_send_mails, mock_callback):
         d = factories.NotificationDigestFactory(
             user_id=factories.UserFactory()._id,
             timestamp=datetime.datetime.utcnow(),
@@ -1263,26 +1285,52 @@ class TestSendDigest(OsfTestCase):
             node_lineage=[factories.ProjectFactory()._id]
         )
         d.save()
-        user_groups = group_digest_notifications_by_user()
+        user_groups = list(group_digest_notifications_by_user())
         send_digest(user_groups)
-        assert_true(mock_send_mail.called)
-        assert_equals(mock_send_mail.call_count, len(user_groups))
+        assert_equals(mock_send_mails.call_count, 1)
+
+        args, kwargs = mock_send_mails.call_args
+        messages = args[0]
+        assert_equal(len(messages), len(user_groups))
 
         last_user_index = len(user_groups) - 1
         user = User.load(user_groups[last_user_index]['user_id'])
-        digest_notification_ids = [message['_id'] for message in user_groups[last_user_index]['info']]
-
-        args, kwargs = mock_send_mail.call_args
-
-        assert_equal(kwargs['to_addr'], user.username)
-        assert_equal(kwargs['mimetype'], 'html')
-        assert_equal(kwargs['mail'], mails.DIGEST)
-        assert_equal(kwargs['name'], user.fullname)
+        digest_notification_ids = [
+            message['_id']
+            for group in user_groups
+            for message in group['info']
+        ]
         message = group_messages_by_node(user_groups[last_user_index]['info'])
-        assert_equal(kwargs['message'], message)
+        assert_equal(
+            messages[last_user_index],
+            mails.render_mail(
+                to_addr=user.username,
+                mimetype='html',
+                mail=mails.DIGEST,
+                name=user.fullname,
+                message=message,
+            )
+        )
         assert_equal(kwargs['callback'],
                 mock_callback.si(digest_notification_ids=digest_notification_ids))
 
+    @mock.patch('scripts.send_digest.remove_sent_digest_notifications')
+    @mock.patch('website.mails.send_mails')
+    def test_send_digest_in_batches(self, mock_send_mails, mock_callback):
+        for _ in range(3):
+            factories.NotificationDigestFactory(
+                user_id=factories.UserFactory()._id,
+                timestamp=datetime.datetime.utcnow(),
+                message='Hello',
+                node_lineage=[factories.ProjectFactory()._id]
+            ).save()
+        with mock.patch('scripts.send_digest.settings.MAIL_BATCH_SIZE', 2):
+            send_digest(group_digest_notifications_by_user())
+        assert_equal(
+            [len(call[0][0]) for call in mock_send_mails.call_args_list],
+            [2, 1],
+        )
+
     def test_remove_sent_digest_notifications(self):
         d = factories.NotificationDigestFactory(
             user_id=factories.UserFactory()._id,
@@ -1295,4 +1343,20 @@ class TestSendDigest(OsfTestCase):
         with assert_raises(NoResultsFound):
             NotificationDigest.find_one(Q('_id', 'eq', digest_id))
 
+    def test_remove_sent_digest_notifications_removes_only_given_ids(self):
+        digests = [
+            factories.NotificationDigestFactory(
+                user_id=factories.UserFactory()._id,
+                timestamp=datetime.datetime.utcnow(),
+                message='Hello',
+                node_lineage=[factories.ProjectFactory()._id]
+            )
+            for _ in range(3)
+        ]
+        remove_sent_digest_notifications(digest_notification_ids=[digests[0]._id, digests[1]._id])
+        assert_equal(
+            [digest._id for digest in NotificationDigest.find(Q('_id', 'in', [d._id for d in digests]))],
+            [digests[2]._id],
+        )
+
             
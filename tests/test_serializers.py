@@ -7,7 +7,6 @@ from tests.factories import (
     UserFactory,
     RegistrationFactory,
     NodeFactory,
-    NodeLogFactory,
     FolderFactory,
 )
 from tests.base import OsfTestCase
@@ -157,9 +156,7 @@ class TestNodeLogSerializers(OsfTestCase):
 
     def test_serialize_log(self):
         node = NodeFactory(category='hypothesis')
-        log = NodeLogFactory(params={'node': node._primary_key})
-        node.logs.append(log)
-        node.save()
+        log = node.add_log('file_added', {'node': node._primary_key}, auth=Auth(node.creator))
         d = serialize_log(log)
         assert_equal(d['action'], log.action)
         assert_equal(d['node']['node_type'], 'component')
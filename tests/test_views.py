@@ -58,7 +58,7 @@ from tests.base import (
 )
 from tests.factories import (
     UserFactory, ProjectFactory, WatchConfigFactory,
-    NodeFactory, NodeLogFactory, AuthUserFactory, UnregUserFactory,
+    NodeFactory, AuthUserFactory, UnregUserFactory,
     RegistrationFactory, CommentFactory, PrivateLinkFactory, UnconfirmedUserFactory, DashboardFactory, FolderFactory,
     ProjectWithAddonFactory, MockAddonNodeSettings,
 )
@@ -651,12 +651,11 @@ class TestProjectViews(OsfTestCase):
     def test_get_logs(self, *mock_commands):
         # Add some logs
         for _ in range(5):
-            self.project.logs.append(
-                NodeLogFactory(
-                    user=self.user1,
-                    action='file_added',
-                    params={'node': self.project._id}
-                )
+            self.project.add_log(
+                auth=self.consolidate_auth1,
+                action='file_added',
+                params={'node': self.project._id},
+                save=False,
             )
         self.project.save()
         url = self.project.api_url_for('get_logs')
@@ -712,12 +711,11 @@ class TestProjectViews(OsfTestCase):
     def test_get_logs_with_count_param(self):
         # Add some logs
         for _ in range(5):
-            self.project.logs.append(
-                NodeLogFactory(
-                    user=self.user1,
-                    action='file_added',
-                    params={'node': self.project._id}
-                )
+            self.project.add_log(
+                auth=self.consolidate_auth1,
+                action='file_added',
+                params={'node': self.project._id},
+                save=False,
             )
         self.project.save()
         url = self.project.api_url_for('get_logs')
@@ -728,15 +726,22 @@ class TestProjectViews(OsfTestCase):
         assert_equal(res.json['page'], 0)
         assert_equal(res.json['pages'], 3)
 
+    def test_get_logs_invalid_count(self):
+        url = self.project.api_url_for('get_logs')
+        for invalid_input in ['-1', '0', 'abc', '101']:
+            for params in [{'count': invalid_input}, {'count': invalid_input, 'cursor': ''}]:
+                res = self.app.get(url, params, auth=self.auth, expect_errors=True)
+                assert_equal(res.status_code, 400)
+                assert_equal(res.json['message_long'], 'Invalid value for "count".')
+
     def test_get_logs_defaults_to_ten(self):
         # Add some logs
         for _ in range(12):
-            self.project.logs.append(
-                NodeLogFactory(
-                    user=self.user1,
-                    action='file_added',
-                    params={'node': self.project._id}
-                )
+            self.project.add_log(
+                auth=self.consolidate_auth1,
+                action='file_added',
+                params={'node': self.project._id},
+                save=False,
             )
         self.project.save()
         url = self.project.api_url_for('get_logs')
@@ -750,12 +755,11 @@ class TestProjectViews(OsfTestCase):
     def test_get_more_logs(self):
         # Add some logs
         for _ in range(12):
-            self.project.logs.append(
-                NodeLogFactory(
-                    user=self.user1,
-                    action="file_added",
-                    params={"node": self.project._id}
-                )
+            self.project.add_log(
+                auth=self.consolidate_auth1,
+                action='file_added',
+                params={'node': self.project._id},
+                save=False,
             )
         self.project.save()
         url = self.project.api_url_for('get_logs')
@@ -766,6 +770,24 @@ class TestProjectViews(OsfTestCase):
         assert_equal(res.json['page'], 1)
         assert_equal(res.json['pages'], 2)
 
+    def test_get_logs_by_cursor(self):
+        for _ in range(12):
+            self.project.add_log(
+                auth=self.consolidate_auth1,
+                action='file_added',
+                params={'node': self.project._id}
+            )
+        url = self.project.api_url_for('get_logs')
+        res = self.app.get(url, {'cursor': ''}, auth=self.auth)
+        assert_equal(len(res.json['logs']), 10)
+        assert_not_in('total', res.json)
+        assert_true(res.json['next'])
+        res = self.app.get(url, {'cursor': res.json['next']}, auth=self.auth)
+        # 1 project create log, 1 add contributor log, then 12 generated logs
+        assert_equal(len(res.json['logs']), 4)
+        assert_is_none(res.json['next'])
+        assert_equal(res.json['logs'][-1]['action'], 'project_created')
+
     def test_logs_private(self):
         """Add logs to a public project, then to its private component. Get
         the ten most recent logs; assert that ten logs are returned and that
@@ -2473,7 +2495,7 @@ class TestWatchViews(OsfTestCase):
         project = ProjectFactory()
         # Add some logs
         for _ in range(12):
-            project.logs.append(NodeLogFactory(user=self.user, action="file_added"))
+            project.add_log('file_added', {'node': project._id}, auth=self.consolidate_auth, save=False)
         project.save()
         watch_cfg = WatchConfigFactory(node=project)
         self.user.watch(watch_cfg)
@@ -2487,7 +2509,7 @@ class TestWatchViews(OsfTestCase):
         project = ProjectFactory()
         # Add some logs
         for _ in range(12):
-            project.logs.append(NodeLogFactory(user=self.user, action="file_added"))
+            project.add_log('file_added', {'node': project._id}, auth=self.consolidate_auth, save=False)
         project.save()
         watch_cfg = WatchConfigFactory(node=project)
         self.user.watch(watch_cfg)
@@ -2496,7 +2518,7 @@ class TestWatchViews(OsfTestCase):
         res = self.app.get(url, auth=self.auth)
         assert_equal(len(res.json['logs']), 10)
         # 1 project create log then 12 generated logs
-        assert_equal(res.json['total'], 12 + 1)
+        assert_not_in('total', res.json)
         assert_equal(res.json['page'], 0)
         assert_equal(res.json['pages'], 2)
         assert_equal(res.json['logs'][0]['action'], 'file_added')
@@ -2505,7 +2527,7 @@ class TestWatchViews(OsfTestCase):
         project = ProjectFactory()
         # Add some logs
         for _ in range(12):
-            project.logs.append(NodeLogFactory(user=self.user, action="file_added"))
+            project.add_log('file_added', {'node': project._id}, auth=self.consolidate_auth, save=False)
         project.save()
         watch_cfg = WatchConfigFactory(node=project)
         self.user.watch(watch_cfg)
@@ -2515,11 +2537,31 @@ class TestWatchViews(OsfTestCase):
         res = self.app.get(url, {'page': page}, auth=self.auth)
         assert_equal(len(res.json['logs']), 3)
         # 1 project create log then 12 generated logs
-        assert_equal(res.json['total'], 12 + 1)
+        assert_not_in('total', res.json)
         assert_equal(res.json['page'], page)
         assert_equal(res.json['pages'], 2)
         assert_equal(res.json['logs'][0]['action'], 'file_added')
 
+    def test_get_watched_logs_by_cursor(self):
+        project = ProjectFactory()
+        fork = project.fork_node(auth=Auth(project.creator))
+        for _ in range(12):
+            project.add_log('file_added', {'node': project._id}, auth=Auth(project.creator))
+        for node in (project, fork):
+            self.user.watch(WatchConfigFactory(node=node))
+        self.user.save()
+        url = api_url_for('watched_logs_get')
+        res = self.app.get(url, {'cursor': ''}, auth=self.auth)
+        assert_equal(len(res.json['logs']), 10)
+        res = self.app.get(url, {'cursor': res.json['next']}, auth=self.auth)
+        # 12 generated logs, 1 project create log shared with the fork and
+        # 1 fork log
+        assert_equal(
+            [each['action'] for each in res.json['logs']],
+            ['file_added', 'file_added', 'node_forked', 'project_created'],
+        )
+        assert_is_none(res.json['next'])
+
     def test_get_more_watched_logs_invalid_page(self):
         project = ProjectFactory()
         watch_cfg = WatchConfigFactory(node=project)
@@ -7,11 +7,14 @@ import datetime as dt
 
 from pytz import utc
 from nose.tools import *  # flake8: noqa (PEP8 asserts)
+from modularodm import Q
+
 from framework.auth import Auth
 from framework.exceptions import HTTPError
 from tests.base import OsfTestCase
 from tests.factories import (UserFactory, ProjectFactory,
                              WatchConfigFactory)
+from website.models import NodeLog
 from website.views import paginate
 import math
 
@@ -24,8 +27,7 @@ class TestWatching(OsfTestCase):
         # add some log objects
         self.consolidate_auth = Auth(user=self.user)
         # Clear project logs
-        self.project.logs = []
-        self.project.save()
+        NodeLog.remove(Q('owner', 'eq', self.project._id))
         # A log added 100 days ago
         self.project.add_log(
             'project_created',
@@ -81,6 +83,23 @@ class TestWatching(OsfTestCase):
         log_ids = list(self.user.get_recent_log_ids(since=since))
         assert_equal(len(log_ids), 2)
 
+    def test_get_recent_log_ids_before(self):
+        self._watch_project(self.project)
+        since = dt.datetime.utcnow().replace(tzinfo=utc) - dt.timedelta(days=101)
+        log_ids = list(self.user.get_recent_log_ids(since=since, before=self.last_log._id))
+        assert_equal(log_ids, [self.project.logs[0]._id])
+
+    def test_get_recent_log_ids_merges_watched_nodes(self):
+        fork = self.project.fork_node(self.consolidate_auth)
+        other = ProjectFactory(creator=self.user)
+        for node in (self.project, fork, other):
+            self._watch_project(node)
+        log_ids = list(self.user.get_recent_log_ids())
+        # Logs shared by the project and its fork are only listed once
+        expected = set(self.project.logs).union(fork.logs, other.logs)
+        expected = sorted((log._id for log in expected), reverse=True)
+        assert_equal(log_ids, expected)
+
     def test_get_daily_digest_log_ids(self):
         self._watch_project(self.project)
         day_log_ids = list(self.user.get_daily_digest_log_ids())
@@ -13,7 +13,7 @@ from modularodm.storage.base import KeyExistsException
 
 from framework.mongo import StoredObject
 from framework.mongo.utils import unique_on
-from framework.analytics import get_basic_counters
+from framework.analytics import get_basic_counters, get_basic_counters_many
 
 from website.addons.base import AddonNodeSettingsBase, GuidFile, StorageAddonBase
 from website.addons.osfstorage import utils
@@ -125,6 +125,10 @@ class OsfStorageFileNode(StoredObject):
                 child2
                 /
             grandchild1
+
+    `ancestor_ids` holds the ids of every folder above the node, so that its
+    lineage can be loaded with one query and its subtree found with one index
+    lookup. The ids are not kept in order; see `get_ancestors`.
     """
 
     _id = fields.StringField(primary=True, default=lambda: str(bson.ObjectId()))
@@ -133,6 +137,7 @@ class OsfStorageFileNode(StoredObject):
     name = fields.StringField(required=True, index=True)
     kind = fields.StringField(required=True, index=True)
     parent = fields.ForeignField('OsfStorageFileNode', index=True)
+    ancestor_ids = fields.StringField(list=True, index=True)
     versions = fields.ForeignField('OsfStorageFileVersion', list=True)
     node_settings = fields.ForeignField('OsfStorageNodeSettings', required=True, index=True)
 
@@ -218,24 +223,38 @@ class OsfStorageFileNode(StoredObject):
     def node(self):
         return self.node_settings.owner
 
+    @staticmethod
+    def get_ancestor_ids_under(parent):
+        """Return the `ancestor_ids` of a node placed under `parent`."""
+        if parent is None:
+            return []
+        return list(parent.ancestor_ids) + [parent._id]
+
+    def get_ancestors(self):
+        """Return the ancestors of this node, from the root down to its parent,
+        loaded with a single query. Ancestors are ordered by depth, as a move
+        does not preserve the order of `ancestor_ids`. Nodes whose
+        `ancestor_ids` were never backfilled fall back to following `parent`.
+        """
+        if self.ancestor_ids:
+            ancestors = self.__class__.load_many(self.ancestor_ids)
+            return sorted(ancestors, key=lambda ancestor: len(ancestor.ancestor_ids))
+        ancestors = []
+        current = self.parent
+        while current:
+            ancestors.append(current)
+            current = current.parent
+        return ancestors[::-1]
+
     def materialized_path(self):
-        """creates the full path to a the given filenode
-        Note: Possibly high complexity/ many database calls
-        USE SPARINGLY
+        """creates the full path to a the given filenode from the names of
+        its ancestors
         """
-        if not self.parent:
+        ancestors = self.get_ancestors()
+        if not ancestors:
             return '/'
-        # Note: ODM cache can be abused here
-        # for highly nested folders calling
-        # list(self.__class__.find(Q(nodesetting),Q(folder))
-        # may result in a massive increase in performance
-        def lineage():
-            current = self
-            while current:
-                yield current
-                current = current.parent
-
-        path = os.path.join(*reversed([x.name for x in lineage()]))
+
+        path = os.path.join(*[x.name for x in ancestors] + [self.name])
         if self.is_folder:
             return '/{}/'.format(path)
         return '/{}'.format(path)
@@ -260,24 +279,40 @@ class OsfStorageFileNode(StoredObject):
             name=name,
             kind=kind,
             parent=self,
+            ancestor_ids=self.get_ancestor_ids_under(self),
             node_settings=self.node_settings
         )
         if save:
             child.save()
         return child
 
+    def get_download_page(self, version=None):
+        """Return the key of the download counter of this file, or of one of
+        its versions.
+        """
+        parts = ['download', self.node._id, self._id]
+        if version is not None:
+            parts.append(version)
+        return ':'.join([format(part) for part in parts])
+
     def get_download_count(self, version=None):
         if self.is_folder:
             return None
 
-        parts = ['download', self.node._id, self._id]
-        if version is not None:
-            parts.append(version)
-        page = ':'.join([format(part) for part in parts])
-        _, count = get_basic_counters(page)
+        _, count = get_basic_counters(self.get_download_page(version))
 
         return count or 0
 
+    @staticmethod
+    def prefetch_download_counts(file_nodes):
+        """Fetch the download counts of `file_nodes` with a single query, so
+        that `get_download_count` (and thus `serialized`) reads them from the
+        request's counter memo instead of querying once per file.
+        """
+        pages = [each.get_download_page() for each in file_nodes if each.is_file]
+        if pages:
+            get_basic_counters_many(pages)
+
     @utils.must_be('file')
     def get_version(self, index=-1, required=False):
         try:
@@ -315,21 +350,47 @@ class OsfStorageFileNode(StoredObject):
         raise errors.VersionNotFoundError
 
     def delete(self, recurse=True):
-        trashed = OsfStorageTrashedFileNode()
-        trashed._id = self._id
-        trashed.name = self.name
-        trashed.kind = self.kind
-        trashed.parent = self.parent
-        trashed.versions = self.versions
-        trashed.node_settings = self.node_settings
-
-        trashed.save()
-
+        """Move this node, and its whole subtree if `recurse`, to the trashed
+        collection with one bulk insert and one bulk remove.
+        """
+        query = {'_id': self._id}
         if self.is_folder and recurse:
-            for child in self.children:
-                child.delete()
-
-        self.__class__.remove_one(self)
+            if self.ancestor_ids:
+                query = {'$or': [query, {'ancestor_ids': self._id}]}
+            else:
+                # Not backfilled (or a root); descendants may lack its id
+                query = {'_id': {'$in': [self._id] + self._find_descendant_ids()}}
+
+        collection = self._storage[0].store
+        records = list(collection.find(query))
+        OsfStorageTrashedFileNode._storage[0].store.insert([
+            {
+                key: record[key]
+                for key in OsfStorageTrashedFileNode._fields
+                if key in record
+            }
+            for record in records
+        ])
+
+        keys = [record['_id'] for record in records]
+        collection.remove({'_id': {'$in': keys}})
+        for key in keys:
+            self.__class__._clear_caches(key)
+
+    def _find_descendant_ids(self):
+        """Return the ids of every descendant of this folder by following
+        `parent`, one query per level. Only used for folders whose
+        `ancestor_ids` were never backfilled, as their descendants may not
+        hold their id (see scripts/osfstorage/migrate_ancestor_ids.py).
+        """
+        collection = self._storage[0].store
+        ids = []
+        folders = [self._id]
+        while folders:
+            records = list(collection.find({'parent': {'$in': folders}}, fields=['_id', 'kind']))
+            ids.extend(record['_id'] for record in records)
+            folders = [record['_id'] for record in records if record['kind'] == 'folder']
+        return ids
 
     def serialized(self, include_full=False):
         """Build Treebeard JSON for folder or file.
@@ -359,13 +420,73 @@ class OsfStorageFileNode(StoredObject):
         return self
 
     def _update_node_settings(self, recursive=True, save=True):
+        old_ancestor_ids = list(self.ancestor_ids)
         if self.parent is not None:
             self.node_settings = self.parent.node_settings
+        self.ancestor_ids = self.get_ancestor_ids_under(self.parent)
         if save:
             self.save()
-        if recursive and self.is_folder:
-            for child in self.children:
-                child._update_node_settings(save=save)
+            if recursive and self.is_folder:
+                self._update_descendants(old_ancestor_ids)
+
+    def _update_descendants(self, old_ancestor_ids):
+        """Bring the `node_settings` and `ancestor_ids` of every descendant in
+        line with this node after it was moved from under `old_ancestor_ids`.
+        All descendants share the ancestors of this node, so the subtree is
+        updated with at most two multi-updates whatever its size.
+        """
+        if not old_ancestor_ids:
+            # Not backfilled; descendants may not hold the id of this node
+            return self._update_descendants_by_parent()
+
+        collection = self._storage[0].store
+        query = {'ancestor_ids': self._id}
+        keys = [record['_id'] for record in collection.find(query, fields=['_id'])]
+        if not keys:
+            return
+
+        removed = [each for each in old_ancestor_ids if each not in self.ancestor_ids]
+        added = [each for each in self.ancestor_ids if each not in old_ancestor_ids]
+        # $pullAll and $push cannot modify the same field in a single update
+        if removed:
+            collection.update(query, {'$pullAll': {'ancestor_ids': removed}}, multi=True)
+        update = {'$set': {'node_settings': self.node_settings._id}}
+        if added:
+            update['$push'] = {'ancestor_ids': {'$each': added}}
+        collection.update(query, update, multi=True)
+
+        for key in keys:
+            self.__class__._clear_caches(key)
+
+    def _update_descendants_by_parent(self):
+        """Set the `node_settings` and `ancestor_ids` of every descendant by
+        following `parent`, with one multi-update per folder. Fallback of
+        `_update_descendants` for folders whose `ancestor_ids` were never
+        backfilled; this backfills the subtree as well.
+        """
+        collection = self._storage[0].store
+        keys = []
+        # Folders still to visit, with the ancestor ids of their children
+        folders = [(self._id, self.get_ancestor_ids_under(self))]
+        while folders:
+            folder_id, ancestor_ids = folders.pop()
+            query = {'parent': folder_id}
+            children = list(collection.find(query, fields=['_id', 'kind']))
+            if not children:
+                continue
+            collection.update(
+                query,
+                {'$set': {'node_settings': self.node_settings._id, 'ancestor_ids': ancestor_ids}},
+                multi=True,
+            )
+            keys.extend(child['_id'] for child in children)
+            folders.extend(
+                (child['_id'], ancestor_ids + [child['_id']])
+                for child in children if child['kind'] == 'folder'
+            )
+
+        for key in keys:
+            self.__class__._clear_caches(key)
 
     def __repr__(self):
         return '<{}(name={!r}, node_settings={!r})>'.format(
@@ -529,5 +650,6 @@ class OsfStorageTrashedFileNode(StoredObject):
     name = fields.StringField(required=True, index=True)
     kind = fields.StringField(required=True, index=True)
     parent = fields.ForeignField('OsfStorageFileNode', index=True)
+    ancestor_ids = fields.StringField(list=True, index=True)
     versions = fields.ForeignField('OsfStorageFileVersion', list=True)
     node_settings = fields.ForeignField('OsfStorageNodeSettings', required=True, index=True)
@@ -12,8 +12,10 @@ from website.addons.osfstorage.tests.utils import StorageTestCase
 
 import datetime
 
+from modularodm import Q
 from modularodm import exceptions as modm_errors
 
+from framework.mongo import query_counter
 
 from website.addons.osfstorage import utils
 from website.addons.osfstorage import model
@@ -314,6 +316,172 @@ class TestOsfstorageFileNode(StorageTestCase):
     def test_copy_folder_across_nodes(self):
         pass
 
+class TestOsfStorageFileTree(StorageTestCase):
+    """Lineage, moves and deletes on a deep and wide file tree."""
+
+    DEPTH = 6
+    WIDTH = 3
+
+    def setUp(self):
+        super(TestOsfStorageFileTree, self).setUp()
+        self.root = self.node_settings.root_node
+        # A chain of DEPTH folders, each holding WIDTH files and a side folder
+        # with WIDTH files of its own
+        self.chain = []
+        parent = self.root
+        for depth in range(self.DEPTH):
+            folder = parent.append_folder('level{0}'.format(depth))
+            side = folder.append_folder('side')
+            for index in range(self.WIDTH):
+                folder.append_file('file{0}'.format(index))
+                side.append_file('file{0}'.format(index))
+            self.chain.append(folder)
+            parent = folder
+        self.leaf = parent.append_file('leaf')
+
+    def subtree_ids(self, folder):
+        return [
+            each._id for each in model.OsfStorageFileNode.find(
+                Q('ancestor_ids', 'eq', folder._id)
+            )
+        ]
+
+    def test_ancestor_ids(self):
+        assert_equal(self.root.ancestor_ids, [])
+        assert_equal(
+            self.leaf.ancestor_ids,
+            [self.root._id] + [folder._id for folder in self.chain],
+        )
+
+    def test_subtree(self):
+        # Each level holds its files, a side folder with its files and the
+        # next level (the leaf under the last one)
+        per_level = 2 * self.WIDTH + 2
+        assert_equal(len(self.subtree_ids(self.chain[0])), self.DEPTH * per_level)
+
+    def test_materialized_path_single_query(self):
+        model.OsfStorageFileNode._clear_caches()
+        leaf = model.OsfStorageFileNode.load(self.leaf._id)
+        with query_counter() as count:
+            path = leaf.materialized_path()
+        assert_equal(count(), 1)
+        expected = '/' + '/'.join('level{0}'.format(depth) for depth in range(self.DEPTH)) + '/leaf'
+        assert_equal(path, expected)
+
+    def test_materialized_path_not_backfilled(self):
+        model.OsfStorageFileNode._storage[0].store.update(
+            {'_id': self.leaf._id},
+            {'$unset': {'ancestor_ids': True}},
+        )
+        model.OsfStorageFileNode._clear_caches()
+        leaf = model.OsfStorageFileNode.load(self.leaf._id)
+        assert_true(leaf.materialized_path().endswith('/level{0}/leaf'.format(self.DEPTH - 1)))
+
+    def test_delete_subtree(self):
+        folder = self.chain[2]
+        subtree = self.subtree_ids(folder)
+        count = model.OsfStorageFileNode.find().count()
+        tcount = model.OsfStorageTrashedFileNode.find().count()
+
+        folder.delete()
+
+        assert_equal(count - len(subtree) - 1, model.OsfStorageFileNode.find().count())
+        assert_equal(tcount + len(subtree) + 1, model.OsfStorageTrashedFileNode.find().count())
+        assert_is(model.OsfStorageFileNode.load(self.leaf._id), None)
+        trashed = model.OsfStorageTrashedFileNode.load(self.leaf._id)
+        assert_equal(trashed.name, 'leaf')
+        assert_equal(trashed.parent._id, self.chain[-1]._id)
+        # Nodes above the deleted folder are untouched
+        assert_is_not_none(model.OsfStorageFileNode.load(self.chain[1]._id))
+        assert_equal(len(self.chain[1].children), self.WIDTH + 1)
+
+    def unset_ancestor_ids(self):
+        """Make the tree look like it was created before `ancestor_ids`."""
+        model.OsfStorageFileNode._storage[0].store.update(
+            {},
+            {'$unset': {'ancestor_ids': True}},
+            multi=True,
+        )
+        model.OsfStorageFileNode._clear_caches()
+
+    def test_delete_subtree_not_backfilled(self):
+        subtree = self.subtree_ids(self.chain[2])
+        self.unset_ancestor_ids()
+        count = model.OsfStorageFileNode.find().count()
+
+        model.OsfStorageFileNode.load(self.chain[2]._id).delete()
+
+        assert_equal(count - len(subtree) - 1, model.OsfStorageFileNode.find().count())
+        assert_is(model.OsfStorageFileNode.load(self.leaf._id), None)
+        assert_is_not_none(model.OsfStorageTrashedFileNode.load(self.leaf._id))
+        assert_is_not_none(model.OsfStorageFileNode.load(self.chain[1]._id))
+
+    def test_delete_without_recurse(self):
+        self.chain[-1].delete(recurse=False)
+        assert_is(model.OsfStorageFileNode.load(self.chain[-1]._id), None)
+        assert_is_not_none(model.OsfStorageFileNode.load(self.leaf._id))
+
+    def test_move_subtree(self):
+        folder = self.chain[2]
+        destination = self.chain[0].find_child_by_name('side', kind='folder')
+        subtree = self.subtree_ids(folder)
+
+        folder.move_under(destination)
+
+        assert_equal(sorted(self.subtree_ids(folder)), sorted(subtree))
+        model.OsfStorageFileNode._clear_caches()
+        leaf = model.OsfStorageFileNode.load(self.leaf._id)
+        # level1 is no longer above the moved folder
+        assert_not_in(self.chain[1]._id, leaf.ancestor_ids)
+        assert_in(destination._id, leaf.ancestor_ids)
+        expected = '/level0/side/' + '/'.join('level{0}'.format(depth) for depth in range(2, self.DEPTH)) + '/leaf'
+        assert_equal(leaf.materialized_path(), expected)
+        assert_equal(
+            [each.name for each in leaf.get_ancestors()],
+            [''] + ['level0', 'side'] + ['level{0}'.format(depth) for depth in range(2, self.DEPTH)],
+        )
+
+    def test_move_subtree_across_nodes(self):
+        other_settings = ProjectFactory().get_addon('osfstorage')
+        destination = other_settings.root_node.append_folder('Cloud')
+        folder = self.chain[1]
+
+        folder.move_under(destination)
+
+        model.OsfStorageFileNode._clear_caches()
+        leaf = model.OsfStorageFileNode.load(self.leaf._id)
+        assert_equal(leaf.node_settings, other_settings)
+        assert_equal(leaf.get_ancestors()[0], other_settings.root_node)
+        assert_true(leaf.materialized_path().startswith('/Cloud/level1/'))
+        assert_equal(
+            model.OsfStorageFileNode.find(Q('node_settings', 'eq', other_settings)).count(),
+            len(self.subtree_ids(folder)) + 3,
+        )
+
+    def test_move_subtree_across_nodes_not_backfilled(self):
+        subtree = self.subtree_ids(self.chain[1])
+        self.unset_ancestor_ids()
+        other_settings = ProjectFactory().get_addon('osfstorage')
+        destination = other_settings.root_node.append_folder('Cloud')
+        folder = model.OsfStorageFileNode.load(self.chain[1]._id)
+
+        folder.move_under(destination)
+
+        model.OsfStorageFileNode._clear_caches()
+        leaf = model.OsfStorageFileNode.load(self.leaf._id)
+        assert_equal(leaf.node_settings, other_settings)
+        assert_true(leaf.materialized_path().startswith('/Cloud/level1/'))
+        # The moved subtree is backfilled
+        assert_equal(sorted(self.subtree_ids(folder)), sorted(subtree))
+        assert_equal(leaf.ancestor_ids[:3], [other_settings.root_node._id, destination._id, folder._id])
+
+    def test_copy_sets_ancestor_ids(self):
+        destination = self.root.append_folder('Cloud')
+        copied = self.chain[-1].copy_under(destination)
+        leaf = copied.find_child_by_name('leaf')
+        assert_equal(leaf.ancestor_ids, [self.root._id, destination._id, copied._id])
+
+
 class TestNodeSettingsModel(StorageTestCase):
 
     def test_fields(self):
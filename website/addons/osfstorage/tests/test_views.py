@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 
 import os
+import mock
 import datetime
 from nose.tools import *  # noqa
 
@@ -74,6 +75,22 @@ class TestGetMetadataHook(HookTestCase):
             record.serialized()
         )
 
+    @mock.patch('framework.analytics.session')
+    def test_children_download_counts(self, mock_session):
+        mock_session.data = {}
+        folder = self.node_settings.root_node.append_folder('Cloud')
+        records = [folder.append_file('file{0}'.format(index)) for index in range(3)]
+        for index, record in enumerate(records):
+            for _ in range(index):
+                utils.update_analytics(self.project, record._id, 0)
+        res = self.send_hook(
+            'osfstorage_get_children',
+            {'fid': folder._id},
+            {},
+        )
+        downloads = dict((each['id'], each['downloads']) for each in res.json)
+        assert_equal(downloads, dict((record._id, index) for index, record in enumerate(records)))
+
     def test_osf_storage_root(self):
         auth = Auth(self.project.creator)
         result = views.osf_storage_root(self.node_settings, auth=auth)
@@ -109,6 +109,7 @@ def copy_files(src, target_settings, parent=None, name=None):
     """
     cloned = src.clone()
     cloned.parent = parent
+    cloned.ancestor_ids = src.get_ancestor_ids_under(parent)
     cloned.name = name or cloned.name
     cloned.node_settings = target_settings
 
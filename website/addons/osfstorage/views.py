@@ -3,7 +3,6 @@ from __future__ import unicode_literals
 import httplib
 import logging
 
-from modularodm import Q
 from modularodm.storage.base import KeyExistsException
 
 from flask import request
@@ -98,16 +97,8 @@ def osfstorage_move_hook(source, destination, name=None, **kwargs):
 @must_be_signed
 @decorators.autoload_filenode(default_root=True)
 def osfstorage_get_lineage(file_node, node_addon, **kwargs):
-    #TODO Profile
-    list(model.OsfStorageFileNode.find(Q('kind', 'eq', 'folder') & Q('node_settings', 'eq', node_addon)))
-
-    lineage = []
-
-    while file_node:
-        lineage.append(file_node.serialized())
-        file_node = file_node.parent
-
-    return {'data': lineage}
+    lineage = [file_node] + file_node.get_ancestors()[::-1]
+    return {'data': [each.serialized() for each in lineage]}
 
 
 @must_be_signed
@@ -119,9 +110,11 @@ def osfstorage_get_metadata(file_node, **kwargs):
 @must_be_signed
 @decorators.autoload_filenode(must_be='folder')
 def osfstorage_get_children(file_node, **kwargs):
+    children = list(file_node.children)
+    model.OsfStorageFileNode.prefetch_download_counts(children)
     return [
         child.serialized()
-        for child in file_node.children
+        for child in children
     ]
 
 
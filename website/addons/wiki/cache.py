@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Cache of rendered wiki pages.
+
+Rendering a page (Markdown, Pygments, bleach) is by far the most expensive
+part of viewing or indexing a wiki, and saved versions never change, so the
+rendered HTML and its plain text are stored in the ``wikirendercache``
+collection and in a per-process LRU. Entries are addressed by a hash of the
+page content, the node the page is rendered for (wiki links point to that
+node) and the version of the rendering pipeline; upgrading any part of the
+pipeline therefore misses the old entries instead of serving stale output.
+"""
+
+import json
+import hashlib
+import datetime
+import threading
+import collections
+
+import bleach
+import markdown
+import pygments
+
+from framework.mongo import database
+
+from website import settings
+from website.addons.wiki import settings as wiki_settings
+
+
+CACHE_COLLECTION = 'wikirendercache'
+
+Rendered = collections.namedtuple('Rendered', ['html', 'text'])
+
+
+class LRUCache(object):
+    """Thread-safe mapping holding at most `max_size` items, evicting the
+    least recently used one when full.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_local_cache = LRUCache(wiki_settings.WIKI_RENDER_CACHE_SIZE)
+_pipeline_version = None
+
+
+def get_cache():
+    return database[CACHE_COLLECTION]
+
+
+def get_pipeline_version():
+    """Fingerprint of everything besides the content and the node that
+    affects the rendered output.
+    """
+    global _pipeline_version
+    if _pipeline_version is None:
+        parts = [
+            wiki_settings.WIKI_RENDER_VERSION,
+            getattr(markdown, 'version', None),
+            getattr(bleach, '__version__', None),
+            getattr(pygments, '__version__', None),
+            settings.WIKI_WHITELIST,
+        ]
+        _pipeline_version = hashlib.sha1(json.dumps(parts, sort_keys=True)).hexdigest()[:12]
+    return _pipeline_version
+
+
+def get_cache_key(content, node):
+    digest = hashlib.sha1()
+    digest.update(get_pipeline_version())
+    digest.update(node._id)
+    digest.update((content or u'').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_rendered(page, node, render):
+    """Return the cached :class:`Rendered` output of `page` for `node`,
+    calling ``render(page, node)`` and storing its result on a miss.
+    """
+    key = get_cache_key(page.content, node)
+    rendered = _local_cache.get(key)
+    if rendered is not None:
+        return rendered
+
+    record = get_cache().find_one({'_id': key}, {'html': True, 'text': True})
+    if record is not None:
+        rendered = Rendered(record['html'], record['text'])
+    else:
+        rendered = render(page, node)
+        get_cache().update(
+            {'_id': key},
+            {
+                'page_id': page._id,
+                'node_id': node._id,
+                'pipeline': get_pipeline_version(),
+                'html': rendered.html,
+                'text': rendered.text,
+                'date': datetime.datetime.utcnow(),
+            },
+            upsert=True,
+        )
+    _local_cache.set(key, rendered)
+    return rendered
+
+
+def prune():
+    """Remove the entries rendered by any other version of the pipeline.
+
+    :return: Number of entries removed
+    """
+    result = get_cache().remove({'pipeline': {'$ne': get_pipeline_version()}})
+    return result.get('n', 0) if result else 0
+
+
+def clear():
+    """Empty the in-process cache; persisted entries are kept."""
+    _local_cache.clear()
@@ -16,6 +16,7 @@ from framework.guid.model import GuidStoredObject
 
 from website import settings
 from website.addons.base import AddonNodeSettingsBase
+from website.addons.wiki import cache as wiki_cache
 from website.addons.wiki import utils as wiki_utils
 from website.addons.wiki.settings import WIKI_CHANGE_DATE
 from website.project.signals import write_permissions_revoked
@@ -119,22 +120,29 @@ class NodeWikiPage(GuidStoredObject):
     def rendered_before_update(self):
         return self.date < WIKI_CHANGE_DATE
 
-    def html(self, node):
-        """The cleaned HTML of the page"""
+    def render(self, node):
+        """Render the page for `node`, bypassing the cache.
+
+        :rtype: website.addons.wiki.cache.Rendered
+        """
         sanitized_content = render_content(self.content, node=node)
         try:
-            return linkify(
+            html = linkify(
                 sanitized_content,
                 [nofollow, ],
             )
         except TypeError:
             logger.warning('Returning unlinkified content.')
-            return sanitized_content
+            html = sanitized_content
+        return wiki_cache.Rendered(html, sanitize(html, tags=[], strip=True))
+
+    def html(self, node):
+        """The cleaned HTML of the page"""
+        return wiki_cache.get_rendered(self, node, NodeWikiPage.render).html
 
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
-
-        return sanitize(self.html(node), tags=[], strip=True)
+        return wiki_cache.get_rendered(self, node, NodeWikiPage.render).text
 
     def get_draft(self, node):
         """
@@ -7,3 +7,10 @@ SHAREJS_URL = '{}:{}'.format(SHAREJS_HOST, SHAREJS_PORT)
 
 # TODO: Change to release date for wiki change
 WIKI_CHANGE_DATE = datetime.datetime.utcfromtimestamp(1423760098)
+
+# Bump to invalidate every cached rendering of wiki pages, e.g. after changing
+# the Markdown extensions used by `render_content`. Upgrades of Markdown,
+# bleach, Pygments or changes to `WIKI_WHITELIST` are picked up automatically.
+WIKI_RENDER_VERSION = 1
+# Number of rendered pages kept in memory by each process
+WIKI_RENDER_CACHE_SIZE = 1000
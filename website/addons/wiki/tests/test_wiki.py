@@ -18,6 +18,7 @@ from tests.factories import (
 
 from website.addons.wiki import settings
 from website.addons.wiki import views
+from website.addons.wiki import cache as wiki_cache
 from website.addons.wiki.exceptions import InvalidVersionError
 from website.addons.wiki.model import NodeWikiPage, render_content
 from website.addons.wiki.utils import (
@@ -686,6 +687,75 @@ class TestWikiLinks(OsfTestCase):
         assert_equal(expected, wiki.html(node))
 
 
+class TestWikiRenderCache(OsfTestCase):
+
+    def setUp(self):
+        super(TestWikiRenderCache, self).setUp()
+        wiki_cache.clear()
+        self.project = ProjectFactory()
+        self.wiki = NodeWikiFactory(
+            content='**bold** [[wiki2]]',
+            node=self.project,
+        )
+
+    def tearDown(self):
+        wiki_cache.clear()
+        wiki_cache.get_cache().remove()
+        super(TestWikiRenderCache, self).tearDown()
+
+    def test_html_and_text(self):
+        html = self.wiki.html(self.project)
+        assert_in('<strong>bold</strong>', html)
+        assert_in(self.project.web_url_for('project_wiki_view', wname='wiki2'), html)
+        assert_equal(self.wiki.raw_text(self.project).strip(), 'bold wiki2')
+
+    def test_rendered_once(self):
+        with mock.patch.object(NodeWikiPage, 'render', wraps=self.wiki.render) as mock_render:
+            self.wiki.html(self.project)
+            self.wiki.html(self.project)
+            self.wiki.raw_text(self.project)
+        assert_equal(mock_render.call_count, 1)
+
+    def test_persisted_across_processes(self):
+        self.wiki.html(self.project)
+        wiki_cache.clear()
+        with mock.patch.object(NodeWikiPage, 'render') as mock_render:
+            assert_in('<strong>bold</strong>', self.wiki.html(self.project))
+        assert_false(mock_render.called)
+
+    def test_keyed_by_node(self):
+        fork = ProjectFactory()
+        assert_in(
+            fork.web_url_for('project_wiki_view', wname='wiki2'),
+            self.wiki.html(fork),
+        )
+        assert_in(
+            self.project.web_url_for('project_wiki_view', wname='wiki2'),
+            self.wiki.html(self.project),
+        )
+
+    def test_pipeline_version_change_misses(self):
+        self.wiki.html(self.project)
+        wiki_cache.clear()
+        with mock.patch.object(wiki_cache, '_pipeline_version', 'changed'):
+            with mock.patch.object(NodeWikiPage, 'render', wraps=self.wiki.render) as mock_render:
+                self.wiki.html(self.project)
+            assert_equal(mock_render.call_count, 1)
+            assert_equal(wiki_cache.prune(), 1)
+        assert_equal(wiki_cache.get_cache().count(), 1)
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = wiki_cache.LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        assert_equal(lru.get('b'), None)
+        assert_equal(lru.get('a'), 1)
+        assert_equal(lru.get('c'), 3)
+        assert_equal(len(lru), 2)
+
+
 class TestWikiUuid(OsfTestCase):
 
     def setUp(self):
@@ -16,8 +16,10 @@ from framework.sentry import sentry
 from framework.mongo import handlers as mongo_handlers
 from framework.tasks import handlers as task_handlers
 from framework.transactions import handlers as transaction_handlers
+from framework.routing import templates as routing_templates
 
 import website.models
+from website import mails
 from website.routes import make_url_map
 from website.addons.base import init_addon
 from website.project.model import ensure_schemas, Node
@@ -85,6 +87,16 @@ def build_log_templates(settings):
         build_fp.write('\n')
         build_addon_log_templates(build_fp, settings)
 
+def precompile_templates(settings):
+    """Compile every web and email template ahead of the first request."""
+    count = routing_templates.registry.precompile(
+        [settings.TEMPLATES_PATH] + routing_templates.get_addon_template_dirs(),
+        exclude=[mails.EMAIL_TEMPLATES_DIR],
+    )
+    count += mails.precompile_templates()
+    logger.debug('Precompiled {0} templates'.format(count))
+
+
 def do_set_backends(settings):
     logger.debug('Setting storage backends')
     set_up_storage(
@@ -124,6 +136,9 @@ def init_app(settings_module='website.settings', set_backends=True, routes=True,
     if attach_request_handlers:
         attach_handlers(app, settings)
 
+    if routes and not app.debug:
+        precompile_templates(settings)
+
     if app.debug:
         logger.info("Sentry disabled; Flask's debug mode enabled")
     else:
@@ -14,6 +14,7 @@ from framework.transactions.handlers import no_auto_transaction
 
 from website import settings
 from website.models import Node
+from website.addons.osfstorage.model import OsfStorageFileNode
 from website.util import web_url_for
 from website.mails import send_mail
 from website.mails import CONFERENCE_SUBMITTED, CONFERENCE_INACTIVE, CONFERENCE_FAILED
@@ -125,14 +126,17 @@ def add_poster_by_email(conference, message):
     )
 
 
-def _render_conference_node(node, idx):
-    storage_settings = node.get_addon('osfstorage')
-    records = storage_settings.root_node.children
-    try:
-        record = next(
-            each for each in records
-            if not each.is_deleted,
-        )
+def _get_conference_record(node):
+    """Return the first file uploaded to `node`, or `None`."""
+    records = node.get_addon('osfstorage').root_node.children
+    return next(
+        (each for each in records if not each.is_deleted),
+        None,
+    )
+
+
+def _render_conference_node(node, idx, record):
+    if record is not None:
         download_count = record.get_download_count()
 
         download_url = node.web_url_for(
@@ -142,7 +146,7 @@ def _render_conference_node(node, idx):
             action='download',
             _absolute=True,
         )
-    except StopIteration:
+    else:
         download_url = ''
         download_count = 0
 
@@ -168,15 +172,18 @@ def conference_data(meeting):
     except ModularOdmException:
         raise HTTPError(httplib.NOT_FOUND)
 
-    nodes = Node.find(
+    nodes = list(Node.find(
         Q('tags', 'iexact', meeting) &
         Q('is_public', 'eq', True) &
         Q('is_deleted', 'eq', False)
-    )
+    ))
+
+    records = [_get_conference_record(each) for each in nodes]
+    OsfStorageFileNode.prefetch_download_counts([each for each in records if each is not None])
 
     ret = [
-        _render_conference_node(each, idx)
-        for idx, each in enumerate(nodes)
+        _render_conference_node(each, idx, record)
+        for idx, (each, record) in enumerate(zip(nodes, records))
     ]
     return ret
 
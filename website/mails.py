@@ -21,8 +21,9 @@ Usage: ::
 import os
 import logging
 
-from mako.lookup import TemplateLookup, Template
+from mako.lookup import TemplateLookup
 from framework.email import tasks
+from framework.routing.templates import MODULE_DIRECTORY, TemplateRegistry
 from website import settings
 
 logger = logging.getLogger(__name__)
@@ -31,8 +32,13 @@ EMAIL_TEMPLATES_DIR = os.path.join(settings.TEMPLATES_PATH, 'emails')
 
 _tpl_lookup = TemplateLookup(
     directories=[EMAIL_TEMPLATES_DIR],
+    module_directory=os.path.join(MODULE_DIRECTORY, 'emails'),
+    filesystem_checks=settings.DEBUG_MODE,
 )
 
+#: Compiled message and subject templates
+registry = TemplateRegistry({True: _tpl_lookup})
+
 TXT_EXT = '.txt.mako'
 HTML_EXT = '.html.mako'
 
@@ -59,15 +65,25 @@ class Mail(object):
         return render_message(tpl_name, **context)
 
     def subject(self, **context):
-        return Template(self._subject).render(**context)
+        return render_subject(self._subject, **context)
 
 
 def render_message(tpl_name, **context):
     """Render an email message."""
-    tpl = _tpl_lookup.get_template(tpl_name)
+    tpl = registry.get_template(os.path.join(EMAIL_TEMPLATES_DIR, tpl_name))
     return tpl.render(**context)
 
 
+def render_subject(subject, **context):
+    """Render an email subject from its template string."""
+    return registry.get_string_template(subject).render(**context)
+
+
+def precompile_templates():
+    """Compile all email templates, e.g. when a worker starts."""
+    return registry.precompile([EMAIL_TEMPLATES_DIR])
+
+
 def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
             username=None, password=None, mail_server=None, callback=None, **context):
     """Send an email from the OSF.
@@ -86,21 +102,63 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
     .. note:
          Uses celery if available
     """
-    from_addr = from_addr or settings.FROM_EMAIL
     mailer = mailer or tasks.send_email
-    subject = mail.subject(**context)
-    message = mail.text(**context) if mimetype in ('plain', 'txt') else mail.html(**context)
+    kwargs = render_mail(to_addr, mail, mimetype=mimetype, from_addr=from_addr, **context)
     # Don't use ttls and login in DEBUG_MODE
     ttls = login = not settings.DEBUG_MODE
     logger.debug('Sending email...')
-    logger.debug(u'To: {to_addr}\nFrom: {from_addr}\nSubject: {subject}\nMessage: {message}'.format(**locals()))
+    logger.debug(u'To: {to_addr}\nFrom: {from_addr}\nSubject: {subject}\nMessage: {message}'.format(**kwargs))
 
-    kwargs = dict(
-        from_addr=from_addr,
+    kwargs.update(
+        ttls=ttls,
+        login=login,
+        username=username,
+        password=password,
+        mail_server=mail_server)
+
+    if settings.USE_CELERY:
+        return mailer.apply_async(kwargs=kwargs, link=callback)
+    else:
+        ret = mailer(**kwargs)
+        if callback:
+            callback()
+
+        return ret
+
+
+def render_mail(to_addr, mail, mimetype='plain', from_addr=None, **context):
+    """Render an email for :func:`send_mails`.
+
+    :return: dict of ``from_addr``, ``to_addr``, ``subject``, ``message`` and
+        ``mimetype``
+    """
+    return dict(
+        from_addr=from_addr or settings.FROM_EMAIL,
         to_addr=to_addr,
-        subject=subject,
-        message=message,
+        subject=mail.subject(**context),
+        message=mail.text(**context) if mimetype in ('plain', 'txt') else mail.html(**context),
         mimetype=mimetype,
+    )
+
+
+def send_mails(messages, mailer=None, username=None, password=None, mail_server=None,
+               callback=None):
+    """Send several emails rendered with :func:`render_mail` with a single
+    task, over a single SMTP session. Example: ::
+
+        mails.send_mails([
+            mails.render_mail(user.username, mails.DIGEST, mimetype='html', name=user.fullname, message=message)
+            for user, message in digests
+        ])
+
+    :param list messages: Rendered emails
+    :param function callback: celery task to execute after all emails are sent
+    """
+    mailer = mailer or tasks.send_emails
+    ttls = login = not settings.DEBUG_MODE
+    logger.debug('Sending {0} emails...'.format(len(messages)))
+    kwargs = dict(
+        messages=messages,
         ttls=ttls,
         login=login,
         username=username,
@@ -1,5 +1,4 @@
 from babel import dates, core, Locale
-from mako.lookup import Template
 
 from website import mails
 from website import models as website_models
@@ -28,8 +27,9 @@ def email_transactional(recipient_ids, uid, event, user, node, timestamp, **cont
     template = event + '.html.mako'
     context['title'] = node.title
     context['user'] = user
-    subject = Template(EMAIL_SUBJECT_MAP[event]).render(**context)
+    subject = mails.render_subject(EMAIL_SUBJECT_MAP[event], **context)
 
+    messages = []
     for user_id in recipient_ids:
         recipient = website_models.User.load(user_id)
         email = recipient.username
@@ -37,7 +37,7 @@ def email_transactional(recipient_ids, uid, event, user, node, timestamp, **cont
         message = mails.render_message(template, **context)
 
         if user._id != recipient._id:
-            mails.send_mail(
+            messages.append(mails.render_mail(
                 to_addr=email,
                 mail=mails.TRANSACTIONAL,
                 mimetype='html',
@@ -47,7 +47,9 @@ def email_transactional(recipient_ids, uid, event, user, node, timestamp, **cont
                 subject=subject,
                 message=message,
                 url=get_settings_url(uid, recipient)
-            )
+            ))
+    if messages:
+        mails.send_mails(messages)
 
 
 def email_digest(recipient_ids, uid, event, user, node, timestamp, **context):
@@ -161,13 +163,7 @@ def get_node_lineage(node):
     """ Get a list of node ids in order from the node to top most project
         e.g. [parent._id, node._id]
     """
-    lineage = [node._id]
-
-    while node.parent_id:
-        node = website_models.Node.load(node.parent_id)
-        lineage = [node._id] + lineage
-
-    return lineage
+    return node.ancestor_ids + [node._id]
 
 
 def get_settings_url(uid, user):
@@ -1,3 +1,4 @@
+import pymongo
 from modularodm import fields
 
 from framework.mongo import StoredObject, ObjectId
@@ -54,6 +55,17 @@ class NotificationSubscription(StoredObject):
 
 
 class NotificationDigest(StoredObject):
+
+    # Digests are sent by streaming them in user order; see scripts/send_digest.py
+    __indices__ = [
+        {
+            'key_or_list': [
+                ('user_id', pymongo.ASCENDING),
+                ('timestamp', pymongo.ASCENDING),
+            ],
+        }
+    ]
+
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
     user_id = fields.StringField()
     timestamp = fields.DateTimeField()
@@ -9,6 +9,7 @@ from collections import OrderedDict
 import warnings
 
 import pytz
+import pymongo
 from flask import request
 from django.core.urlresolvers import reverse
 
@@ -262,6 +263,24 @@ class Comment(GuidStoredObject):
 @unique_on(['params.node', '_id'])
 class NodeLog(StoredObject):
 
+    __indices__ = [
+        # Logs of a node, newest first. Log ids are ObjectIds, so that they
+        # sort by creation like the embedded `Node.logs` list used to
+        {
+            'key_or_list': [
+                ('owner', pymongo.ASCENDING),
+                ('_id', pymongo.DESCENDING),
+            ],
+        },
+        # Aggregate log feed of a node and its descendants, newest first
+        {
+            'key_or_list': [
+                ('feed_ids', pymongo.ASCENDING),
+                ('_id', pymongo.DESCENDING),
+            ],
+        },
+    ]
+
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
 
     date = fields.DateTimeField(default=datetime.datetime.utcnow, index=True)
@@ -274,6 +293,14 @@ class NodeLog(StoredObject):
     user = fields.ForeignField('user', backref='created')
     foreign_user = fields.StringField()
 
+    # The node this log was added to. Copies of the node share the log
+    # through `Node.shared_logs_from`
+    owner = fields.ForeignField('node')
+
+    # Ids of the nodes whose aggregate feed includes this log: the nodes
+    # having it in their history and all of their primary ancestors
+    feed_ids = fields.StringField(list=True)
+
     DATE_FORMAT = '%m/%d/%Y %H:%M UTC'
 
     # Log action constants
@@ -345,6 +372,42 @@ class NodeLog(StoredObject):
         return ('<NodeLog({self.action!r}, params={self.params!r}) '
                 'with id {self._id!r}>').format(self=self)
 
+    @classmethod
+    def add_to_feeds(cls, sources, node_ids):
+        """Add logs to the feeds of `node_ids` with one multi-update per
+        source.
+
+        :param list sources: (<owner id>, <id of the last log or None>) pairs,
+            as returned by `Node.get_log_sources`
+        """
+        collection = cls._storage[0].store
+        for owner_id, until in sources:
+            spec = {'owner': owner_id}
+            if until:
+                spec['_id'] = {'$lte': until}
+            collection.update(
+                spec,
+                {'$addToSet': {'feed_ids': {'$each': node_ids}}},
+                multi=True,
+            )
+        cls._clear_caches()
+
+    @classmethod
+    def update_feeds(cls, node_id, added=None, removed=None):
+        """Move every log in the feed of node `node_id`, which includes the
+        logs of its descendants, out of the feeds of `removed` and into the
+        feeds of `added`, e.g. when the node gets new ancestors.
+        """
+        collection = cls._storage[0].store
+        query = {'feed_ids': node_id}
+        # $pullAll and $addToSet cannot modify the same field in a single update
+        if removed:
+            collection.update(query, {'$pullAll': {'feed_ids': removed}}, multi=True)
+        if added:
+            collection.update(query, {'$addToSet': {'feed_ids': {'$each': added}}}, multi=True)
+        if added or removed:
+            cls._clear_caches()
+
     @property
     def node(self):
         """Return the :class:`Node` associated with this log."""
@@ -517,6 +580,31 @@ class NodeUpdateError(Exception):
 
 class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
+    __indices__ = [
+        # Keyset (cursor) pagination of API node lists
+        {
+            'key_or_list': [
+                ('date_created', pymongo.DESCENDING),
+                ('_id', pymongo.DESCENDING),
+            ],
+        },
+        # Nodes visible to a user: public nodes, or nodes the user can read
+        {
+            'key_or_list': [
+                ('is_public', pymongo.ASCENDING),
+                ('is_deleted', pymongo.ASCENDING),
+                ('date_created', pymongo.DESCENDING),
+            ],
+        },
+        {
+            'key_or_list': [
+                ('reader_ids', pymongo.ASCENDING),
+                ('is_deleted', pymongo.ASCENDING),
+                ('date_created', pymongo.DESCENDING),
+            ],
+        },
+    ]
+
     #: Whether this is a pointer or not
     primary = True
 
@@ -559,6 +647,14 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         'category',
     ]
 
+    # Node fields whose change requires updating the lineage of descendants
+    ANCESTRY_FIELDS = {
+        'nodes',
+        'permissions',
+        'ancestor_ids',
+        'ancestor_admin_ids',
+    }
+
     _id = fields.StringField(primary=True)
 
     date_created = fields.DateTimeField(auto_now_add=datetime.datetime.utcnow, index=True)
@@ -614,13 +710,30 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     contributors = fields.ForeignField('user', list=True, backref='contributed')
     users_watching_node = fields.ForeignField('user', list=True, backref='watched')
 
-    logs = fields.ForeignField('nodelog', list=True, backref='logged')
+    # Logs are stored in the `nodelog` collection (see `NodeLog.owner`).
+    # Forks, registrations and templated nodes share the history of the node
+    # they were copied from, up to and including its log `shared_logs_until`
+    shared_logs_from = fields.ForeignField('node')
+    shared_logs_until = fields.StringField()
+    # Size and most recent log of the history, maintained by `add_log`
+    log_count = fields.IntegerField(default=0)
+    last_log = fields.ForeignField('nodelog')
+
     tags = fields.ForeignField('tag', list=True, backref='tagged')
 
     # Tags for internal use
     system_tags = fields.StringField(list=True)
 
     nodes = fields.AbstractForeignField(list=True, backref='parent')
+
+    # Materialized lineage, maintained by `update_descendant_ancestry`:
+    # primary keys of all primary ancestors ordered from the root down to the
+    # parent, and the ids of users with admin permission on any of them
+    ancestor_ids = fields.StringField(list=True, index=True)
+    ancestor_admin_ids = fields.StringField(list=True)
+    # Ids of users with read access: contributors and admins of ancestors.
+    # Maintained on save, so that visibility can be queried by equality
+    reader_ids = fields.StringField(list=True)
     forked_from = fields.ForeignField('node', backref='forked', index=True)
     registered_from = fields.ForeignField('node', backref='registrations', index=True)
 
@@ -638,6 +751,12 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     }
 
     def __init__(self, *args, **kwargs):
+        if kwargs.get('_is_loaded', False):
+            # Nodes not migrated yet by scripts/migrate_node_logs.py still
+            # store the ids of their logs; they are ignored, and kept in the
+            # database for the migration since saves only set fields
+            kwargs.pop('logs', None)
+
         super(Node, self).__init__(*args, **kwargs)
 
         if kwargs.get('_is_loaded', False):
@@ -750,9 +869,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def is_admin_parent(self, user):
         if self.has_permission(user, 'admin', check_parent=False):
             return True
-        if self.parent_node:
-            return self.parent_node.is_admin_parent(user)
-        return False
+        return user is not None and user._id in self.ancestor_admin_ids
 
     def can_view(self, auth):
         if not auth and not self.is_public:
@@ -909,28 +1026,91 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
     @property
     def visible_contributors(self):
-        return [
-            User.load(_id)
-            for _id in self.visible_contributor_ids
-        ]
+        return User.load_many(self.visible_contributor_ids)
 
     @property
     def parents(self):
-        if self.parent_node:
-            return [self.parent_node] + self.parent_node.parents
-        return []
+        """Non-deleted ancestors of this node, nearest first.
+        """
+        parents = []
+        for parent in reversed(Node.load_many(self.ancestor_ids)):
+            if parent.is_deleted:
+                break
+            parents.append(parent)
+        return parents
+
+    @property
+    def admin_ids(self):
+        return [
+            user_id for user_id, perms in self.permissions.iteritems()
+            if 'admin' in perms
+        ]
 
     @property
     def admin_contributor_ids(self, contributors=None):
         contributor_ids = self.contributors._to_primary_keys()
-        admin_ids = set()
-        for parent in self.parents:
-            admins = [
-                user for user, perms in parent.permissions.iteritems()
-                if 'admin' in perms
-            ]
-            admin_ids.update(set(admins).difference(contributor_ids))
-        return admin_ids
+        return set(self.ancestor_admin_ids).difference(contributor_ids)
+
+    def update_descendant_ancestry(self, update_logs=True):
+        """Propagate this node's lineage and admin permissions to the
+        materialized ``ancestor_ids`` and ``ancestor_admin_ids`` of its primary
+        descendants. Subtrees that are already up to date are skipped.
+
+        :param bool update_logs: Also move the logs of each changed subtree to
+            the feeds of its new ancestors. A single update covers the logs of
+            the whole subtree, so this is only done for direct children.
+        """
+        ancestor_ids = self.ancestor_ids + [self._id]
+        ancestor_admin_ids = sorted(
+            set(self.ancestor_admin_ids).union(self.admin_ids)
+        )
+        for child in self.nodes_primary:
+            if (child.ancestor_ids == ancestor_ids and
+                    sorted(child.ancestor_admin_ids) == ancestor_admin_ids):
+                continue
+            if update_logs and child.ancestor_ids != ancestor_ids:
+                NodeLog.update_feeds(
+                    child._id,
+                    added=[each for each in ancestor_ids if each not in child.ancestor_ids],
+                    removed=[each for each in child.ancestor_ids if each not in ancestor_ids],
+                )
+            child.ancestor_ids = ancestor_ids
+            child.ancestor_admin_ids = ancestor_admin_ids
+            child.reader_ids = child.get_reader_ids()
+            # Skip `Node.save` side effects; only lineage has changed
+            super(Node, child).save()
+            child.update_descendant_ancestry(update_logs=False)
+
+    def get_reader_ids(self):
+        return sorted(
+            set(self.contributors._to_primary_keys()).union(self.ancestor_admin_ids)
+        )
+
+    def _clear_ancestry(self):
+        """Reset lineage on a new top-level copy of this node; a parent
+        sets it again when the copy is added to its `nodes`.
+        """
+        self.ancestor_ids = []
+        self.ancestor_admin_ids = []
+
+    def _share_logs(self, original):
+        """Share the history of `original` with a new copy of it (fork,
+        registration or templated node) instead of copying its logs.
+        """
+        self.shared_logs_from = original
+        self.shared_logs_until = original.last_log._id if original.last_log else None
+        self.log_count = original.log_count
+        self.last_log = original.last_log
+
+    def _add_logs_to_feeds(self):
+        """Add the logs in the history of this node, including those shared
+        with the node it was copied from, to its feed and the feeds of its
+        ancestors.
+        """
+        NodeLog.add_to_feeds(
+            self.get_log_sources(),
+            self.ancestor_ids + [self._id],
+        )
 
     @property
     def admin_contributors(self):
@@ -1046,6 +1226,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def save(self, *args, **kwargs):
         update_piwik = kwargs.pop('update_piwik', True)
         self.adjust_permissions()
+        self.reader_ids = self.get_reader_ids()
 
         first_save = not self._is_loaded
 
@@ -1065,6 +1246,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
         saved_fields = super(Node, self).save(*args, **kwargs)
 
+        if self.ANCESTRY_FIELDS.intersection(saved_fields):
+            self.update_descendant_ancestry()
+
         if first_save and is_original and not suppress_log:
             # TODO: This logic also exists in self.use_as_template()
             for addon in settings.ADDONS_AVAILABLE:
@@ -1133,6 +1317,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             attributes = dict()
 
         new = self.clone()
+        new._clear_ancestry()
+        new._share_logs(self)
 
         # clear permissions, which are not cleared by the clone method
         new.permissions = {}
@@ -1204,6 +1390,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         ]
 
         new.save()
+        new._add_logs_to_feeds()
         return new
 
     ############
@@ -1340,11 +1527,37 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                     if include(descendant):
                         yield descendant
 
-    def get_aggregate_logs_queryset(self, auth):
-        ids = [self._id] + [n._id
-                            for n in self.get_descendants_recursive()
-                            if n.can_view(auth)]
-        query = Q('__backrefs.logged.node.logs', 'in', ids)
+    def get_hidden_descendants(self, auth):
+        """Return the primary descendants of this node that `auth` cannot
+        view.
+        """
+        query = Q('ancestor_ids', 'eq', self._id) & Q('is_public', 'eq', False)
+        if auth and auth.user:
+            query &= Q('reader_ids', 'ne', auth.user._id)
+        hidden = Node.find(query)
+        if auth and auth.private_key:
+            # Private links may grant access to some of the remaining nodes
+            return [node for node in hidden if not node.can_view(auth)]
+        return list(hidden)
+
+    def get_aggregate_logs_queryset(self, auth, before=None):
+        """Return the logs of this node and of its primary descendants that
+        `auth` can view, newest first, with one query on `NodeLog.feed_ids`.
+
+        :param str before: Only return logs older than the log with this
+            primary key
+        """
+        query = Q('feed_ids', 'eq', self._id)
+        if before:
+            query &= Q('_id', 'lt', before)
+        # Copies share logs owned by the nodes they were copied from
+        hidden_ids = [
+            owner_id
+            for node in self.get_hidden_descendants(auth)
+            for owner_id, _ in node.get_log_sources()
+        ]
+        if hidden_ids:
+            query &= Q('owner', 'nin', hidden_ids)
         return NodeLog.find(query).sort('-_id')
 
     @property
@@ -1455,23 +1668,67 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # Return forked content
         return forked
 
+    def get_log_sources(self):
+        """Return the nodes owning the logs in the history of this node, as
+        (<node id>, <id of the last shared log or None>) pairs: this node, then
+        the nodes it was copied from, nearest first.
+        """
+        sources = [(self._id, None)]
+        node, until = self, None
+        while node.shared_logs_from and node.shared_logs_until:
+            until = min(until, node.shared_logs_until) if until else node.shared_logs_until
+            node = node.shared_logs_from
+            sources.append((node._id, until))
+        return sources
+
+    def get_logs_query(self):
+        """Return the query for the logs in the history of this node."""
+        query = None
+        for owner_id, until in self.get_log_sources():
+            clause = Q('owner', 'eq', owner_id)
+            if until:
+                clause &= Q('_id', 'lte', until)
+            query = clause if query is None else query | clause
+        return query
+
+    def get_logs_queryset(self, after=None, before=None):
+        """Return the logs in the history of this node, newest first.
+
+        :param str after: Only return logs newer than the log with this
+            primary key
+        :param str before: Only return logs older than the log with this
+            primary key
+        """
+        query = self.get_logs_query()
+        if after:
+            query &= Q('_id', 'gt', after)
+        if before:
+            query &= Q('_id', 'lt', before)
+        return NodeLog.find(query).sort('-_id')
+
+    @property
+    def logs(self):
+        """All logs in the history of this node, oldest first. Loads the
+        whole history; prefer `get_logs_queryset`, `log_count` and `last_log`.
+        """
+        return list(reversed(list(self.get_logs_queryset())))
+
     def get_recent_logs(self, n=10):
         """Return a list of the n most recent logs, in reverse chronological
         order.
 
         :param int n: Number of logs to retrieve
         """
-        return list(reversed(self.logs)[:n])
+        return list(self.get_logs_queryset()[:n])
 
     @property
     def date_modified(self):
         '''The most recent datetime when this node was modified, based on
         the logs.
         '''
-        try:
-            return self.logs[-1].date
-        except IndexError:
-            return self.date_created
+        if self.last_log:
+            return self.last_log.date
+        return self.date_created
 
     def set_title(self, title, auth, save=False):
         """Set the title of this Node and log it.
@@ -1526,7 +1783,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def update_search(self):
         from website import search
         try:
-            search.search.update_node(self)
+            search.search.update_node(self, bulk=True)
         except search.exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception()
@@ -1630,8 +1887,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # the cloned node must pass itself to its wiki objects to build the
         # correct URLs to that content.
         forked = original.clone()
+        forked._clear_ancestry()
 
-        forked.logs = self.logs
+        forked._share_logs(original)
         forked.tags = self.tags
 
         # Recursively fork child nodes
@@ -1680,6 +1938,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         )
 
         forked.save()
+        forked._add_logs_to_feeds()
         # After fork callback
         for addon in original.get_addons():
             _, message = addon.after_fork(original, forked, user)
@@ -1722,6 +1981,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             raise NodeStateError('Cannot register deleted node.')
 
         registered = original.clone()
+        registered._clear_ancestry()
 
         registered.is_registration = True
         registered.registered_date = when
@@ -1735,7 +1995,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         registered.contributors = self.contributors
         registered.forked_from = self.forked_from
         registered.creator = self.creator
-        registered.logs = self.logs
+        registered._share_logs(original)
         registered.tags = self.tags
         registered.piwik_site_id = None
 
@@ -1759,6 +2019,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                     registered.nodes.append(child_registration)
 
         registered.save()
+        registered._add_logs_to_feeds()
 
         if settings.ENABLE_ARCHIVER:
             project_signals.after_create_registration.send(self, dst=registered, user=auth.user)
@@ -1812,8 +2073,11 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         )
         if log_date:
             log.date = log_date
+        log.owner = self
+        log.feed_ids = self.ancestor_ids + [self._id]
         log.save()
-        self.logs.append(log)
+        self.log_count += 1
+        self.last_log = log
         if save:
             self.save()
         if user:
@@ -1889,8 +2153,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         if doi:
             csl['DOI'] = doi
 
-        if self.logs:
-            csl['issued'] = datetime_to_csl(self.logs[-1].date)
+        if self.last_log:
+            csl['issued'] = datetime_to_csl(self.last_log.date)
 
         return csl
 
@@ -1941,10 +2205,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
     @property
     def root(self):
-        if self.parent_node:
-            return self.parent_node.root
-        else:
-            return self
+        parents = self.parents
+        return parents[-1] if parents else self
 
     @property
     def archiving(self):
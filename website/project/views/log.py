@@ -17,6 +17,9 @@ from website.project.decorators import must_be_valid_project
 
 logger = logging.getLogger(__name__)
 
+#: Largest number of logs returned per page by `get_logs`
+MAX_LOG_COUNT = 100
+
 
 @collect_auth
 @no_auto_transaction
@@ -55,12 +58,36 @@ def _get_logs(node, count, auth, page=0):
 
     return logs, total, pages
 
+
+def _get_logs_by_cursor(node, count, auth, cursor=None):
+    """Fetch the page of logs following `cursor` without counting the
+    whole feed, so that deep pages cost no more than the first one.
+
+    :param Node node:
+    :param int count:
+    :param auth:
+    :param str cursor: Cursor returned with the previous page, if any
+    :return: List of serialized logs, cursor of the next page or None
+    """
+    logs_set = node.get_aggregate_logs_queryset(auth, before=cursor)
+    results = list(logs_set.limit(count + 1))
+    anonymous = has_anonymous_link(node, auth)
+    logs = [
+        serialize_log(log, auth=auth, anonymous=anonymous)
+        for log in results[:count]
+    ]
+    next_cursor = results[count - 1]._id if len(results) > count else None
+    return logs, next_cursor
+
+
 @no_auto_transaction
 @collect_auth
 @must_be_valid_project(retractions_valid=True)
 def get_logs(auth, node, **kwargs):
-    """
-
+    """Return the aggregate log feed of a node and its components, either by
+    ``page`` number or, if a ``cursor`` argument is given (empty for the first
+    page), by cursor: the response then includes the cursor of the ``next``
+    page instead of the ``total`` and ``pages`` counts.
     """
     try:
         page = int(request.args.get('page', 0))
@@ -73,15 +100,27 @@ def get_logs(auth, node, **kwargs):
         raise HTTPError(http.FORBIDDEN)
 
     if 'count' in request.args:
-        count = int(request.args['count'])
+        count = request.args['count']
     elif 'count' in kwargs:
         count = kwargs['count']
     elif request.json and 'count' in request.json.keys():
         count = request.json['count']
     else:
         count = 10
+    try:
+        count = int(count)
+        if not 1 <= count <= MAX_LOG_COUNT:
+            raise ValueError
+    except (TypeError, ValueError):
+        raise HTTPError(http.BAD_REQUEST, data=dict(
+            message_long='Invalid value for "count".'
+        ))
 
     # Serialize up to `count` logs in reverse chronological order; skip
     # logs that the current user / API key cannot access
+    if 'cursor' in request.args:
+        logs, next_cursor = _get_logs_by_cursor(node, count, auth, request.args['cursor'])
+        return {'logs': logs, 'next': next_cursor}
+
     logs, total, pages = _get_logs(node, count, auth, page)
     return {'logs': logs, 'total': total, 'pages': pages, 'page': page}
@@ -32,7 +32,7 @@ from website.util.permissions import ADMIN, READ, WRITE
 from website.util.rubeus import collect_addon_js
 from website.project.model import has_anonymous_link, get_pointer_parent, NodeUpdateError
 from website.project.forms import NewNodeForm
-from website.models import Node, Pointer, WatchConfig, PrivateLink
+from website.models import Node, NodeLog, Pointer, WatchConfig, PrivateLink
 from website import settings
 from website.views import _render_nodes, find_dashboard, validate_page_num
 from website.profile import utils
@@ -719,7 +719,7 @@ def _view_project(node, auth, primary=False):
             'is_public': node.is_public,
             'is_archiving': node.archiving,
             'date_created': iso8601format(node.date_created),
-            'date_modified': iso8601format(node.logs[-1].date) if node.logs else '',
+            'date_modified': iso8601format(node.last_log.date) if node.last_log else '',
             'tags': [tag._primary_key for tag in node.tags],
             'children': bool(node.nodes),
             'is_registration': node.is_registration,
@@ -859,15 +859,10 @@ def get_editable_children(auth, node, **kwargs):
 def _get_user_activity(node, auth, rescale_ratio):
 
     # Counters
-    total_count = len(node.logs)
-
-    # Note: It's typically much faster to find logs of a given node
-    # attached to a given user using node.logs.find(...) than by
-    # loading the logs into Python and checking each one. However,
-    # using deep caching might be even faster down the road.
+    total_count = node.log_count
 
     if auth.user:
-        ua_count = node.logs.find(Q('user', 'eq', auth.user)).count()
+        ua_count = NodeLog.find(node.get_logs_query() & Q('user', 'eq', auth.user)).count()
     else:
         ua_count = 0
 
@@ -888,7 +883,7 @@ def _get_user_activity(node, auth, rescale_ratio):
 
 @must_be_valid_project
 def get_recent_logs(node, **kwargs):
-    logs = list(reversed(node.logs._to_primary_keys()))[:3]
+    logs = [log._id for log in node.get_recent_logs(3)]
     return {'logs': logs}
 
 
@@ -939,7 +934,7 @@ def _get_summary(node, auth, rescale_ratio, primary=True, link_id=None, show_pat
         if rescale_ratio:
             ua_count, ua, non_ua = _get_user_activity(node, auth, rescale_ratio)
             summary.update({
-                'nlogs': len(node.logs),
+                'nlogs': node.log_count,
                 'ua_count': ua_count,
                 'ua': ua,
                 'non_ua': non_ua,
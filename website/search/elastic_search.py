@@ -227,69 +227,112 @@ def get_doctype_from_node(node):
         return node.category
 
 
+def serialize_node(node, category):
+    from website.addons.wiki.model import NodeWikiPage
+
+    try:
+        normalized_title = six.u(node.title)
+    except TypeError:
+        normalized_title = node.title
+    normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
+
+    elastic_document = {
+        'id': node._id,
+        'contributors': [
+            {
+                'fullname': x.fullname,
+                'url': x.profile_url if x.is_active else None
+            }
+            for x in node.visible_contributors
+            if x is not None
+        ],
+        'title': node.title,
+        'normalized_title': normalized_title,
+        'category': category,
+        'public': node.is_public,
+        'tags': [tag._id for tag in node.tags if tag],
+        'description': node.description,
+        'url': node.url,
+        'is_registration': node.is_registration,
+        'is_retracted': node.is_retracted,
+        'pending_retraction': node.pending_retraction,
+        'embargo_end_date': node.embargo_end_date.strftime("%A, %b. %d, %Y") if node.embargo_end_date else False,
+        'pending_embargo': node.pending_embargo,
+        'registered_date': node.registered_date,
+        'wikis': {},
+        'parent_id': node.parent_id,
+        'date_created': node.date_created,
+        'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
+    }
+
+    if not node.is_retracted:
+        for wiki in NodeWikiPage.load_many(node.wiki_pages_current.values()):
+            elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
+
+    return elastic_document
+
+
+def node_should_be_indexed(node):
+    return not (node.is_deleted or not node.is_public or node.archiving)
+
+
+def node_action(node, index):
+    """Return a bulk action indexing `node`, or deleting its document if it
+    should not be searchable.
+    """
+    if node_should_be_indexed(node):
+        category = get_doctype_from_node(node)
+        return {
+            '_index': index,
+            '_type': category,
+            '_id': node._id,
+            '_source': serialize_node(node, category),
+        }
+    return {
+        '_op_type': 'delete',
+        '_index': index,
+        '_type': 'registration' if node.is_registration else node.project_or_component,
+        '_id': node._id,
+    }
+
+
 @requires_search
 def update_node(node, index=None):
     index = index or INDEX
-    from website.addons.wiki.model import NodeWikiPage
-
     category = get_doctype_from_node(node)
 
-    if category == 'project':
-        elastic_document_id = node._id
-        parent_id = None
-    else:
-        try:
-            elastic_document_id = node._id
-            parent_id = node.parent_id
-        except IndexError:
-            # Skip orphaned components
-            return
-    if node.is_deleted or not node.is_public or node.archiving:
-        delete_doc(elastic_document_id, node)
+    if node_should_be_indexed(node):
+        elastic_document = serialize_node(node, category)
+        es.index(index=index, doc_type=category, id=node._id, body=elastic_document,
+                 refresh=settings.ELASTIC_REFRESH_ON_WRITE)
     else:
-        try:
-            normalized_title = six.u(node.title)
-        except TypeError:
-            normalized_title = node.title
-        normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
-
-        elastic_document = {
-            'id': elastic_document_id,
-            'contributors': [
-                {
-                    'fullname': x.fullname,
-                    'url': x.profile_url if x.is_active else None
-                }
-                for x in node.visible_contributors
-                if x is not None
-            ],
-            'title': node.title,
-            'normalized_title': normalized_title,
-            'category': category,
-            'public': node.is_public,
-            'tags': [tag._id for tag in node.tags if tag],
-            'description': node.description,
-            'url': node.url,
-            'is_registration': node.is_registration,
-            'is_retracted': node.is_retracted,
-            'pending_retraction': node.pending_retraction,
-            'embargo_end_date': node.embargo_end_date.strftime("%A, %b. %d, %Y") if node.embargo_end_date else False,
-            'pending_embargo': node.pending_embargo,
-            'registered_date': node.registered_date,
-            'wikis': {},
-            'parent_id': parent_id,
-            'date_created': node.date_created,
-            'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
-        }
+        delete_doc(node._id, node, index=index)
 
-        if not node.is_retracted:
-            for wiki in [
-                NodeWikiPage.load(x)
-                for x in node.wiki_pages_current.values()
-            ]:
-                elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
 
-        es.index(index=index, doc_type=category, id=elastic_document_id, body=elastic_document, refresh=True)
+@requires_search
+def bulk_update_nodes(nodes, index=None):
+    """Index or remove many nodes with a single bulk request. Documents are
+    not refreshed individually; they become searchable on the index's next
+    scheduled refresh.
+
+    :param nodes: Projects, components or registrations
+    :param index: Index of the nodes
+    :return: Number of successful actions
+    """
+    index = index or INDEX
+    actions = [node_action(node, index) for node in nodes]
+    if not actions:
+        return 0
+    success, errors = helpers.bulk(
+        es, actions,
+        raise_on_error=False,
+        refresh=settings.ELASTIC_REFRESH_ON_WRITE,
+    )
+    for error in errors:
+        # Deleting a document that was never indexed is not an error
+        if error.get('delete', {}).get('status') != 404:
+            logger.error('Bulk indexing error: {0}'.format(error))
+    return success
 
 
 def bulk_update_contributors(nodes, index=INDEX):
@@ -320,16 +363,7 @@ def bulk_update_contributors(nodes, index=INDEX):
     return helpers.bulk(es, actions)
 
 
-@requires_search
-def update_user(user, index=None):
-    index = index or INDEX
-    if not user.is_active:
-        try:
-            es.delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
-        except NotFoundError:
-            pass
-        return
-
+def serialize_user(user):
     names = dict(
         fullname=user.fullname,
         given_name=user.given_name,
@@ -364,7 +398,33 @@ def update_user(user, index=None):
         'boost': 2,  # TODO(fabianvf): Probably should make this a constant or something
     }
 
-    es.index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
+    return user_doc
+
+
+def user_action(user, index):
+    """Return a bulk action indexing `user`, or ``None`` if inactive."""
+    if not user.is_active:
+        return None
+    return {
+        '_index': index,
+        '_type': 'user',
+        '_id': user._id,
+        '_source': serialize_user(user),
+    }
+
+
+@requires_search
+def update_user(user, index=None):
+    index = index or INDEX
+    if not user.is_active:
+        try:
+            es.delete(index=index, doc_type='user', id=user._id, refresh=settings.ELASTIC_REFRESH_ON_WRITE, ignore=[404])
+        except NotFoundError:
+            pass
+        return
+
+    user_doc = serialize_user(user)
+    es.index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=settings.ELASTIC_REFRESH_ON_WRITE)
 
 
 @requires_search
@@ -422,7 +482,7 @@ def create_index(index=None):
 def delete_doc(elastic_document_id, node, index=None, category=None):
     index = index or INDEX
     category = category or 'registration' if node.is_registration else node.project_or_component
-    es.delete(index=index, doc_type=category, id=elastic_document_id, refresh=True, ignore=[404])
+    es.delete(index=index, doc_type=category, id=elastic_document_id, refresh=settings.ELASTIC_REFRESH_ON_WRITE, ignore=[404])
 
 
 @requires_search
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Deferred, coalescing search indexing for nodes.
+
+Node updates are recorded in the ``searchindexqueue`` collection (one entry
+per node and index, so repeated updates collapse into one) instead of being
+indexed while the request is served. A flush task scheduled after the request
+drains the queue in batches with the Elasticsearch bulk API. Outside of a
+request the queue is flushed immediately.
+"""
+
+import logging
+import datetime
+import collections
+
+from framework.mongo import database
+from framework.tasks import app
+from framework.tasks.handlers import enqueue_task
+from framework.transactions.context import transaction
+
+from website import settings
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_COLLECTION = 'searchindexqueue'
+
+
+def get_queue():
+    return database[QUEUE_COLLECTION]
+
+
+def enqueue_node(node, index):
+    """Mark `node` as needing to be reindexed in `index` and schedule a flush.
+    """
+    now = datetime.datetime.utcnow()
+    get_queue().update(
+        {'_id': '{0}:{1}'.format(index, node._id)},
+        {
+            '$set': {'node_id': node._id, 'index': index, 'updated': now},
+            '$setOnInsert': {'enqueued': now},
+        },
+        upsert=True,
+    )
+    signature = flush_index_queue.si()
+    # Wait so that updates from concurrent requests are flushed together;
+    # identical signatures queued by one request are only sent once
+    signature.set(countdown=settings.SEARCH_INDEX_WINDOW)
+    enqueue_task(signature)
+
+
+def get_queue_stats():
+    """Return the number of nodes waiting to be indexed and the age in seconds
+    of the oldest queued update.
+    """
+    queue = get_queue()
+    oldest = queue.find_one(sort=[('enqueued', 1)])
+    lag = 0
+    if oldest is not None:
+        lag = (datetime.datetime.utcnow() - oldest['enqueued']).total_seconds()
+    return {
+        'pending': queue.count(),
+        'lag': lag,
+    }
+
+
+def flush_queue(batch_size=None):
+    """Index every queued node, oldest first, `batch_size` nodes per bulk
+    request. Entries updated again while being indexed are kept so that the
+    newer change is picked up by the next batch.
+
+    :return: Number of nodes indexed
+    """
+    from website.models import Node
+    from website.search import search
+
+    batch_size = batch_size or settings.SEARCH_INDEX_BATCH_SIZE
+    queue = get_queue()
+    stats = get_queue_stats()
+    if stats['lag'] > settings.SEARCH_INDEX_MAX_LAG:
+        logger.warn('Search index queue is {lag:.0f} seconds behind with {pending} nodes pending'.format(**stats))
+
+    flushed = 0
+    while True:
+        entries = list(queue.find().sort('enqueued', 1).limit(batch_size))
+        if not entries:
+            break
+        entries_by_index = collections.defaultdict(list)
+        for entry in entries:
+            entries_by_index[entry['index']].append(entry['node_id'])
+        for index, node_ids in entries_by_index.iteritems():
+            search.bulk_update_nodes(Node.load_many(node_ids), index=index)
+        for entry in entries:
+            queue.remove({'_id': entry['_id'], 'updated': entry['updated']})
+        flushed += len(entries)
+    return flushed
+
+
+@app.task(bind=True, max_retries=5, default_retry_delay=60)
+@transaction()
+def flush_index_queue(self):
+    from website.search.exceptions import SearchUnavailableError
+    try:
+        flush_queue()
+    except SearchUnavailableError as error:
+        raise self.retry(exc=error)
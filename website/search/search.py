@@ -1,6 +1,7 @@
 import logging
 
 from website import settings
+from website.search import indexing
 from website.search import share_search
 
 logger = logging.getLogger(__name__)
@@ -25,9 +26,20 @@ def search(query, index=None, doc_type=None):
     return search_engine.search(query, index=index, doc_type=doc_type)
 
 @requires_search
-def update_node(node, index=None):
+def update_node(node, index=None, bulk=False):
+    """Update the search document for `node`. If `bulk`, queue the update to
+    be sent with other pending updates after the current request.
+    """
     index = index or settings.ELASTIC_INDEX
-    search_engine.update_node(node, index=index)
+    if bulk:
+        indexing.enqueue_node(node, index=index)
+    else:
+        search_engine.update_node(node, index=index)
+
+@requires_search
+def bulk_update_nodes(nodes, index=None):
+    index = index or settings.ELASTIC_INDEX
+    search_engine.bulk_update_nodes(nodes, index=index)
 
 @requires_search
 def delete_node(node, index=None):
@@ -2,60 +2,211 @@
 # -*- coding: utf-8 -*-
 '''Migration script for Search-enabled Models.'''
 from __future__ import absolute_import
+from __future__ import division
 
+import time
 import logging
+import itertools
+import multiprocessing
 
 from elasticsearch import helpers
 from modularodm.query.querydialect import DefaultQueryDialect as Q
 
 from website import settings
 from framework.auth import User
+from framework.mongo import database
 from website.models import Node
 from website.app import init_app
 import website.search.search as search
+from website.search import elastic_search
 from scripts import utils as script_utils
 from website.search.elastic_search import es
 
 
 logger = logging.getLogger(__name__)
 
-def migrate_nodes(index):
-    logger.info("Migrating nodes to index: {}".format(index))
-    n_iter = 0
-    nodes = Node.find(Q('is_public', 'eq', True) & Q('is_deleted', 'eq', False))
-    for node in nodes:
-        search.update_node(node, index=index)
-        n_iter += 1
+# Records the target index and last indexed `_id` of each model so that an
+# interrupted migration can be resumed
+CHECKPOINT_COLLECTION = 'searchmigration'
+
+NODE_QUERY = {'is_public': True, 'is_deleted': False}
+
+
+def get_checkpoint(index):
+    return database[CHECKPOINT_COLLECTION].find_one({'_id': index})
+
+
+def save_checkpoint(index, **fields):
+    database[CHECKPOINT_COLLECTION].update(
+        {'_id': index},
+        {'$set': fields},
+        upsert=True,
+    )
+
+
+def clear_checkpoint(index):
+    database[CHECKPOINT_COLLECTION].remove({'_id': index})
+
+
+def iter_id_chunks(collection, query, after=None, chunk_size=None):
+    """Yield lists of primary keys matching `query` in ascending order, starting
+    after `after`. Each chunk is fetched with an indexed range query, so the
+    position in the collection never depends on a skip.
+    """
+    chunk_size = chunk_size or settings.SEARCH_MIGRATION_CHUNK_SIZE
+    while True:
+        spec = dict(query)
+        if after is not None:
+            spec['_id'] = {'$gt': after}
+        cursor = collection.find(spec, fields=['_id']).sort('_id', 1).limit(chunk_size)
+        ids = [each['_id'] for each in cursor]
+        if not ids:
+            return
+        yield ids
+        after = ids[-1]
+
+
+def build_actions(args):
+    """Build the bulk actions for one chunk; run in a worker process.
+    """
+    model_name, ids, index = args
+    if model_name == 'node':
+        actions = [
+            elastic_search.node_action(node, index)
+            for node in Node.load_many(ids)
+        ]
+    else:
+        actions = [
+            elastic_search.user_action(user, index)
+            for user in User.load_many(ids)
+        ]
+    Node._clear_caches()
+    return [action for action in actions if action is not None]
+
 
-    logger.info('Nodes migrated: {}'.format(n_iter))
+def _init_worker(app):
+    """Give each worker process its own request context, needed to build URLs.
+    """
+    app.test_request_context().push()
 
 
-def migrate_users(index):
+def migrate_model(model, query, index, checkpoint_index, pool=None, workers=1, chunk_size=None):
+    """Index every record of `model` matching `query` into `index`, building
+    documents for `workers` chunks at a time in `pool` and sending them with
+    the bulk API. Progress is saved to the checkpoint of `checkpoint_index`
+    after each batch of chunks.
+
+    :return: Number of successful actions
+    """
+    name = model._name
+    checkpoint = get_checkpoint(checkpoint_index) or {}
+    if checkpoint.get('{0}_done'.format(name)):
+        logger.info('All {0}s already migrated; skipping'.format(name))
+        return 0
+    after = checkpoint.get(name)
+    if after is not None:
+        logger.info('Resuming {0} migration after {1}'.format(name, after))
+
+    chunks = iter_id_chunks(model._storage[0].store, query, after=after, chunk_size=chunk_size)
+    mapper = pool.map if pool else map
+    n_docs = 0
+    start = time.time()
+    while True:
+        batch = list(itertools.islice(chunks, workers))
+        if not batch:
+            break
+        for actions in mapper(build_actions, [(name, ids, index) for ids in batch]):
+            if not actions:
+                continue
+            success, errors = helpers.bulk(es, actions, raise_on_error=False, refresh=False)
+            for error in errors:
+                # Nodes that cannot be indexed (e.g. while archiving) get a
+                # delete action, for a document the new index does not have
+                if error.get('delete', {}).get('status') != 404:
+                    logger.error('Bulk indexing error: {0}'.format(error))
+            n_docs += success
+        save_checkpoint(checkpoint_index, index=index, **{name: batch[-1][-1]})
+        elapsed = time.time() - start
+        logger.info('{0}s migrated: {1} ({2:.1f} docs/second)'.format(
+            name.capitalize(), n_docs, n_docs / elapsed if elapsed else 0,
+        ))
+
+    save_checkpoint(checkpoint_index, **{'{0}_done'.format(name): True})
+    return n_docs
+
+
+def migrate_nodes(index, checkpoint_index=None, pool=None, workers=1):
+    logger.info("Migrating nodes to index: {}".format(index))
+    return migrate_model(Node, NODE_QUERY, index, checkpoint_index or index, pool=pool, workers=workers)
+
+
+def migrate_users(index, checkpoint_index=None, pool=None, workers=1):
     logger.info("Migrating users to index: {}".format(index))
-    n_migr = 0
-    n_iter = 0
-    for user in User.find():
-        if user.is_active:
-            search.update_user(user, index=index)
-            n_migr += 1
-        n_iter += 1
+    return migrate_model(User, {}, index, checkpoint_index or index, pool=pool, workers=workers)
+
+
+def set_build_settings(index):
+    """Disable refreshes and replicas while the new index is being built.
+    """
+    es.indices.put_settings(index=index, body={
+        'index': {'refresh_interval': '-1', 'number_of_replicas': 0},
+    })
+
 
-    logger.info('Users iterated: {0}\nUsers migrated: {1}'.format(n_iter, n_migr))
+def restore_settings(index):
+    es.indices.put_settings(index=index, body={
+        'index': {
+            'refresh_interval': settings.ELASTIC_REFRESH_INTERVAL,
+            'number_of_replicas': settings.ELASTIC_NUMBER_OF_REPLICAS,
+        },
+    })
+    es.indices.refresh(index=index)
 
 
-def migrate(delete, index=None, app=None):
+def migrate(delete, index=None, app=None, workers=1, resume=False):
+    """Rebuild the search index into a new versioned index and point the
+    `index` alias at it.
+
+    :param bool delete: Delete the previous index version when done
+    :param str index: Alias of the index to rebuild
+    :param app: Flask app; initialized if not given
+    :param int workers: Number of processes building documents
+    :param bool resume: Continue an interrupted migration from its checkpoint
+    """
     index = index or settings.ELASTIC_INDEX
     app = app or init_app("website.settings", set_backends=True, routes=True)
 
     script_utils.add_file_logger(logger, __file__)
     ctx = app.test_request_context()
     ctx.push()
-    new_index = set_up_index(index)
 
-    migrate_nodes(new_index)
-    migrate_users(new_index)
+    checkpoint = get_checkpoint(index) if resume else None
+    if checkpoint:
+        new_index = checkpoint['index']
+        logger.info("Resuming migration into {}".format(new_index))
+    else:
+        clear_checkpoint(index)
+        new_index = set_up_index(index)
+        save_checkpoint(index, index=new_index)
+    set_build_settings(new_index)
+
+    pool = multiprocessing.Pool(workers, _init_worker, (app, )) if workers > 1 else None
+    start = time.time()
+    try:
+        n_docs = migrate_nodes(new_index, checkpoint_index=index, pool=pool, workers=workers)
+        n_docs += migrate_users(new_index, checkpoint_index=index, pool=pool, workers=workers)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    elapsed = time.time() - start
+    logger.info('Migrated {0} documents in {1:.0f} seconds ({2:.1f} docs/second)'.format(
+        n_docs, elapsed, n_docs / elapsed if elapsed else 0,
+    ))
 
+    restore_settings(new_index)
     set_up_alias(index, new_index)
+    clear_checkpoint(index)
 
     if delete:
         delete_old(new_index)
@@ -51,6 +51,13 @@ ANALYTICS_PATH = os.path.join(BASE_PATH, 'analytics')
 CORE_TEMPLATES = os.path.join(BASE_PATH, 'templates/log_templates.mako')
 BUILT_TEMPLATES = os.path.join(BASE_PATH, 'templates/_log_templates.mako')
 
+# Resolve `mod-meta` embeds while rendering a page instead of re-parsing the
+# rendered HTML for each level of nesting
+SINGLE_PASS_RENDERING = True
+# Threads used to call the views of a page's embeds; with more than one, the
+# views may not share the request's database connection or transaction
+MOD_META_FETCH_WORKERS = 1
+
 DOMAIN = 'http://localhost:5000/'
 API_DOMAIN = 'http://localhost:8000/'
 GNUPG_HOME = os.path.join(BASE_PATH, 'gpg')
@@ -65,6 +72,19 @@ SEARCH_ENGINE = 'elastic'  # Can be 'elastic', or None
 ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Refresh the index after every write so changes are searchable immediately;
+# only enable this for testing
+ELASTIC_REFRESH_ON_WRITE = False
+# Seconds to collect node updates before indexing them in one bulk request
+SEARCH_INDEX_WINDOW = 5
+SEARCH_INDEX_BATCH_SIZE = 500
+# Warn when the oldest queued update is older than this many seconds
+SEARCH_INDEX_MAX_LAG = 300
+# Index settings restored after a full reindex
+ELASTIC_REFRESH_INTERVAL = '1s'
+ELASTIC_NUMBER_OF_REPLICAS = 1
+# Number of records per bulk request when rebuilding the search index
+SEARCH_MIGRATION_CHUNK_SIZE = 500
 SHARE_ELASTIC_URI = ELASTIC_URI
 SHARE_ELASTIC_INDEX = 'share'
 # For old indices
@@ -90,6 +110,13 @@ SUPPORT_EMAIL = 'support@osf.io'
 MAIL_SERVER = 'smtp.sendgrid.net'
 MAIL_USERNAME = 'osf-smtp'
 MAIL_PASSWORD = ''  # Set this in local.py
+# Idle SMTP sessions kept open by each worker process
+MAIL_POOL_SIZE = 2
+# Seconds after which an idle SMTP session is checked before reuse
+MAIL_POOL_MAX_IDLE = 60
+MAIL_MAX_MESSAGES_PER_CONNECTION = 100
+# Messages sent per `send_emails` task by bulk senders such as the digest
+MAIL_BATCH_SIZE = 100
 
 # Mandrill
 MANDRILL_USERNAME = None
@@ -126,6 +153,22 @@ DB_NAME = 'osf20130903'
 DB_USER = None
 DB_PASS = None
 
+# Maximum number of MongoDB clients checked out at once per worker process
+DB_POOL_SIZE = 20
+# Seconds a request waits for a free client before failing; None waits forever
+DB_POOL_WAIT_TIMEOUT = 10
+
+# Seconds after its last write at which a session is removed by the TTL index
+SESSION_EXPIRATION = 60 * 60 * 24 * 30
+# Seconds after which an unchanged session is written anyway, to postpone its
+# expiration while it is in use
+SESSION_TOUCH_INTERVAL = 60 * 60
+# Per-process cache of the users of recently verified bearer tokens and Basic
+# credentials; a token revoked in CAS is accepted for up to AUTH_CACHE_TTL
+# seconds
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_SIZE = 10000
+
 # Cache settings
 SESSION_HISTORY_LENGTH = 5
 SESSION_HISTORY_IGNORE_RULES = [
@@ -189,6 +232,7 @@ CELERY_IMPORTS = (
     'framework.email.tasks',
     'framework.analytics.tasks',
     'website.mailchimp_utils',
+    'website.search.indexing',
     'scripts.send_digest'
 )
 
@@ -221,6 +265,14 @@ PIWIK_HOST = None
 PIWIK_ADMIN_TOKEN = None
 PIWIK_SITE_ID = None
 
+# Page counters
+# Page view increments are buffered by each process and written by a
+# background thread every this many seconds (0 writes them as soon as
+# possible) ...
+PAGE_COUNTER_FLUSH_INTERVAL = 10
+# ... or as soon as this many pages have pending increments
+PAGE_COUNTER_MAX_PENDING = 1000
+
 SENTRY_DSN = None
 SENTRY_DSN_JS = None
 
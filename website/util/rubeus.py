@@ -7,6 +7,7 @@ import datetime
 import hurry.filesize
 from modularodm import Q
 
+from framework.auth import User
 from framework.auth.decorators import Auth
 
 from website.util import paths
@@ -168,6 +169,12 @@ class NodeProjectCollector(object):
 
     def _collect_components(self, node, visited):
         rv = []
+        # Load the visible contributors of every child with a single query
+        User.load_many([
+            user_id
+            for child in node.nodes if child is not None
+            for user_id in child.resolve().visible_contributor_ids
+        ])
         for child in reversed(node.nodes):  # (child.resolve()._id not in visited or node.is_folder) and
             if child is not None and not child.is_deleted and child.resolve().can_view(auth=self.auth) and node.can_view(self.auth):
                 # visited.append(child.resolve()._id)
@@ -278,19 +285,18 @@ class NodeProjectCollector(object):
         modified_delta = delta_date(node.date_modified)
         date_modified = node.date_modified.isoformat()
         contributors = []
-        for contributor in node.contributors:
-            if contributor._id in node.visible_contributor_ids:
-                contributor_name = [
-                    contributor.family_name,
-                    contributor.given_name,
-                    contributor.fullname,
-                ]
-                contributors.append({
-                    'name': next(name for name in contributor_name if name),
-                    'url': contributor.url,
-                })
+        for contributor in node.visible_contributors:
+            contributor_name = [
+                contributor.family_name,
+                contributor.given_name,
+                contributor.fullname,
+            ]
+            contributors.append({
+                'name': next(name for name in contributor_name if name),
+                'url': contributor.url,
+            })
         try:
-            user = node.logs[-1].user
+            user = node.last_log.user
             modified_by = user.family_name or user.given_name
         except (AttributeError, IndexError):
             modified_by = ''
@@ -46,7 +46,7 @@ def _rescale_ratio(auth, nodes):
     if not nodes:
         return 0
     counts = [
-        len(node.logs)
+        node.log_count
         for node in nodes
         if node.can_view(auth)
     ]
@@ -255,29 +255,49 @@ def paginate(items, total, page, size):
 
 @must_be_logged_in
 def watched_logs_get(**kwargs):
+    """Return a page of the logs of the nodes watched by the current user,
+    newest first. Pages are selected by ``page`` number, or by the ``cursor``
+    returned as ``next`` with the previous page.
+    """
     user = kwargs['auth'].user
     try:
         page = int(request.args.get('page', 0))
+        if page < 0:
+            raise ValueError
     except ValueError:
         raise HTTPError(http.BAD_REQUEST, data=dict(
             message_long='Invalid value for "page".'
         ))
     try:
         size = int(request.args.get('size', 10))
+        if size < 1:
+            raise ValueError
     except ValueError:
         raise HTTPError(http.BAD_REQUEST, data=dict(
             message_long='Invalid value for "size".'
         ))
 
-    total = sum(1 for x in user.get_recent_log_ids())
-    paginated_logs, pages = paginate(user.get_recent_log_ids(), total, page, size)
-    logs = (model.NodeLog.load(id) for id in paginated_logs)
+    # Take one more log than needed to tell whether there is a next page;
+    # with a cursor, pages start after the last log of the previous page
+    cursor = request.args.get('cursor') or None
+    start = 0 if cursor else page * size
+    log_ids = list(itertools.islice(
+        user.get_recent_log_ids(before=cursor), start, start + size + 1
+    ))
+    if start and not log_ids:
+        raise HTTPError(http.BAD_REQUEST, data=dict(
+            message_long='Invalid value for "page".'
+        ))
+    has_more = len(log_ids) > size
+    log_ids = log_ids[:size]
+    logs = model.NodeLog.load_many(log_ids)
 
     return {
-        "logs": [serialize_log(log) for log in logs],
-        "total": total,
-        "pages": pages,
-        "page": page
+        'logs': [serialize_log(log) for log in logs],
+        'next': log_ids[-1] if has_more else None,
+        # The total is not counted; only tell whether there is a next page
+        'pages': page + 2 if has_more else page + 1,
+        'page': page,
     }
 
 